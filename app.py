@@ -1,54 +1,264 @@
 import sys
+import time
+STARTUP_BEGIN = time.perf_counter()  # 进程启动(导入 Qt 之前)的时间点，用于启动计时
+import ipc
+if __name__ == '__main__' and len(sys.argv) > 1 and sys.argv[1] in ipc.COMMANDS:
+    # 命令行控制：转发给正在运行的实例后立即退出，不导入 Qt
+    sys.exit(ipc.main(sys.argv[1:]))
+import argparse
 from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, 
-                            QCheckBox, QLineEdit, QLabel, QHBoxLayout, QFrame, QSlider, QComboBox, QGraphicsDropShadowEffect, QSystemTrayIcon, QMenu, QDialog)
-from PyQt5.QtCore import Qt, QPoint, pyqtSignal, QTimer, QEvent
-from PyQt5.QtGui import QIcon, QFont, QColor, QKeySequence, QPixmap
-import keyboard
+                            QCheckBox, QLineEdit, QLabel, QHBoxLayout, QFrame, QSlider, QComboBox, QGraphicsDropShadowEffect, QSystemTrayIcon, QMenu, QDialog, QScrollArea)
+from PyQt5.QtCore import Qt, QObject, QPoint, pyqtSignal, QTimer, QEvent
+from PyQt5.QtGui import QIcon, QFont, QColor, QKeySequence, QPixmap, QCursor, QPainter
 import os
-import winreg as reg
 import json
-import wmi  # 添加到文件顶部的导入部分
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from hotkey import HotkeyEngine
+from brightness import BrightnessController
+from blackout import BlackoutStateMachine
+from platform_backend import get_backend
+from profiling import StartupProfiler
+from settings_store import SettingsStore
+from idle import IdleScheduler
+from wake import WakeDetector, WakeTraceRecorder
+from control_server import ControlServer
+from stall_watchdog import StallWatchdog
+from auto_blackout import AutoBlackout
+from blackout_schedule import BlackoutScheduler, ScheduleRule
+from hooks import HookPipeline, lock_hook, mute_hook, pause_media_hook, script_hook
+import theme
+import blur
+from metrics import metrics, MetricsServer, DURATION_BUCKETS
+from tracing import tracer
+
+# 以下指标只在 GUI 线程中更新
+BLACKOUTS = metrics.counter('blackany_blackouts_total', '显示黑屏的次数')
+RESTORES = metrics.counter('blackany_restores_total', '退出黑屏的次数')
+BLACKOUT_SECONDS = metrics.histogram('blackany_blackout_duration_seconds', '每次黑屏持续的时间',
+                                     DURATION_BUCKETS)
+HOTKEY_TO_OVERLAY = metrics.histogram('blackany_hotkey_to_overlay_seconds',
+                                      '从收到按键事件到黑屏窗口显示的延迟')
 
 class FloatingButton(QWidget):
-    def __init__(self):
+    startupFinished = pyqtSignal()  # 延迟初始化全部完成
+    FADE_CHOICES = [('关闭', 0), ('快速', 150), ('标准', 300), ('缓慢', 800)]  # 亮度渐变时长(ms)
+    # 鼠标唤醒灵敏度：(距离 像素, 速度 像素/秒)
+    WAKE_CHOICES = [('灵敏', (15, 200)), ('标准', (WakeDetector.DISTANCE, WakeDetector.VELOCITY)),
+                    ('迟钝', (60, 800))]
+    OVERLAY_MODES = [('纯黑', 'black'), ('磨砂', 'frosted')]  # 黑屏样式
+    AUTO_BLACKOUT_CHOICES = [('关闭', 0), ('1 分钟', 1), ('5 分钟', 5), ('10 分钟', 10),
+                             ('15 分钟', 15), ('30 分钟', 30), ('60 分钟', 60)]  # 无操作自动黑屏
+    # 设置文件中的字段 -> 对应的属性
+    SETTINGS_ATTRS = {
+        'shortcut': 'shortcut',
+        'hide_cursor': 'hide_cursor',
+        'startup': 'startup',
+        'position': 'default_position',
+        'enable_mouse_exit': 'mouse_exit_enabled',
+        'hide_button': 'hide_button',
+        'hotkey_backend': 'hotkey_backend',
+        'fade_duration': 'fade_duration',
+        'low_power_overlay': 'low_power_overlay',
+        'wake_distance': 'wake_distance',
+        'wake_velocity': 'wake_velocity',
+        'mute_on_blank': 'mute_on_blank',
+        'pause_media_on_blank': 'pause_media_on_blank',
+        'lock_on_blank': 'lock_on_blank',
+        'blank_script': 'blank_script',
+        'restore_script': 'restore_script',
+        'hook_timeout': 'hook_timeout',
+        'overlay_mode': 'overlay_mode',
+        'frost_refresh': 'frost_refresh',
+        'metrics_port': 'metrics_port',
+        'stall_threshold': 'stall_threshold',
+        'auto_blackout': 'auto_blackout_minutes',
+        'schedule': 'schedule',
+    }
+    HOOK_SETTINGS = ('mute_on_blank', 'pause_media_on_blank', 'lock_on_blank',
+                     'blank_script', 'restore_script', 'hook_timeout')
+
+    def __init__(self, platform=None, profiler=None):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
+        # 平台后端：亮度、开机自启动、键盘钩子和配置目录
+        self.platform = platform or get_backend()
         self.is_black_screen = False
         self.hide_cursor = True
         self.shortcut = 'ctrl+alt+b'
         self.settings_visible = False
         self.old_pos = None
         self.mouse_exit_enabled = True  # 改名，避免与控件名冲突
+        self.low_power_overlay = False  # 黑屏窗口使用原生绘制模式(不经过样式表)，默认关闭
+        self.overlay_mode = 'black'  # 'frosted' 为磨砂：显示模糊后的屏幕内容，不降低亮度
+        self.frost_refresh = 0  # 磨砂画面的刷新间隔(秒)，0 为不刷新
+        self.metrics_port = 0  # 在 127.0.0.1 的这个端口上提供性能指标，0 为不提供
+        self.metrics_server = None
+        self.stall_threshold = 0  # 界面线程卡顿超过这么久(ms)时记录调用栈，0 为不检测
+        self.watchdog = None
+        self.auto_blackout_minutes = 0  # 无操作多少分钟后自动黑屏，0 为关闭
+        self.schedule = []  # 定时黑屏的时段(设置文件中的 dict，见 ScheduleRule)
+        self._scheduled_blackout = False  # 当前的黑屏是否由定时时段开始
+        self._blackout_started = None
+        self.wake_distance = WakeDetector.DISTANCE  # 鼠标移动多远才退出黑屏(像素)
+        self.wake_velocity = WakeDetector.VELOCITY  # 或移动多快(像素/秒)
+        self.startup = False
+        self.default_position = None  # 未加载设置时保持初始位置
+        self.hide_button = False
         self.recording_shortcut = False  # 添加标志来追踪是否正在记录快捷键
         self.temp_shortcut = None  # 添加临时快捷键存储
         self.temp_keys = set()  # 用于临时存储按下的键
-        self.initUI()
-        self.load_settings()  # 加载设置
-        
-        # 添加一个计时器来检查快捷键状态
-        self.shortcut_timer = QTimer()
-        self.shortcut_timer.timeout.connect(self.check_shortcut)
-        self.shortcut_timer.start(100)  # 每100ms检查一次
-        
-        # 保存快捷键组合键的状态
-        self.ctrl_pressed = False
-        self.alt_pressed = False
-        self.key_pressed = False
+        self.hotkey_backend = 'hook'  # 'hook' 为事件驱动，'poll' 为旧的 100ms 轮询
+        self.fade_duration = BrightnessController.FADE_DURATION  # 亮度渐变时长(ms)，0 为不渐变
+        # 黑屏钩子：黑屏时静音、暂停媒体、锁定系统，以及黑屏/恢复时运行的命令
+        self.mute_on_blank = False
+        self.pause_media_on_blank = False
+        self.lock_on_blank = False
+        self.blank_script = ''
+        self.restore_script = ''
+        self.hook_timeout = 2000  # 每个钩子的超时(ms)
+        # 额外的快捷键绑定，空字符串表示未绑定；黑屏快捷键仍保存在 shortcut 中
+        self.bindings = {'dim': '', 'monitor_blackout': '', 'settings': ''}
+        self.settings_panel = None  # 设置面板在第一次打开时才创建
+        self.trace_file = None  # 跟踪数据导出路径，None 时写到配置目录
+        self.control = None  # 单实例控制服务端，由启动代码设置
+        self._first_frame = False
+        self._deferred_done = False
+        self._startup_pending = {'deferred', 'brightness'}
 
-        # 创建系统托盘图标
-        self.create_tray_icon()
-        self.tray_icon.show()  # 始终显示托盘图标
+        # 第一帧之前必须完成的部分：设置、悬浮按钮、托盘图标
+        with self.profiler.phase('load_settings'):
+            # 设置保存在内存中，修改后防抖合并，在后台线程写入
+            self.settings = SettingsStore(os.path.join(self.platform.config_dir(), 'settings.json'), self)
+            self.settings.saved.connect(lambda: print("设置已保存"))  # 添加保存确认
+            self.settings.failed.connect(print)
+            self.settings.changed.connect(self.on_settings_changed)
+            self.load_settings()  # 加载设置
 
-        # 初始化 WMI
-        self.wmi = wmi.WMI(namespace='wmi')
-        self.original_brightness = None  # 存储原始亮度
+        with self.profiler.phase('button'):
+            self.initUI()
+            if self.default_position is not None:
+                self.move_to_position(self.default_position)
 
-        # 设置应用程序图标
-        icon_path = os.path.join('resources', 'icon.png')
-        if hasattr(sys, '_MEIPASS'):
-            icon_path = os.path.join(sys._MEIPASS, 'icon.png')
-        
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+        with self.profiler.phase('tray'):
+            # 创建系统托盘图标
+            self.create_tray_icon()
+            self.tray_icon.show()  # 始终显示托盘图标
+
+            # 设置应用程序图标
+            icon_path = os.path.join('resources', 'icon.png')
+            if hasattr(sys, '_MEIPASS'):
+                icon_path = os.path.join(sys._MEIPASS, 'icon.png')
+            
+            if os.path.exists(icon_path):
+                self.setWindowIcon(QIcon(icon_path))
+
+        with self.profiler.phase('controllers'):
+            # 黑屏窗口对象先创建，原生窗口在延迟阶段才创建
+            self.overlays = BlackoutOverlays(self.mouse_exit_enabled, self.hide_cursor, self,
+                                             low_power=self.low_power_overlay, platform=self.platform)
+            self.overlays.set_mode(self.overlay_mode, self.frost_refresh)
+            self.overlays.set_wake_thresholds(self.wake_distance, self.wake_velocity)
+            self.overlays.closeSignal.connect(self.on_black_screen_closed)
+
+            # 快捷键动作表
+            self.hotkey_actions = {
+                'blackout': self.toggle_black_screen,
+                'dim': self.toggle_dim,
+                'monitor_blackout': self.toggle_monitor_blackout,
+                'settings': self.show_settings_from_tray,
+            }
+            # 全局快捷键：键盘钩子只在组合键匹配时通知 GUI 线程，钩子在延迟阶段安装
+            self.hotkey_engine = HotkeyEngine(self.all_bindings(), self.platform, self.hotkey_backend, self)
+            self.hotkey_engine.activated.connect(self.on_hotkey)
+
+            # 亮度控制在独立线程中进行，WMI 调用不会阻塞界面
+            journal_path = os.path.join(self.platform.config_dir(), 'brightness_journal.json')
+            self.brightness = BrightnessController(self.platform, self, journal_path)
+            self.brightness.fade_duration = self.fade_duration
+            self.brightness.originalSaved.connect(self.on_original_brightness_saved)
+            self.brightness.failed.connect(print)
+            self.brightness.recovered.connect(self.on_brightness_recovered)
+            self.brightness.restored.connect(self.on_brightness_restored)
+            self.brightness.sessionReady.connect(self.on_brightness_session_ready)
+            self.original_brightness = None  # 黑屏前各显示器的亮度(由亮度线程回传)
+
+            # 黑屏状态机：所有切换入口共用，延迟降低亮度的定时器可以取消
+            # 黑屏覆盖全部显示器时暂停的定时器和效果；快捷键和亮度恢复路径不受影响
+            self.idle = IdleScheduler(self)
+            self.idle.add_timer('settings_debounce', self.settings.debounce_timer)
+            self.idle.add_effect('button_shadow', self.main_button.graphicsEffect())
+            self.idle.add_updates('button', self)
+            # 卡顿检测放慢 ping 的频率
+            self.idle.register('stall_watchdog',
+                               lambda: self.watchdog.slow_down() if self.watchdog is not None else None)
+
+            # 黑屏钩子在后台线程执行，黑屏窗口的显示/隐藏不等待钩子
+            self.hooks = HookPipeline(parent=self)
+            self.hooks.failed.connect(print)
+            self.rebuild_hooks()
+
+            self.blackout_timer = QTimer(self)
+            self.blackout_timer.setSingleShot(True)
+            self.blackout = BlackoutStateMachine(
+                self.blackout_timer,
+                show_overlay=self.overlays.show,
+                hide_overlay=self.overlays.hide,
+                dim_brightness=self.brightness.blackout,
+                restore_brightness=self.brightness.restore,
+                on_state_changed=self.on_blackout_state_changed,
+                on_begin=tracer.begin,
+            )
+            self.blackout_timer.timeout.connect(self.blackout.on_timeout)
+
+            # 无操作自动黑屏：按系统的最后输入时间只启动一个单次定时器，不轮询
+            self.auto_blackout = AutoBlackout(self.platform, parent=self)
+            self.auto_blackout.idle.connect(self.on_auto_blackout)
+
+            # 定时黑屏：所有时段共用一个定时器，只在最近的开始/结束时间唤醒
+            self.scheduler = BlackoutScheduler(self)
+            self.scheduler.activeChanged.connect(self.on_schedule_changed)
+
+        # 悬浮窗隐藏时不会有第一帧，事件循环启动后直接进入延迟初始化；
+        # 否则在第一次绘制后进入，这里只是保底
+        QTimer.singleShot(0 if self.hide_button else 500, self.deferred_init)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_frame:
+            self._first_frame = True
+            self.profiler.mark('first_frame')
+            QTimer.singleShot(0, self.deferred_init)
+
+    def deferred_init(self):
+        """事件循环启动后再执行的初始化：亮度会话、键盘钩子、黑屏窗口"""
+        if self._deferred_done:
+            return
+        self._deferred_done = True
+        with self.profiler.phase('deferred.brightness_request'):
+            self.brightness.warm_up()  # 在亮度线程中建立 WMI 会话
+        with self.profiler.phase('deferred.hotkey'):
+            self.hotkey_engine.start()
+        with self.profiler.phase('deferred.overlays'):
+            self.overlays.build()
+        with self.profiler.phase('deferred.settings_watch'):
+            self.settings.watch()  # 外部修改设置文件时自动应用
+        with self.profiler.phase('deferred.metrics'):
+            self.update_metrics_server()
+            self.update_watchdog()
+        with self.profiler.phase('deferred.auto_blackout'):
+            self.update_auto_blackout()
+            self.update_schedule()
+        self._startup_step_done('deferred')
+
+    def on_brightness_session_ready(self, elapsed_ms):
+        self.profiler.record('deferred.brightness_session', elapsed_ms)
+        self._startup_step_done('brightness')
+
+    def _startup_step_done(self, step):
+        self._startup_pending.discard(step)
+        if not self._startup_pending:
+            self.startupFinished.emit()
 
     def initUI(self):
         # 设置窗口属性
@@ -64,109 +274,50 @@ class FloatingButton(QWidget):
         self.main_button = QPushButton('⬤', self)
         self.main_button.setFixedSize(50, 50)
         self.main_button.clicked.connect(self.toggle_black_screen)
-        self.main_button.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 #6366f1, stop:1 #8b5cf6);
-                border-radius: 25px;
-                border: 2px solid rgba(255, 255, 255, 0.2);
-                color: white;
-                font-size: 18px;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 #818cf8, stop:1 #9333ea);
-                border: 2px solid rgba(255, 255, 255, 0.3);
-            }
-        """)
-        main_layout.addWidget(self.main_button)
+        # 样式在 theme.APP_STYLESHEET 中，状态通过动态属性切换
+        self.main_button.setObjectName('mainButton')
+        self.main_button.setProperty('state', 'idle')
+        main_layout.addWidget(self.main_button, 0, Qt.AlignLeft | Qt.AlignTop)
+        self.main_layout = main_layout  # 打开设置面板时用边距定位悬浮按钮
 
+        # 初始位置
+        screen = QApplication.primaryScreen().geometry()
+        self.move(screen.width() - 60, screen.height() // 2)
+
+        # 添加阴影效果
+        shadow = QGraphicsDropShadowEffect(self)
+        shadow.setBlurRadius(15)
+        shadow.setXOffset(0)
+        shadow.setYOffset(0)
+        shadow.setColor(QColor(0, 0, 0, 80))
+        self.main_button.setGraphicsEffect(shadow)
+
+    def ensure_settings_panel(self):
+        """第一次打开设置时才创建设置面板
+
+        大多数用户设置好之后不再打开面板，常驻托盘的进程不必为它付出启动时间和内存。
+        控件的初始值从当前设置读取，信号在赋值之后才连接，创建时不会触发保存。
+        """
+        if self.settings_panel is not None:
+            return
         # 创建设置面板
         self.settings_panel = QFrame(self)
-        self.settings_panel.setStyleSheet("""
-            QFrame {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 rgba(40, 40, 50, 245), 
-                                          stop:1 rgba(45, 45, 55, 245));
-                border-radius: 15px;
-                border: 1px solid rgba(255, 255, 255, 0.1);
-            }
-            QLabel {
-                color: #e2e8f0;
-                font-size: 14px;
-                font-weight: bold;
-                margin-top: 10px;
-                margin-bottom: 5px;
-            }
-            QLineEdit {
-                background: rgba(255, 255, 255, 0.1);
-                border: 1px solid rgba(255, 255, 255, 0.1);
-                border-radius: 8px;
-                color: white;
-                padding: 12px;
-                font-size: 14px;
-                min-height: 25px;
-            }
-            QLineEdit:focus {
-                border: 1px solid rgba(99, 102, 241, 0.5);
-                background: rgba(255, 255, 255, 0.15);
-            }
-            QCheckBox {
-                color: #e2e8f0;
-                font-size: 14px;
-                padding: 8px;
-            }
-            QCheckBox::indicator {
-                width: 22px;
-                height: 22px;
-                border-radius: 6px;
-                border: 2px solid rgba(255, 255, 255, 0.2);
-                background: rgba(255, 255, 255, 0.1);
-            }
-            QCheckBox::indicator:checked {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 #6366f1, stop:1 #8b5cf6);
-                border: 2px solid rgba(255, 255, 255, 0.3);
-            }
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 #6366f1, stop:1 #8b5cf6);
-                border: none;
-                border-radius: 8px;
-                color: white;
-                padding: 12px;
-                font-size: 14px;
-                font-weight: bold;
-                min-height: 25px;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 #818cf8, stop:1 #9333ea);
-            }
-            QComboBox {
-                background: rgba(255, 255, 255, 0.1);
-                border: 1px solid rgba(255, 255, 255, 0.1);
-                border-radius: 8px;
-                color: white;
-                padding: 12px;
-                font-size: 14px;
-                min-height: 25px;
-            }
-            QComboBox:hover {
-                background: rgba(255, 255, 255, 0.15);
-                border: 1px solid rgba(255, 255, 255, 0.2);
-            }
-            QComboBox::drop-down {
-                border: none;
-                width: 30px;
-            }
-            QComboBox::down-arrow {
-                image: none;
-            }
-        """)
-        
+        self.settings_panel.setObjectName('settingsPanel')
+        panel_layout = QVBoxLayout(self.settings_panel)
+        panel_layout.setContentsMargins(0, 0, 0, 0)
+
+        # 设置项超出屏幕可用高度时在面板内滚动
+        self.settings_scroll = QScrollArea(self.settings_panel)
+        self.settings_scroll.setObjectName('settingsScroll')
+        self.settings_scroll.setWidgetResizable(True)
+        self.settings_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.settings_scroll.viewport().setAutoFillBackground(False)
+        panel_layout.addWidget(self.settings_scroll)
+        settings_body = QWidget()
+        settings_body.setObjectName('settingsBody')
+
         # 设置面板布局
-        settings_layout = QVBoxLayout(self.settings_panel)
+        settings_layout = QVBoxLayout(settings_body)
         settings_layout.setContentsMargins(20, 20, 20, 20)
         settings_layout.setSpacing(12)
   
@@ -187,24 +338,76 @@ class FloatingButton(QWidget):
         # 启动设置
         startup_label = QLabel('启动设置:', self.settings_panel)
         self.startup_checkbox = QCheckBox('开机自启动', self.settings_panel)
+        self.startup_checkbox.setChecked(self.startup)
         self.startup_checkbox.stateChanged.connect(self.toggle_startup)
 
         # 位置设置
         position_label = QLabel('默认位置:', self.settings_panel)
         self.position_combo = QComboBox(self.settings_panel)
         self.position_combo.addItems(['左上角', '右上角', '左下角', '右下角', '屏幕中间'])
+        if self.default_position is not None:
+            self.position_combo.setCurrentIndex(self.default_position)
         self.position_combo.currentIndexChanged.connect(self.update_default_position)
 
+        # 黑屏样式设置(磨砂画面的刷新间隔只能在设置文件中修改)
+        mode_label = QLabel('黑屏样式:', self.settings_panel)
+        self.mode_combo = QComboBox(self.settings_panel)
+        self.mode_combo.setToolTip('磨砂：显示模糊后的屏幕内容，看不清文字但能看出窗口布局，不降低亮度')
+        for text, mode in self.OVERLAY_MODES:
+            self.mode_combo.addItem(text, mode)
+        self.mode_combo.setCurrentIndex(self.mode_combo.findData(self.overlay_mode))
+        self.mode_combo.currentIndexChanged.connect(self.update_overlay_mode)
+
+        # 亮度渐变设置
+        fade_label = QLabel('亮度渐变:', self.settings_panel)
+        self.fade_combo = QComboBox(self.settings_panel)
+        for text, duration in self.FADE_CHOICES:
+            self.fade_combo.addItem(text, duration)
+        fade_index = self.fade_combo.findData(self.fade_duration)
+        if fade_index >= 0:
+            self.fade_combo.setCurrentIndex(fade_index)
+        self.fade_combo.currentIndexChanged.connect(self.update_fade_duration)
+
+        # 无操作自动黑屏
+        auto_label = QLabel('无操作自动黑屏:', self.settings_panel)
+        self.auto_combo = QComboBox(self.settings_panel)
+        for text, minutes in self.AUTO_BLACKOUT_CHOICES:
+            self.auto_combo.addItem(text, minutes)
+        auto_index = self.auto_combo.findData(self.auto_blackout_minutes)
+        if auto_index >= 0:
+            self.auto_combo.setCurrentIndex(auto_index)
+        self.auto_combo.currentIndexChanged.connect(self.update_auto_blackout_minutes)
+
         # 鼠标移动设置
         mouse_label = QLabel('鼠标移动设置:', self.settings_panel)
         self.enable_mouse_exit = QCheckBox('启用鼠标移动退出', self.settings_panel)
         self.enable_mouse_exit.setChecked(self.mouse_exit_enabled)
         self.enable_mouse_exit.stateChanged.connect(self.toggle_mouse_exit)
+        self.wake_combo = QComboBox(self.settings_panel)
+        self.wake_combo.setToolTip('鼠标移动超过一定距离或速度才退出黑屏，过滤桌面震动和鼠标抖动')
+        for text, thresholds in self.WAKE_CHOICES:
+            self.wake_combo.addItem(f'唤醒灵敏度: {text}', thresholds)
+        self.wake_combo.setCurrentIndex(
+            self.wake_combo.findData((self.wake_distance, self.wake_velocity)))
+        self.wake_combo.currentIndexChanged.connect(self.update_wake_thresholds)
+        self.low_power_checkbox = QCheckBox('低功耗黑屏', self.settings_panel)
+        self.low_power_checkbox.setToolTip('黑屏窗口不经过样式引擎，也不预先擦除背景，只在系统要求重绘时填充一次黑色')
+        self.low_power_checkbox.setChecked(self.low_power_overlay)
+        self.low_power_checkbox.stateChanged.connect(self.toggle_low_power_overlay)
+
+        # 黑屏钩子设置(脚本和超时只能在设置文件中修改)
+        hooks_label = QLabel('黑屏时:', self.settings_panel)
+        self.mute_checkbox = QCheckBox('静音', self.settings_panel)
+        self.mute_checkbox.setChecked(self.mute_on_blank)
+        self.mute_checkbox.stateChanged.connect(self.toggle_mute_on_blank)
+        self.pause_media_checkbox = QCheckBox('暂停媒体播放', self.settings_panel)
+        self.pause_media_checkbox.setChecked(self.pause_media_on_blank)
+        self.pause_media_checkbox.stateChanged.connect(self.toggle_pause_media_on_blank)
 
         # 在设置面板中添加隐藏悬浮窗选项
         hide_button_label = QLabel('悬浮窗设置:', self.settings_panel)
         self.hide_button_checkbox = QCheckBox('隐藏悬浮窗', self.settings_panel)
-        self.hide_button_checkbox.setChecked(False)
+        self.hide_button_checkbox.setChecked(self.hide_button)
         self.hide_button_checkbox.stateChanged.connect(self.toggle_button_visibility)
 
         # 添加所有控件到布局
@@ -216,8 +419,19 @@ class FloatingButton(QWidget):
         settings_layout.addWidget(self.startup_checkbox)
         settings_layout.addWidget(position_label)
         settings_layout.addWidget(self.position_combo)
+        settings_layout.addWidget(mode_label)
+        settings_layout.addWidget(self.mode_combo)
+        settings_layout.addWidget(fade_label)
+        settings_layout.addWidget(self.fade_combo)
+        settings_layout.addWidget(auto_label)
+        settings_layout.addWidget(self.auto_combo)
         settings_layout.addWidget(mouse_label)
         settings_layout.addWidget(self.enable_mouse_exit)
+        settings_layout.addWidget(self.wake_combo)
+        settings_layout.addWidget(self.low_power_checkbox)
+        settings_layout.addWidget(hooks_label)
+        settings_layout.addWidget(self.mute_checkbox)
+        settings_layout.addWidget(self.pause_media_checkbox)
         settings_layout.addWidget(hide_button_label)
         settings_layout.addWidget(self.hide_button_checkbox)
 
@@ -225,30 +439,19 @@ class FloatingButton(QWidget):
         save_button = QPushButton('保存设置', self.settings_panel)
         save_button.clicked.connect(self.save_settings)
         settings_layout.addWidget(save_button)
+        self.settings_scroll.setWidget(settings_body)
 
         self.settings_panel.hide()
-        
-        # 初始位置
-        screen = QApplication.primaryScreen().geometry()
-        self.move(screen.width() - 60, screen.height() // 2)
-
-        # 设置面板位置
-        self.settings_panel.setGeometry(50, 0, 350, 600)
+        self.settings_panel.resize(350, 50)  # 高度在打开时按屏幕计算
 
         # 添加阴影效果
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(15)
-        shadow.setXOffset(0)
-        shadow.setYOffset(0)
-        shadow.setColor(QColor(0, 0, 0, 80))
-        self.main_button.setGraphicsEffect(shadow)
-
         settings_shadow = QGraphicsDropShadowEffect(self)
         settings_shadow.setBlurRadius(20)
         settings_shadow.setXOffset(0)
         settings_shadow.setYOffset(0)
         settings_shadow.setColor(QColor(0, 0, 0, 100))
         self.settings_panel.setGraphicsEffect(settings_shadow)
+        self.idle.add_effect('settings_shadow', settings_shadow)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -275,130 +478,196 @@ class FloatingButton(QWidget):
             self.snap_to_edge()
             event.accept()
 
+    def current_screen(self):
+        """悬浮窗所在的显示器"""
+        return QApplication.screenAt(self.geometry().center()) or QApplication.primaryScreen()
+
     def snap_to_edge(self):
-        screen = QApplication.primaryScreen().geometry()
+        screen = self.current_screen().geometry()
         pos = self.pos()
         
         # 吸附到屏幕边缘的距离阈值
         threshold = 20
         
         # 吸附到屏幕边缘
-        if pos.x() < threshold:
-            pos.setX(0)
-        elif pos.x() > screen.width() - self.width() - threshold:
-            pos.setX(screen.width() - self.width())
+        if pos.x() < screen.left() + threshold:
+            pos.setX(screen.left())
+        elif pos.x() > screen.right() + 1 - self.width() - threshold:
+            pos.setX(screen.right() + 1 - self.width())
             
-        if pos.y() < threshold:
-            pos.setY(0)
-        elif pos.y() > screen.height() - self.height() - threshold:
-            pos.setY(screen.height() - self.height())
+        if pos.y() < screen.top() + threshold:
+            pos.setY(screen.top())
+        elif pos.y() > screen.bottom() + 1 - self.height() - threshold:
+            pos.setY(screen.bottom() + 1 - self.height())
             
         self.move(pos)
 
+    def settings_panel_height(self, screen):
+        """设置面板的高度：能完整显示所有设置项，但不超过屏幕可用高度(超出部分滚动)"""
+        margins = self.settings_panel.contentsMargins()
+        needed = (self.settings_scroll.widget().sizeHint().height()
+                  + 2 * self.settings_scroll.frameWidth()
+                  + margins.top() + margins.bottom())
+        return max(self.main_button.height(), min(needed, screen.height()))
+
     def toggle_settings(self):
         if self.settings_visible:
             # 关闭设置面板时，如果有未保存的快捷键，恢复为原来的快捷键
             if self.temp_shortcut is not None:
                 self.shortcut_input.setText(self.shortcut)
                 self.temp_shortcut = None
+            # 窗口缩回悬浮按钮所在的位置
+            button_pos = self.pos() + self.main_button.pos()
             self.settings_panel.hide()
+            self.main_layout.setContentsMargins(0, 0, 0, 0)
             self.setFixedSize(50, 50)
+            self.move(button_pos)
         else:
             # 打开设置面板时，显示当前保存的快捷键
+            self.ensure_settings_panel()
             self.shortcut_input.setText(self.shortcut)
-            
+
             # 根据屏幕位置调整设置面板的显示方向
-            screen = QApplication.primaryScreen().geometry()
+            screen = self.current_screen().availableGeometry()
             current_pos = self.pos()
-            
-            # 如果靠近右边缘，设置面板显示在左边
-            if current_pos.x() + 400 > screen.width():
-                self.settings_panel.move(-350, 0)
-            else:
-                self.settings_panel.move(50, 0)
-            
-            # 如果靠近底部，设置面板向上显示
-            if current_pos.y() + 600 > screen.height():
-                self.settings_panel.move(self.settings_panel.x(), -600 + 50)
-            
+            panel_width = self.settings_panel.width()
+            height = self.settings_panel_height(screen)
+
+            # 如果靠近右边缘，设置面板显示在左边；如果靠近底部，设置面板向上显示。
+            # 窗口向左/向上扩展，悬浮按钮留在原处
+            left = current_pos.x() + 50 + panel_width > screen.right() + 1
+            top = max(screen.top(), min(current_pos.y(), screen.bottom() + 1 - height))
+            origin = QPoint(current_pos.x() - panel_width if left else current_pos.x(), top)
+            button = current_pos - origin
+            self.main_layout.setContentsMargins(button.x(), button.y(), 0, 0)
+            self.settings_panel.setGeometry(0 if left else 50, 0, panel_width, height)
+
             self.settings_panel.show()
-            self.setFixedSize(400, 600)
+            self.setFixedSize(50 + panel_width, height)
+            self.move(origin)
         self.settings_visible = not self.settings_visible
 
+    @property
+    def dim_on_blank(self):
+        """黑屏后是否降低亮度；磨砂模式下保持亮度，否则看不到模糊的屏幕内容"""
+        return self.overlay_mode != 'frosted'
+
     def toggle_black_screen(self):
-        if self.is_black_screen:
-            # 先恢复亮度
-            if self.original_brightness is not None:
-                self.set_brightness(self.original_brightness)
-                self.original_brightness = None
+        # 先显示黑屏，再降低亮度；恢复时取消尚未执行的降低亮度
+        self.blackout.toggle(dim=self.dim_on_blank)
 
-            if hasattr(self, 'black_screen') and self.black_screen:
-                self.black_screen.hide()
-            
-            self.is_black_screen = False
-            self.main_button.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                              stop:0 #6366f1, stop:1 #8b5cf6);
-                    border-radius: 25px;
-                    border: 2px solid rgba(255, 255, 255, 0.2);
-                    color: white;
-                    font-size: 18px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                              stop:0 #818cf8, stop:1 #9333ea);
-                    border: 2px solid rgba(255, 255, 255, 0.3);
-                }
-            """)
+    def on_blackout_state_changed(self, state):
+        active = self.blackout.active
+        if active == self.is_black_screen:
+            return
+        self.is_black_screen = active
+        if active:
+            # 只黑掉一个显示器时用户还在使用其他显示器，不进入低功耗模式
+            if self.overlays.covering_all:
+                self.idle.enter()
+            theme.set_state(self.main_button, 'state', 'active')
+            self.hooks.fire('blank')
+            self.auto_blackout.disarm()
+            BLACKOUTS.inc()
+            self._blackout_started = time.perf_counter()
         else:
-            # 先显示黑屏，再降低亮度
-            if not hasattr(self, 'black_screen') or not self.black_screen:
-                self.black_screen = BlackScreen(self.hide_cursor)
-                self.black_screen.closeSignal.connect(self.on_black_screen_closed)
-            self.black_screen.showFullScreen()
-
-            # 保存当前亮度并设置为最低
-            QTimer.singleShot(500, self._set_brightness_to_zero)  # 延迟500ms降低亮度
-            
-            self.is_black_screen = True
-            self.main_button.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                              stop:0 #dc2626, stop:1 #b91c1c);
-                    border-radius: 25px;
-                    border: 2px solid rgba(255, 255, 255, 0.2);
-                    color: white;
-                    font-size: 18px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                              stop:0 #ef4444, stop:1 #dc2626);
-                    border: 2px solid rgba(255, 255, 255, 0.3);
-                }
-            """)
+            theme.set_state(self.main_button, 'state', 'idle')
+            self.idle.exit()
+            self.hooks.fire('restore')
+            self.auto_blackout.arm()  # 从恢复的时刻重新计时
+            self._scheduled_blackout = False  # 时段内手动退出后，本时段不再黑屏
+            RESTORES.inc()
+            if self._blackout_started is not None:
+                BLACKOUT_SECONDS.observe(time.perf_counter() - self._blackout_started)
+                self._blackout_started = None
+            if tracer.enabled and self.idle.wakeups_per_minute() is not None:
+                tracer.record('idle_wakeups', per_min=self.idle.wakeups_per_minute())
+
+    def on_auto_blackout(self):
+        """无操作超时，与快捷键走同一条黑屏路径"""
+        if not self.blackout.active:
+            self.blackout.blank(dim=self.dim_on_blank)
+
+    def update_auto_blackout(self):
+        self.auto_blackout.timeout = self.auto_blackout_minutes * 60000
+        if self.is_black_screen:
+            self.auto_blackout.disarm()
+        else:
+            self.auto_blackout.arm(reset=False)
+
+    def update_schedule(self):
+        """按设置重新计算定时黑屏的时段(设置已在读取时检查过)"""
+        self.scheduler.set_rules(ScheduleRule.parse(raw) for raw in self.schedule)
+
+    def on_schedule_changed(self, active):
+        """进入时段时黑屏；时段结束时只退出由时段开始的黑屏，恢复亮度"""
+        if active:
+            if not self.blackout.active:
+                self.blackout.blank(dim=self.dim_on_blank)
+                self._scheduled_blackout = self.blackout.active
+        elif self._scheduled_blackout:
+            self.blackout.restore()
+
+    def rebuild_hooks(self):
+        """按设置重新组装黑屏钩子，正在执行的调用不受影响"""
+        timeout = self.hook_timeout / 1000
+        self.hooks.clear()
+        if self.mute_on_blank:
+            self.hooks.add(mute_hook(self.platform, timeout))
+        if self.pause_media_on_blank:
+            self.hooks.add(pause_media_hook(self.platform, timeout))
+        if self.blank_script or self.restore_script:
+            self.hooks.add(script_hook('script', self.blank_script, self.restore_script, timeout))
+        if self.lock_on_blank:
+            self.hooks.add(lock_hook(self.platform, timeout))
 
     def _set_brightness_to_zero(self):
         """延迟执行降低亮度的操作"""
-        self.original_brightness = self.get_current_brightness()
-        if self.original_brightness is not None:
-            self.set_brightness(0)
+        # 已经调暗时亮度线程会保留原来记录的亮度
+        self.brightness.blackout()
 
-    def check_shortcut(self):
-        try:
-            # 如果正在记录快捷键，不要检查快捷键
-            if self.recording_shortcut:
-                return
-            
-            keys = self.shortcut.split('+')
-            all_pressed = all(keyboard.is_pressed(key.strip()) for key in keys)
-            if all_pressed and not self.key_pressed:
-                self.toggle_black_screen()
-                self.key_pressed = True
-            elif not all_pressed:
-                self.key_pressed = False
-        except Exception as e:
-            print(f"检查快捷键失败: {e}")
+    def on_original_brightness_saved(self, value):
+        self.original_brightness = value
+
+    def on_brightness_recovered(self, levels):
+        print(f"已恢复上次异常退出前的亮度: {levels}")
+
+    def on_brightness_restored(self):
+        self.blackout.brightness_restored()
+
+    def toggle_dim(self):
+        """只把亮度降到最低，不显示黑屏"""
+        if self.is_black_screen:
+            return  # 黑屏时亮度已经最低
+        if self.brightness.dimmed:
+            self.brightness.restore()
+        else:
+            self._set_brightness_to_zero()
+
+    def toggle_monitor_blackout(self):
+        """只黑掉鼠标所在的显示器"""
+        # 只黑掉单个显示器时不调整亮度
+        self.blackout.toggle(QApplication.screenAt(QCursor.pos()), dim=False)
+
+    def all_bindings(self):
+        """返回 {动作: 快捷键}，包括黑屏快捷键"""
+        bindings = dict(self.bindings)
+        bindings['blackout'] = self.shortcut
+        return bindings
+
+    def on_hotkey(self, action):
+        if tracer.enabled and action in ('blackout', 'monitor_blackout'):
+            # 钩子线程中的时间戳并入接下来的黑屏/恢复周期
+            tracer.stash('hook_event', self.hotkey_engine.last_event_ns)
+            tracer.stash('matcher_fired', self.hotkey_engine.last_match_ns, action=action)
+            tracer.stash('hotkey_dispatched')
+        handler = self.hotkey_actions.get(action)
+        if handler:
+            was_active = self.blackout.active
+            handler()
+            if not was_active and self.blackout.active and self.hotkey_engine.last_event_ns:
+                # 黑屏窗口在 handler 中同步显示
+                HOTKEY_TO_OVERLAY.observe((time.perf_counter_ns() - self.hotkey_engine.last_event_ns) / 1e9)
 
     def register_shortcut(self):
         # 不再使用 keyboard.add_hotkey
@@ -409,38 +678,34 @@ class FloatingButton(QWidget):
         if new_shortcut:
             self.shortcut = new_shortcut
             self.save_settings()
-            # 重置按键状态
-            self.ctrl_pressed = False
-            self.alt_pressed = False
-            self.key_pressed = False
+            # 重新编译快捷键并重置按键状态
+            self.hotkey_engine.set_bindings(self.all_bindings())
 
     def toggle_cursor_visibility(self, state):
         self.hide_cursor = (state == Qt.Checked)
-        if hasattr(self, 'black_screen') and self.black_screen:
-            if self.hide_cursor:
-                self.black_screen.setCursor(Qt.BlankCursor)
-            else:
-                self.black_screen.setCursor(Qt.ArrowCursor)
+        self.overlays.set_hide_cursor(self.hide_cursor)
         self.save_settings()
 
     def toggle_startup(self, state):
-        startup_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
-        
+        self.startup = (state == Qt.Checked)
         try:
-            key = reg.OpenKey(reg.HKEY_CURRENT_USER, startup_path, 0, reg.KEY_ALL_ACCESS)
-            if state == Qt.Checked:
-                reg.SetValueEx(key, "BlackScreenApp", 0, reg.REG_SZ, sys.argv[0])
-            else:
-                try:
-                    reg.DeleteValue(key, "BlackScreenApp")
-                except WindowsError:
-                    pass
-            reg.CloseKey(key)
-        except WindowsError:
+            self.platform.set_autostart(state == Qt.Checked, sys.argv[0])
+        except OSError:
             print("无法设置开机自启动")
+        self.save_settings()
 
     def update_default_position(self, index):
-        screen = QApplication.primaryScreen().geometry()
+        self.default_position = index
+        self.move_to_position(index)
+        self.save_settings()
+
+    def update_fade_duration(self, index):
+        self.fade_duration = self.fade_combo.itemData(index)
+        self.brightness.fade_duration = self.fade_duration
+        self.save_settings()
+
+    def move_to_position(self, index):
+        screen = self.current_screen().geometry()
         positions = {
             0: QPoint(0, 0),  # 左上角
             1: QPoint(screen.width() - self.width(), 0),  # 右上角
@@ -448,20 +713,50 @@ class FloatingButton(QWidget):
             3: QPoint(screen.width() - self.width(), screen.height() - self.height()),  # 右下角
             4: QPoint(screen.width()//2 - self.width()//2, screen.height()//2 - self.height()//2)  # 中间
         }
-        self.move(positions[index])
-        self.save_settings()
+        self.move(screen.topLeft() + positions[index])
 
     def toggle_mouse_exit(self, state):
         self.mouse_exit_enabled = (state == Qt.Checked)  # 使用新的变量名
-        if hasattr(self, 'black_screen') and self.black_screen:
-            self.black_screen.set_mouse_exit(self.mouse_exit_enabled)
+        self.overlays.set_mouse_exit(self.mouse_exit_enabled)
+        self.save_settings()
+
+    def update_wake_thresholds(self, index):
+        self.wake_distance, self.wake_velocity = self.wake_combo.itemData(index)
+        self.overlays.set_wake_thresholds(self.wake_distance, self.wake_velocity)
+        self.save_settings()
+
+    def toggle_low_power_overlay(self, state):
+        self.low_power_overlay = (state == Qt.Checked)
+        self.overlays.set_low_power(self.low_power_overlay)
+        self.save_settings()
+
+    def update_auto_blackout_minutes(self, index):
+        self.auto_blackout_minutes = self.auto_combo.itemData(index)
+        self.update_auto_blackout()
+        self.save_settings()
+
+    def update_overlay_mode(self, index):
+        self.overlay_mode = self.mode_combo.itemData(index)
+        self.overlays.set_mode(self.overlay_mode, self.frost_refresh)
+        self.save_settings()
+
+    def toggle_mute_on_blank(self, state):
+        self.mute_on_blank = (state == Qt.Checked)
+        self.rebuild_hooks()
+        self.save_settings()
+
+    def toggle_pause_media_on_blank(self, state):
+        self.pause_media_on_blank = (state == Qt.Checked)
+        self.rebuild_hooks()
         self.save_settings()
 
     def toggle_button_visibility(self, state):
+        self.hide_button = (state == Qt.Checked)
         if state == Qt.Checked:
             self.hide()
         else:
             self.show()
+        self.save_settings()
 
     def create_tray_icon(self):
         # 创建系统托盘图标
@@ -501,6 +796,16 @@ class FloatingButton(QWidget):
         about_action = tray_menu.addAction('作者有话说')
         about_action.triggered.connect(self.show_author_info)
         tray_menu.addSeparator()      
+
+        metrics_action = tray_menu.addAction('导出性能指标')
+        metrics_action.triggered.connect(self.dump_metrics)
+        tray_menu.addSeparator()
+
+        # 开启跟踪时可以导出各阶段耗时
+        if tracer.enabled:
+            trace_action = tray_menu.addAction('导出跟踪数据')
+            trace_action.triggered.connect(self.dump_trace)
+            tray_menu.addSeparator()
         
         quit_action = tray_menu.addAction('退出')
         quit_action.triggered.connect(self.quit_app)
@@ -510,20 +815,124 @@ class FloatingButton(QWidget):
         # 双击托盘图标显示悬浮窗
         self.tray_icon.activated.connect(self.tray_icon_activated)
 
+    def handle_control(self, command):
+        """处理其他进程通过控制端点发来的命令，返回回复"""
+        if command == 'toggle':
+            self.blackout.toggle(dim=self.dim_on_blank)
+        elif command == 'on':
+            self.blackout.blank(dim=self.dim_on_blank)
+        elif command == 'off':
+            self.blackout.restore()
+        elif command == 'reload-settings':
+            self.reload_settings()
+        elif command == 'metrics':
+            return {'ok': True, 'text': metrics.render()}
+        elif command == 'show':
+            self.show_from_tray()
+        elif command == 'status':
+            return {
+                'ok': True,
+                'state': self.blackout.state,
+                'covering_all': self.overlays.covering_all,
+                'overlay_mode': self.overlays.mode,
+                'brightness': self.brightness.levels,
+                'original_brightness': self.original_brightness,
+                'hotkey_backend': self.hotkey_engine.backend,
+                'hooks': self.hooks.summary(),
+                'metrics': metrics.snapshot(),
+                'auto_blackout': {'timeout_ms': self.auto_blackout.timeout,
+                                  'armed': self.auto_blackout.armed,
+                                  'wakeups': self.auto_blackout.wakeups},
+                'schedule': {'active': self.scheduler.active,
+                             'next': (time.strftime('%Y-%m-%dT%H:%M:%S',
+                                                    time.localtime(self.scheduler.next_deadline))
+                                      if self.scheduler.next_deadline is not None else None)},
+                'last_stall': self.watchdog.last_report if self.watchdog is not None else None,
+            }
+        elif command != 'ping':
+            return {'ok': False, 'error': f"未知命令: {command}"}
+        return {'ok': True, 'state': self.blackout.state}
+
     def show_from_tray(self):
-        self.hide_button_checkbox.setChecked(False)
+        self.hide_button = False
+        if self.settings_panel is not None:
+            self.hide_button_checkbox.setChecked(False)
         self.show()
 
     def show_settings_from_tray(self):
         self.show_from_tray()
         self.toggle_settings()
 
+    def dump_trace(self):
+        """把跟踪缓冲区导出为 JSONL"""
+        path = self.trace_file or os.path.join(self.platform.config_dir(), 'trace.jsonl')
+        try:
+            count = tracer.dump(path)
+            print(f"跟踪数据已导出: {path} ({count} 条)")
+        except OSError as e:
+            print(f"导出跟踪数据失败: {e}")
+
+    def dump_metrics(self):
+        """把性能指标写到配置目录的 metrics.prom"""
+        path = os.path.join(self.platform.config_dir(), 'metrics.prom')
+        try:
+            metrics.dump(path)
+            print(f"性能指标已导出: {path}")
+        except OSError as e:
+            print(f"导出性能指标失败: {e}")
+
+    def update_metrics_server(self):
+        """按 metrics_port 启动、停止或换端口"""
+        if self.metrics_server is not None:
+            if self.metrics_server.port == self.metrics_port:
+                return
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if not self.metrics_port:
+            return
+        server = MetricsServer(metrics, self.metrics_port)
+        try:
+            server.start()
+        except OSError as e:
+            print(f"无法在端口 {self.metrics_port} 提供性能指标: {e}")
+            return
+        self.metrics_server = server
+
+    def update_watchdog(self):
+        """按 stall_threshold 启动、停止卡顿检测或修改阈值"""
+        if not self.stall_threshold:
+            if self.watchdog is not None:
+                self.watchdog.stop()
+                self.watchdog = None
+            return
+        if self.watchdog is None:
+            report_path = os.path.join(self.platform.config_dir(), 'stalls.jsonl')
+            self.watchdog = StallWatchdog(report_path, self.stall_threshold, self)
+            self.watchdog.start()
+        self.watchdog.threshold = self.stall_threshold
+
     def quit_app(self):
-        # 保存设置
+        # 保存设置，等待尚未写入的修改落盘
         self.save_settings()
+        self.settings.close()
+        if tracer.enabled:
+            self.dump_trace()
+        # 黑屏中退出时执行恢复钩子(取消静音、继续播放)，最多等待 2 秒
+        if self.is_black_screen:
+            self.hooks.fire('restore')
+        self.hooks.wait_idle(2)
+        # 卸载键盘钩子，停止亮度线程(退出前会恢复亮度)
+        self.hotkey_engine.stop()
+        self.brightness.stop()
         # 清理托盘图标
         if hasattr(self, 'tray_icon'):
             self.tray_icon.hide()
+        if self.control is not None:
+            self.control.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.watchdog is not None:
+            self.watchdog.stop()
         QApplication.quit()
 
     def tray_icon_activated(self, reason):
@@ -531,101 +940,172 @@ class FloatingButton(QWidget):
             self.show_from_tray()
 
     def save_settings(self):
-        app_data_dir = os.path.join(os.getenv('APPDATA'), 'BlackScreenApp')
-        
-        if not os.path.exists(app_data_dir):
-            os.makedirs(app_data_dir)
-        
-        settings_file = os.path.join(app_data_dir, 'settings.json')
-        
-        settings = {
+        """更新内存中的设置，有变化时才在防抖后写入文件"""
+        self.settings.update({
             'shortcut': self.shortcut,
+            'bindings': dict(self.bindings),
             'hide_cursor': self.hide_cursor,
-            'startup': self.startup_checkbox.isChecked(),
-            'position': self.position_combo.currentIndex(),
+            'startup': self.startup,
+            'position': self.default_position,
             'enable_mouse_exit': self.mouse_exit_enabled,
-            'hide_button': self.hide_button_checkbox.isChecked()
-        }
-        
-        try:
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f, indent=4)
-            print("设置已保存")  # 添加保存确认
-        except Exception as e:
-            print(f"保存设置失败: {e}")
+            'low_power_overlay': self.low_power_overlay,
+            'wake_distance': self.wake_distance,
+            'wake_velocity': self.wake_velocity,
+            'hide_button': self.hide_button,
+            'hotkey_backend': self.hotkey_backend,
+            'fade_duration': self.fade_duration,
+            'mute_on_blank': self.mute_on_blank,
+            'pause_media_on_blank': self.pause_media_on_blank,
+            'lock_on_blank': self.lock_on_blank,
+            'blank_script': self.blank_script,
+            'restore_script': self.restore_script,
+            'hook_timeout': self.hook_timeout,
+            'overlay_mode': self.overlay_mode,
+            'frost_refresh': self.frost_refresh,
+            'metrics_port': self.metrics_port,
+            'stall_threshold': self.stall_threshold,
+            'auto_blackout': self.auto_blackout_minutes,
+            'schedule': list(self.schedule)
+        })
 
     def load_settings(self):
-        app_data_dir = os.path.join(os.getenv('APPDATA'), 'BlackScreenApp')
-        settings_file = os.path.join(app_data_dir, 'settings.json')
-        
-        try:
-            with open(settings_file, 'r') as f:
-                settings = json.load(f)
-                
-                # 加载所有设置
-                self.shortcut = settings.get('shortcut', 'ctrl+alt+b')
-                self.hide_cursor = settings.get('hide_cursor', True)
-                self.startup = settings.get('startup', False)
-                self.default_position = settings.get('position', 3)
-                self.mouse_exit_enabled = settings.get('enable_mouse_exit', True)
-                
-                # 更新UI
-                self.shortcut_input.setText(self.shortcut)
-                self.hide_cursor_checkbox.setChecked(self.hide_cursor)
-                self.startup_checkbox.setChecked(self.startup)
-                self.position_combo.setCurrentIndex(self.default_position)
-                self.enable_mouse_exit.setChecked(self.mouse_exit_enabled)
-                
-                # 应用设置
-                if hasattr(self, 'black_screen') and self.black_screen:
-                    self.black_screen.set_mouse_exit(self.mouse_exit_enabled)
-                
-                # 加载隐藏状态
-                hide_button = settings.get('hide_button', False)
-                self.hide_button_checkbox.setChecked(hide_button)
-                if hide_button:
-                    self.toggle_button_visibility(Qt.Checked)
-                
-        except FileNotFoundError:
+        """只读取设置，不会写回文件或注册表"""
+        settings = self.settings.load()
+        if not settings:
             # 使用默认设置
-            pass
+            return
+
+        # 加载所有设置
+        self.shortcut = settings.get('shortcut', 'ctrl+alt+b')
+        self.bindings.update(settings.get('bindings', {}))
+        self.hide_cursor = settings.get('hide_cursor', True)
+        self.startup = settings.get('startup', False)
+        self.default_position = settings.get('position', 3)
+        self.mouse_exit_enabled = settings.get('enable_mouse_exit', True)
+        self.low_power_overlay = settings.get('low_power_overlay', False)
+        self.wake_distance = settings.get('wake_distance', WakeDetector.DISTANCE)
+        self.wake_velocity = settings.get('wake_velocity', WakeDetector.VELOCITY)
+        self.hotkey_backend = settings.get('hotkey_backend', 'hook')
+        self.fade_duration = settings.get('fade_duration', BrightnessController.FADE_DURATION)
+        self.mute_on_blank = settings.get('mute_on_blank', False)
+        self.pause_media_on_blank = settings.get('pause_media_on_blank', False)
+        self.lock_on_blank = settings.get('lock_on_blank', False)
+        self.blank_script = settings.get('blank_script', '')
+        self.restore_script = settings.get('restore_script', '')
+        self.hook_timeout = settings.get('hook_timeout', 2000)
+        self.overlay_mode = settings.get('overlay_mode', 'black')
+        self.frost_refresh = settings.get('frost_refresh', 0)
+        self.metrics_port = settings.get('metrics_port', 0)
+        self.stall_threshold = settings.get('stall_threshold', 0)
+        self.auto_blackout_minutes = settings.get('auto_blackout', 0)
+        self.schedule = settings.get('schedule', [])
+        # 加载隐藏状态
+        self.hide_button = settings.get('hide_button', False)
+        # 只更新设置，控件创建时再读取
+
+    def reload_settings(self):
+        """重新读取设置文件并应用"""
+        self.load_settings()
+        self.apply_settings()
+
+    def on_settings_changed(self, changed):
+        """设置文件被外部修改：只更新并应用变化的字段"""
+        for key, value in changed.items():
+            if key == 'bindings':
+                self.bindings = {action: '' for action in self.bindings}
+                self.bindings.update(value)
+            else:
+                setattr(self, self.SETTINGS_ATTRS[key], value)
+        print(f"设置文件已更新: {', '.join(changed)}")
+        self.apply_settings(changed)
+
+    def apply_settings(self, keys=None):
+        """把内存中的设置应用到各个组件和(已创建的)设置面板
+
+        keys 为 None 时全部应用(不包括开机自启动)，否则只应用这些字段。
+        """
+        def changed(*names):
+            return keys is None or any(name in keys for name in names)
+
+        if changed('shortcut', 'bindings'):
+            self.hotkey_engine.set_bindings(self.all_bindings())
+        if changed('hotkey_backend') and self.hotkey_engine.backend != self.hotkey_backend:
+            self.hotkey_engine.stop()
+            self.hotkey_engine.backend = self.hotkey_backend
+            self.hotkey_engine.start()
+        if keys is not None and 'startup' in keys:
+            try:
+                self.platform.set_autostart(self.startup, sys.argv[0])
+            except OSError:
+                print("无法设置开机自启动")
+        if changed('hide_cursor'):
+            self.overlays.set_hide_cursor(self.hide_cursor)
+        if changed('enable_mouse_exit'):
+            self.overlays.set_mouse_exit(self.mouse_exit_enabled)
+        if changed('low_power_overlay'):
+            self.overlays.set_low_power(self.low_power_overlay)
+        if changed('wake_distance', 'wake_velocity'):
+            self.overlays.set_wake_thresholds(self.wake_distance, self.wake_velocity)
+        if changed('overlay_mode', 'frost_refresh'):
+            self.overlays.set_mode(self.overlay_mode, self.frost_refresh)
+        if changed('metrics_port') and self._deferred_done:
+            self.update_metrics_server()
+        if changed('stall_threshold') and self._deferred_done:
+            self.update_watchdog()
+        if changed('auto_blackout') and self._deferred_done:
+            self.update_auto_blackout()
+        if changed('schedule') and self._deferred_done:
+            self.update_schedule()
+        if changed('fade_duration'):
+            self.brightness.fade_duration = self.fade_duration
+        if changed(*self.HOOK_SETTINGS):
+            self.rebuild_hooks()
+        if changed('position') and self.default_position is not None:
+            self.move_to_position(self.default_position)
+        if changed('hide_button'):
+            self.setVisible(not self.hide_button)
+        if self.settings_panel is not None:
+            self.sync_settings_panel()
+
+    def sync_settings_panel(self):
+        """设置在面板之外被修改后更新面板控件，不触发各控件的修改处理"""
+        widgets = [self.shortcut_input, self.hide_cursor_checkbox, self.startup_checkbox,
+                   self.position_combo, self.mode_combo, self.fade_combo, self.auto_combo, self.enable_mouse_exit,
+                   self.low_power_checkbox, self.wake_combo, self.mute_checkbox,
+                   self.pause_media_checkbox, self.hide_button_checkbox]
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.shortcut_input.setText(self.shortcut)
+        self.hide_cursor_checkbox.setChecked(self.hide_cursor)
+        self.startup_checkbox.setChecked(self.startup)
+        if self.default_position is not None:
+            self.position_combo.setCurrentIndex(self.default_position)
+        self.mode_combo.setCurrentIndex(self.mode_combo.findData(self.overlay_mode))
+        self.fade_combo.setCurrentIndex(self.fade_combo.findData(self.fade_duration))
+        self.auto_combo.setCurrentIndex(self.auto_combo.findData(self.auto_blackout_minutes))
+        self.enable_mouse_exit.setChecked(self.mouse_exit_enabled)
+        self.low_power_checkbox.setChecked(self.low_power_overlay)
+        self.wake_combo.setCurrentIndex(
+            self.wake_combo.findData((self.wake_distance, self.wake_velocity)))
+        self.mute_checkbox.setChecked(self.mute_on_blank)
+        self.pause_media_checkbox.setChecked(self.pause_media_on_blank)
+        self.hide_button_checkbox.setChecked(self.hide_button)
+        for widget in widgets:
+            widget.blockSignals(False)
 
     def on_black_screen_closed(self):
-        # 恢复原始亮度
-        if self.original_brightness is not None:
-            self.set_brightness(self.original_brightness)
-            self.original_brightness = None
-            
-        self.is_black_screen = False
-        self.main_button.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 #6366f1, stop:1 #8b5cf6);
-                border-radius: 25px;
-                border: 2px solid rgba(255, 255, 255, 0.2);
-                color: white;
-                font-size: 18px;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                                          stop:0 #818cf8, stop:1 #9333ea);
-                border: 2px solid rgba(255, 255, 255, 0.3);
-            }
-        """)
+        # 鼠标移动或关闭黑屏窗口，与再次切换走同一条恢复路径
+        self.blackout.restore()
 
     def eventFilter(self, obj, event):
         if obj == self.shortcut_input:
             if event.type() == QEvent.MouseButtonPress:
-                # 开始记录快捷键
+                # 开始记录快捷键，期间暂停全局快捷键
                 self.recording_shortcut = True
+                self.hotkey_engine.paused = True
                 self.temp_keys = set()  # 用于临时存储按下的键
                 self.shortcut_input.setText("按下快捷键...")
-                self.shortcut_input.setStyleSheet("""
-                    QLineEdit {
-                        background: rgba(255, 255, 255, 0.15);
-                        border: 1px solid rgba(99, 102, 241, 0.5);
-                    }
-                """)
+                theme.set_state(self.shortcut_input, 'recording', True)
                 return True
             
             elif event.type() == QEvent.KeyPress and self.recording_shortcut:
@@ -676,23 +1156,25 @@ class FloatingButton(QWidget):
                         new_shortcut = '+'.join(sorted(self.temp_keys))
                         # 测试快捷键是否可用
                         for key in new_shortcut.split('+'):
-                            if not keyboard.key_to_scan_codes(key):
+                            if not self.platform.key_to_scan_codes(key):
                                 raise ValueError(f"无效的按键: {key}")
                         
                         self.shortcut = new_shortcut
                         self.shortcut_input.setText(new_shortcut)
                         self.save_settings()
                         self.recording_shortcut = False
-                        self.shortcut_input.setStyleSheet("")
+                        theme.set_state(self.shortcut_input, 'recording', False)
                         self.temp_keys.clear()
                         
-                        # 重置按键状态
-                        self.key_pressed = False
+                        # 重新编译快捷键并重置按键状态
+                        self.hotkey_engine.set_bindings(self.all_bindings())
+                        self.hotkey_engine.paused = False
                     except Exception as e:
                         print(f"无效的快捷键组合: {e}")
                         self.shortcut_input.setText(self.shortcut)  # 恢复原来的快捷键
                         self.recording_shortcut = False
-                        self.shortcut_input.setStyleSheet("")
+                        self.hotkey_engine.paused = False
+                        theme.set_state(self.shortcut_input, 'recording', False)
                         self.temp_keys.clear()
                 
                 return True
@@ -700,29 +1182,21 @@ class FloatingButton(QWidget):
             elif event.type() == QEvent.FocusOut and self.recording_shortcut:
                 # 取消记录快捷键
                 self.recording_shortcut = False
+                self.hotkey_engine.paused = False
                 self.shortcut_input.setText(self.shortcut)
-                self.shortcut_input.setStyleSheet("")
+                theme.set_state(self.shortcut_input, 'recording', False)
                 self.temp_keys.clear()
                 return True
             
         return super().eventFilter(obj, event)
 
     def set_brightness(self, value):
-        """设置显示器亮度"""
-        try:
-            for monitor in self.wmi.WmiMonitorBrightnessMethods():
-                monitor.WmiSetBrightness(value, 0)
-        except Exception as e:
-            print(f"设置亮度失败: {e}")
+        """设置显示器亮度(异步，在亮度线程中执行)"""
+        self.brightness.set_level(value)
 
     def get_current_brightness(self):
-        """获取当前亮度"""
-        try:
-            for monitor in self.wmi.WmiMonitorBrightness():
-                return monitor.CurrentBrightness
-        except Exception as e:
-            print(f"获取亮度失败: {e}")
-            return None
+        """获取最近一次读取或写入的 {显示器: 亮度}，不会阻塞"""
+        return self.brightness.levels
 
     def show_author_info(self):
         # 创建对话框
@@ -778,21 +1252,264 @@ class FloatingButton(QWidget):
         # 显示对话框
         dialog.exec_() 
 
+class BlackoutOverlays(QObject):
+    """为每个显示器预先创建一个隐藏的黑屏窗口，切换黑屏时只需显示/隐藏
+
+    磨砂模式下显示前先截取各显示器并模糊(blur.frost)；设置了刷新间隔并且平台能让黑屏窗口
+    不出现在截图中时，定时在 GUI 线程截图(Qt 只允许在 GUI 线程截图)，模糊在工作线程中进行，
+    上一次还没完成时跳过本次刷新。
+    """
+    closeSignal = pyqtSignal()
+    _frosted = pyqtSignal(object)  # 工作线程 -> GUI 线程：{QScreen: 模糊后的图像}
+
+    def __init__(self, exit_on_move, hide_cursor, parent=None, low_power=False, platform=None):
+        super().__init__(parent)
+        self.exit_on_move = exit_on_move
+        self.hide_cursor = hide_cursor
+        self.low_power = low_power
+        self.platform = platform
+        self.mode = 'black'  # 'black' 或 'frosted'
+        self.frost_refresh = 0  # 磨砂画面刷新间隔(秒)，0 为不刷新
+        self.last_frost_ms = 0.0  # 最近一次显示前截图和模糊的耗时
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.timeout.connect(self._refresh_frost)
+        self._executor = None  # 模糊刷新用的工作线程，第一次刷新时创建
+        self._frosting = False  # 刷新任务是否正在工作线程中执行
+        self._frosted.connect(self._on_frosted)
+        # 所有显示器共用一个唤醒检测(使用全局坐标)，鼠标跨显示器移动时不会重新开始
+        self.wake_detector = WakeDetector()
+        self.recorder = None  # WakeTraceRecorder，记录黑屏期间的鼠标轨迹
+        self.overlays = {}  # QScreen -> BlackScreen
+        self.covering_all = False  # 是否覆盖所有显示器(新接入的显示器也要黑屏)
+        self.visible = False
+        self.built = False
+        self.last_toggle_ms = 0.0  # 最近一次显示/隐藏全部窗口的耗时
+
+    def build(self):
+        """创建各显示器的黑屏窗口，启动时在延迟阶段调用，第一次黑屏前也会确保已创建"""
+        if self.built:
+            return
+        self.built = True
+        app = QApplication.instance()
+        for screen in app.screens():
+            self._add_screen(screen)
+        # 热插拔显示器时增删对应的窗口
+        app.screenAdded.connect(self._add_screen)
+        app.screenRemoved.connect(self._remove_screen)
+
+    def _add_screen(self, screen):
+        overlay = BlackScreen(screen, self.exit_on_move, self.hide_cursor, self.low_power,
+                              self.wake_detector)
+        overlay.recorder = self.recorder
+        overlay.closeSignal.connect(self.closeSignal)
+        if self.platform is not None:
+            try:
+                overlay.capture_excluded = self.platform.exclude_from_capture(overlay.winId())
+            except (OSError, AttributeError, NotImplementedError):
+                overlay.capture_excluded = False
+        self.overlays[screen] = overlay
+        if self.visible and self.covering_all:
+            overlay.showFullScreen()
+
+    def _remove_screen(self, screen):
+        overlay = self.overlays.pop(screen, None)
+        if overlay is not None:
+            overlay.hide()
+            overlay.deleteLater()
+
+    def show(self, screen=None):
+        """显示黑屏，screen 为 None 时覆盖所有显示器"""
+        self.build()
+        start = time.perf_counter()
+        self.wake_detector.reset()
+        self.covering_all = screen is None
+        targets = [overlay for target, overlay in self.overlays.items()
+                   if screen is None or target is screen]
+        if self.mode == 'frosted':
+            # 必须在黑屏窗口出现之前截图
+            for overlay in targets:
+                if not overlay.isVisible():
+                    overlay.set_background(self._frost(overlay.capture()))
+            self.last_frost_ms = (time.perf_counter() - start) * 1000
+            if tracer.enabled:
+                tracer.record('overlay_frosted', ms=self.last_frost_ms)
+        for overlay in targets:
+            overlay.trace_paint = tracer.enabled
+            overlay.showFullScreen()
+        self.visible = True
+        self._update_refresh()
+        self.last_toggle_ms = (time.perf_counter() - start) * 1000
+        if tracer.enabled:
+            tracer.record('overlay_shown', ms=self.last_toggle_ms)
+
+    def hide(self):
+        start = time.perf_counter()
+        self._refresh_timer.stop()
+        for overlay in self.overlays.values():
+            if overlay.isVisible():
+                overlay.hide()
+            overlay.set_background(None)  # 释放截图，也不让下次黑屏显示过时的内容
+        if self.recorder is not None and self.visible:
+            self.recorder.finish(self.wake_detector.woke)
+        self.visible = False
+        self.covering_all = False
+        self.last_toggle_ms = (time.perf_counter() - start) * 1000
+        if tracer.enabled:
+            tracer.record('overlay_hidden', ms=self.last_toggle_ms)
+
+    def set_mouse_exit(self, enable):
+        self.exit_on_move = enable
+        for overlay in self.overlays.values():
+            overlay.set_mouse_exit(enable)
+
+    def set_hide_cursor(self, hide):
+        self.hide_cursor = hide
+        for overlay in self.overlays.values():
+            overlay.set_hide_cursor(hide)
+
+    def set_low_power(self, enable):
+        self.low_power = enable
+        for overlay in self.overlays.values():
+            overlay.set_low_power(enable)
+
+    def set_mode(self, mode, refresh=0):
+        """设置黑屏样式和磨砂画面的刷新间隔(秒)，下次显示时生效"""
+        self.mode = mode
+        self.frost_refresh = refresh
+        self._update_refresh()
+
+    def _update_refresh(self):
+        if (self.visible and self.mode == 'frosted' and self.frost_refresh
+                and any(overlay.capture_excluded for overlay in self.overlays.values())):
+            self._refresh_timer.start(self.frost_refresh * 1000)
+        else:
+            self._refresh_timer.stop()
+
+    @staticmethod
+    def _frost(image):
+        # 截图失败(如部分 Wayland 环境)时返回空图像，退回纯黑
+        return None if image.isNull() else blur.frost(image)
+
+    def _refresh_frost(self):
+        if self._frosting:
+            return  # 上一次模糊还没完成，不让任务堆积
+        images = {screen: overlay.capture() for screen, overlay in self.overlays.items()
+                  if overlay.isVisible() and overlay.capture_excluded}
+        if not images:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frost')
+        self._frosting = True
+        self._executor.submit(self._frost_all, images)
+
+    def _frost_all(self, images):
+        # 工作线程：只处理 QImage，结果通过信号排队交给 GUI 线程
+        try:
+            self._frosted.emit({screen: self._frost(image) for screen, image in images.items()})
+        except Exception as e:
+            print(f"刷新磨砂画面失败: {e}")
+            self._frosted.emit({})
+
+    def _on_frosted(self, backgrounds):
+        self._frosting = False
+        if not self.visible or self.mode != 'frosted':
+            return
+        for screen, background in backgrounds.items():
+            overlay = self.overlays.get(screen)
+            if overlay is not None and overlay.isVisible() and background is not None:
+                overlay.set_background(background)
+
+    def set_wake_thresholds(self, distance, velocity):
+        self.wake_detector.distance = distance
+        self.wake_detector.velocity = velocity
+
+    def set_recorder(self, recorder):
+        self.recorder = recorder
+        for overlay in self.overlays.values():
+            overlay.recorder = recorder
+
+    def stats(self):
+        """所有黑屏窗口的计数之和(绘制次数、处理/丢弃的鼠标移动等)"""
+        total = Counter()
+        for overlay in self.overlays.values():
+            total.update(overlay.stats)
+        return total
+
+
 class BlackScreen(QWidget):
+    """单个显示器的黑屏窗口
+
+    默认用样式表填黑。低功耗模式(可选)下不设置样式表，不经过样式引擎，也不让 Qt 预先擦除背景，
+    只在窗口被系统要求重绘时用 QPainter 直接填黑一次。
+    只在开启“鼠标移动退出”时打开鼠标跟踪：关闭时 Qt 在 C++ 中就丢弃悬停的移动事件，不会进入 Python。
+    鼠标移动交给 WakeDetector 判断，抖动不会退出黑屏。
+    设置了 background(磨砂模式)时把缩小模糊后的截图放大铺满窗口，再压暗一层。
+    stats 记录绘制和鼠标事件次数，便于测试和基准测试。
+    """
     closeSignal = pyqtSignal()
 
-    def __init__(self, exit_on_move):
+    FROST_TINT = QColor(0, 0, 0, 96)  # 磨砂画面上叠加的半透明黑色
+
+    def __init__(self, screen, exit_on_move, hide_cursor=True, low_power=False, wake_detector=None):
         super().__init__()
+        self.target_screen = screen
         self.exit_on_move = exit_on_move
+        self.hide_cursor = hide_cursor
+        self.low_power = low_power
+        self.wake_detector = wake_detector or WakeDetector()
+        self.recorder = None
+        self.trace_paint = False  # 显示后第一次绘制时记录跟踪
+        self.background = None  # 磨砂模式下模糊后的截图(QImage)
+        self.capture_excluded = False  # 本窗口是否不会出现在屏幕截图中
+        self.stats = Counter()  # show / paint / mouse_move / wake
         self.initUI()
 
     def initUI(self):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
-        self.setStyleSheet("background-color: black;")
-        if self.exit_on_move:
-            self.setCursor(Qt.BlankCursor)
+        self.set_low_power(self.low_power)
+        self.setMouseTracking(self.exit_on_move)
+        self.set_hide_cursor(self.hide_cursor)
+        # 提前创建原生窗口并绑定到对应的显示器，显示时无需再创建
+        self.setGeometry(self.target_screen.geometry())
+        self.winId()
+        self.windowHandle().setScreen(self.target_screen)
+        self.target_screen.geometryChanged.connect(self.setGeometry)
+
+    def set_low_power(self, enable):
+        self.low_power = enable
+        # 窗口完全不透明，由 paintEvent 自己填黑，Qt 不必先擦除背景
+        self.setAttribute(Qt.WA_OpaquePaintEvent, enable or self.background is not None)
+        self.setAttribute(Qt.WA_NoSystemBackground, enable)
+        self.setStyleSheet('' if enable else "background-color: black;")
+
+    def paintEvent(self, event):
+        self.stats['paint'] += 1
+        if self.trace_paint:
+            self.trace_paint = False
+            tracer.record('overlay_painted', screen=self.target_screen.name())
+        if self.background is not None:
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(self.rect(), self.background)
+            painter.fillRect(event.rect(), self.FROST_TINT)
+        elif self.low_power:
+            QPainter(self).fillRect(event.rect(), Qt.black)
+        else:
+            super().paintEvent(event)
+
+    def capture(self):
+        """截取本显示器当前的内容(只能在 GUI 线程调用)"""
+        return self.target_screen.grabWindow(0).toImage()
+
+    def set_background(self, image):
+        self.background = image
+        # 磨砂画面由 paintEvent 完整绘制，样式表的黑色背景不需要先填充
+        self.setAttribute(Qt.WA_OpaquePaintEvent, self.low_power or image is not None)
+        if self.isVisible():
+            self.update()
 
     def showEvent(self, event):
+        self.stats['show'] += 1
         # 每次显示时都确保是全屏的
         self.showFullScreen()
         super().showEvent(event)
@@ -802,7 +1519,15 @@ class BlackScreen(QWidget):
         pass
 
     def mouseMoveEvent(self, event):
+        if self.exit_on_move and self.recorder is not None:
+            pos = event.globalPos()
+            self.recorder.add(pos.x(), pos.y(), event.timestamp())
+        self.stats['mouse_move'] += 1
         if self.exit_on_move:
+            pos = event.globalPos()
+            if not self.wake_detector.feed(pos.x(), pos.y(), event.timestamp()):
+                return  # 抖动，继续黑屏
+            self.stats['wake'] += 1
             self.closeSignal.emit()
             self.hide()
             event.accept()  # 确保事件被处理
@@ -814,22 +1539,64 @@ class BlackScreen(QWidget):
 
     def set_mouse_exit(self, enable):
         self.exit_on_move = enable
+        self.setMouseTracking(enable)
+
+    def set_hide_cursor(self, hide):
+        self.hide_cursor = hide
+        self.setCursor(Qt.BlankCursor if hide else Qt.ArrowCursor)
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    app.setStyle('Fusion')
-    
-    # 设置应用程序范围的样式表
-    app.setStyleSheet("""
-        QToolTip {
-            background-color: rgba(40, 40, 40, 240);
-            color: white;
-            border: 1px solid rgba(255, 255, 255, 30);
-            border-radius: 4px;
-            padding: 4px;
-        }
-    """)
+    parser = argparse.ArgumentParser(prog='BlackAny', epilog=ipc.usage(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='打印各启动阶段的耗时后退出')
+    parser.add_argument('--trace', action='store_true',
+                        help='记录每次黑屏/恢复各阶段的时间戳，可从托盘菜单或退出时导出')
+    parser.add_argument('--trace-file', metavar='PATH',
+                        help='跟踪数据导出路径(JSONL)，默认写到配置目录的 trace.jsonl')
+    parser.add_argument('--record-wake-trace', metavar='PATH',
+                        help='把每次黑屏期间的鼠标轨迹追加到 PATH(JSONL)，用于扩充 wake_traces.jsonl')
+    args, qt_args = parser.parse_known_args()
+    if args.trace or args.trace_file:
+        tracer.enable()
+    profiler = StartupProfiler(enabled=args.profile_startup, origin=STARTUP_BEGIN)
+    profiler.mark('imports')
+
+    # 已有实例在运行时让它显示悬浮窗，本进程直接退出
+    platform = get_backend()
+    endpoint = ipc.control_endpoint(platform)
+    if not args.profile_startup:
+        try:
+            running = ipc.send_command(endpoint, 'show') is not None
+        except (OSError, ValueError) as e:
+            # 旧实例正忙或端点异常，由 ControlServer.listen 重试确认是否真的还在运行
+            print(f"连接已运行的实例失败: {e}")
+            running = False
+        if running:
+            sys.exit(0)
+
+    with profiler.phase('qapplication'):
+        app = QApplication(sys.argv[:1] + qt_args)
+        app.setStyle('Fusion')
+        
+        # 设置应用程序范围的样式表(只解析这一次)
+        theme.install(app)
     
-    ex = FloatingButton()
-    ex.show()
+    ex = FloatingButton(platform=platform, profiler=profiler)
+    ex.trace_file = args.trace_file
+    if not args.profile_startup:
+        ex.control = ControlServer(endpoint, ex.handle_control, ex)
+        if not ex.control.listen():
+            sys.exit(0)  # 同时启动的另一个实例已经先开始监听
+    if args.record_wake_trace:
+        ex.overlays.set_recorder(WakeTraceRecorder(args.record_wake_trace))
+    if not ex.hide_button:
+        ex.show()
+    if args.profile_startup:
+        def report_startup():
+            print(profiler.report())
+            ex.hotkey_engine.stop()
+            ex.brightness.stop()
+            app.quit()
+        ex.startupFinished.connect(report_startup)
     sys.exit(app.exec_())
@@ -0,0 +1,64 @@
+import time
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+
+class AutoBlackout(QObject):
+    """无操作一段时间后自动黑屏
+
+    不轮询：读取系统记录的最后一次输入时间，只启动一个单次定时器，在剩余的空闲时间后到期。
+    到期时再读一次，期间有过输入就按新的剩余时间重新启动，否则发出 idle 信号。
+    一直无操作时整个空闲期只唤醒一次；有操作时每个 timeout 最多唤醒一次。
+    黑屏期间不启动定时器，恢复后(disarm/arm)从恢复的时刻重新计时。
+    """
+    idle = pyqtSignal()
+
+    def __init__(self, platform, timeout=0, parent=None, clock=time.monotonic):
+        super().__init__(parent)
+        self.platform = platform
+        self.timeout = timeout  # ms，0 为关闭
+        self.wakeups = 0  # 定时器到期的次数
+        self._clock = clock
+        self._armed_at = clock()  # 从这个时刻开始计时(恢复黑屏时)，系统空闲时间不会早于它
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        # 粗略定时器可能提前 5% 到期，那样会多一次唤醒
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+    @property
+    def armed(self):
+        return self._timer.isActive()
+
+    def arm(self, reset=True):
+        """开始(重新)计时；reset 为 True 时忽略此刻之前的空闲时间"""
+        if reset:
+            self._armed_at = self._clock()
+        if not self.timeout:
+            self._timer.stop()
+            return
+        remaining = self._remaining()
+        if remaining is None:
+            return
+        if remaining <= 0:
+            self._timer.stop()
+            self.idle.emit()
+        else:
+            self._timer.start(remaining)
+
+    def disarm(self):
+        self._timer.stop()
+
+    def _remaining(self):
+        """距离自动黑屏的剩余时间(ms)，无法读取空闲时间时关闭自动黑屏并返回 None"""
+        try:
+            idle_ms = self.platform.idle_time()
+        except (OSError, NotImplementedError) as e:
+            print(f"无法读取系统空闲时间，自动黑屏已关闭: {e}")
+            self.timeout = 0
+            return None
+        idle_ms = min(idle_ms, (self._clock() - self._armed_at) * 1000)
+        return int(self.timeout - idle_ms)
+
+    def _on_timeout(self):
+        self.wakeups += 1
+        self.arm(reset=False)
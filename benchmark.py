@@ -0,0 +1,811 @@
+"""BlackAny 性能基准测试
+
+在无界面环境(QT_QPA_PLATFORM=offscreen)下使用假的平台后端运行，不会改动真实的亮度和设置。
+
+    python benchmark.py                       # 运行全部项目，结果写入 benchmark.json
+    python benchmark.py startup theme         # 只运行指定项目
+    python benchmark.py --compare old.json    # 与之前的结果对比，有退化时返回非 0
+
+项目:
+    startup   冷启动耗时和内存(设置面板延迟创建与立即创建对比)，每次都在新进程中运行
+    theme     切换按钮状态时替换样式表与切换动态属性的耗时
+    latency   快捷键到黑屏显示、恢复的延迟
+    poll      轮询后备方案每次检查快捷键的耗时
+    settings  设置保存/加载的耗时
+    idle      空闲时和黑屏期间每分钟的唤醒次数
+    memory    1000 次黑屏切换后的内存增长
+    wake      用 wake_traces.jsonl 中的鼠标轨迹回放唤醒检测：误唤醒、漏唤醒、检测延迟
+              (按轨迹来源分为 synthetic 脚本生成 / recorded 真实录制，目前只有合成轨迹)
+    overlay   黑屏窗口显示/隐藏、重绘的耗时，绘制、expose 和事件次数(样式表模式与低功耗模式对比)
+    hooks     黑屏/恢复钩子(静音、暂停媒体等)对显示和恢复延迟的影响，以及各钩子的耗时
+    blur      磨砂黑屏截图缩小、模糊的耗时(不同分辨率，numpy 与 Qt 实现对比)
+    metrics   计数、直方图记录和导出 Prometheus 文本的耗时
+    watchdog  卡顿监视器对模拟卡顿的时长误差和采样次数
+    auto_blackout  无操作自动黑屏的唤醒次数和到期误差
+    schedule  定时黑屏的重建、处理耗时，以及修改系统时间后的正确性
+
+对比时每个指标按 DIRECTIONS 中的方向判断：越小越好、越大越好，或只描述工作量而不比较。
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('BLACKANY_BACKEND', 'fake')
+
+
+def rss_kb():
+    """当前进程的常驻内存(KB)，无法获取时返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss // 1024
+    except ImportError:
+        return None
+
+
+def wait_until(app, predicate, timeout=5.0, sleep=0.001):
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        app.processEvents()
+        if sleep:
+            time.sleep(sleep)
+    return predicate()
+
+
+def summarize(samples):
+    """毫秒样本 -> 中位数、p95、最大值"""
+    samples = sorted(samples)
+    return {
+        'median': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max': samples[-1],
+    }
+
+
+def qt_app():
+    from PyQt5.QtWidgets import QApplication
+    import theme
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv[:1])
+        theme.install(app)
+    return app
+
+
+def create_button(**kwargs):
+    """创建一个使用假后端的悬浮窗，并等待延迟初始化完成"""
+    import app as blackany
+    from platform_backend import FakeBackend
+    app = qt_app()
+    backend = FakeBackend()
+    button = blackany.FloatingButton(platform=backend, **kwargs)
+    finished = []
+    button.startupFinished.connect(lambda: finished.append(True))
+    button.show()
+    wait_until(app, lambda: finished)
+    return app, button, backend
+
+
+def close_button(button):
+    button.hotkey_engine.stop()
+    button.brightness.stop()
+    button.settings.close()
+    button.deleteLater()
+
+
+def run_startup(eager_panel):
+    """在当前进程中启动一次，返回启动耗时和内存"""
+    start = time.perf_counter()
+    import app as blackany
+    from platform_backend import FakeBackend
+    app = qt_app()
+    imported = time.perf_counter()
+
+    finished = []
+    button = blackany.FloatingButton(platform=FakeBackend())
+    button.startupFinished.connect(lambda: finished.append(True))
+    if eager_panel:
+        button.ensure_settings_panel()
+    button.show()
+    first_frame = time.perf_counter()
+    wait_until(app, lambda: finished)
+    ready = time.perf_counter()
+    result = {
+        'panel': 'eager' if eager_panel else 'lazy',
+        'import_ms': (imported - start) * 1000,
+        'first_frame_ms': (first_frame - imported) * 1000,
+        'ready_ms': (ready - imported) * 1000,
+        'rss_kb': rss_kb(),
+    }
+    close_button(button)
+    return result
+
+
+def bench_startup(runs=5):
+    """每次都在新进程中启动，避免模块缓存影响冷启动数据"""
+    results = {}
+    for mode in ('lazy', 'eager'):
+        samples = []
+        for _ in range(runs):
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--child-startup', mode],
+                text=True, stderr=subprocess.DEVNULL)
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        for key in ('import_ms', 'first_frame_ms', 'ready_ms', 'rss_kb'):
+            values = [sample[key] for sample in samples if sample[key] is not None]
+            if values:
+                results[f'{mode}.{key}'] = statistics.median(values)
+    return results
+
+
+# 旧方案：每次切换都给按钮设置一份完整的样式表
+OLD_IDLE_STYLE = """
+    QPushButton {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #6366f1, stop:1 #8b5cf6);
+        border-radius: 25px;
+        border: 2px solid rgba(255, 255, 255, 0.2);
+        color: white;
+        font-size: 18px;
+    }
+    QPushButton:hover {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #818cf8, stop:1 #9333ea);
+        border: 2px solid rgba(255, 255, 255, 0.3);
+    }
+"""
+OLD_ACTIVE_STYLE = OLD_IDLE_STYLE.replace('#6366f1', '#dc2626').replace('#8b5cf6', '#b91c1c') \
+    .replace('#818cf8', '#ef4444').replace('#9333ea', '#dc2626')
+
+
+def bench_theme(toggles=2000):
+    """切换悬浮按钮状态的耗时(每次切换的微秒数)"""
+    from PyQt5.QtWidgets import QPushButton
+    import theme
+    app = qt_app()
+
+    old_button = QPushButton('⬤')
+    old_button.setStyleSheet(OLD_IDLE_STYLE)
+    old_button.show()
+    start = time.perf_counter()
+    for i in range(toggles):
+        old_button.setStyleSheet(OLD_ACTIVE_STYLE if i % 2 == 0 else OLD_IDLE_STYLE)
+        app.processEvents()
+    old_us = (time.perf_counter() - start) / toggles * 1e6
+
+    new_button = QPushButton('⬤')
+    new_button.setObjectName('mainButton')
+    new_button.setProperty('state', 'idle')
+    new_button.show()
+    start = time.perf_counter()
+    for i in range(toggles):
+        theme.set_state(new_button, 'state', 'active' if i % 2 == 0 else 'idle')
+        app.processEvents()
+    new_us = (time.perf_counter() - start) / toggles * 1e6
+    old_button.close()
+    new_button.close()
+    return {'stylesheet_us': old_us, 'property_us': new_us}
+
+
+def overlays_visible(button):
+    overlays = button.overlays.overlays.values()
+    return bool(overlays) and all(overlay.isVisible() for overlay in overlays)
+
+
+def overlays_hidden(button):
+    return not any(overlay.isVisible() for overlay in button.overlays.overlays.values())
+
+
+def bench_latency(cycles=200):
+    """从钩子线程收到快捷键到所有黑屏窗口可见，以及恢复到全部隐藏的延迟"""
+    app, button, backend = create_button()
+    keys = button.shortcut.split('+')
+    show_ms = []
+    restore_ms = []
+    for _ in range(cycles):
+        # 按键在另一个线程中注入，与真实的键盘钩子线程一致
+        start = time.perf_counter()
+        presser = threading.Thread(target=lambda: [backend.press(key) for key in keys])
+        presser.start()
+        wait_until(app, lambda: overlays_visible(button), sleep=0)
+        show_ms.append((time.perf_counter() - start) * 1000)
+        presser.join()
+        for key in keys:
+            backend.release(key)
+
+        start = time.perf_counter()
+        button.toggle_black_screen()
+        wait_until(app, lambda: overlays_hidden(button), sleep=0)
+        restore_ms.append((time.perf_counter() - start) * 1000)
+    close_button(button)
+    results = {}
+    for name, samples in (('hotkey_to_overlay_ms', show_ms), ('restore_ms', restore_ms)):
+        for stat, value in summarize(samples).items():
+            results[f'{name}.{stat}'] = value
+    return results
+
+
+def bench_poll(ticks=5000):
+    """轮询后备方案每次检查快捷键的耗时"""
+    from hotkey import HotkeyEngine
+    from platform_backend import FakeBackend
+    qt_app()
+    engine = HotkeyEngine({'blackout': 'ctrl+alt+b', 'dim': 'ctrl+alt+d'}, FakeBackend(), 'poll')
+    start = time.perf_counter()
+    for _ in range(ticks):
+        engine._poll()
+    return {'poll_tick_us': (time.perf_counter() - start) / ticks * 1e6}
+
+
+def bench_settings(rounds=200):
+    """一次设置修改写入文件(含防抖之外的全部开销)和一次加载的耗时"""
+    app, button, backend = create_button()
+    save_ms = []
+    load_ms = []
+    for i in range(rounds):
+        button.hide_cursor = i % 2 == 0
+        start = time.perf_counter()
+        button.save_settings()
+        button.settings.flush(wait=True)
+        save_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        button.load_settings()
+        load_ms.append((time.perf_counter() - start) * 1000)
+    # 只统计保存调用本身在 GUI 线程上的耗时(写入在后台线程)
+    start = time.perf_counter()
+    for i in range(rounds):
+        button.hide_cursor = i % 2 == 0
+        button.save_settings()
+    gui_us = (time.perf_counter() - start) / rounds * 1e6
+    close_button(button)
+    return {
+        'save_flush_ms': statistics.median(save_ms),
+        'save_gui_us': gui_us,
+        'load_ms': statistics.median(load_ms),
+    }
+
+
+def count_timer_events(app, seconds):
+    """统计一段时间内事件循环分发的定时器事件数"""
+    from PyQt5.QtCore import QObject, QEvent, QEventLoop, QTimer
+
+    class Counter(QObject):
+        count = 0
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Timer:
+                Counter.count += 1
+            return False
+
+    counter = Counter()
+    app.installEventFilter(counter)
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+    app.removeEventFilter(counter)
+    return max(Counter.count - 1, 0)  # 减去结束本次统计的定时器
+
+
+def bench_idle(seconds=5.0):
+    """空闲时和黑屏期间每分钟的唤醒次数(键盘钩子与轮询对比)"""
+    results = {}
+    for backend_name in ('hook', 'poll'):
+        app, button, backend = create_button()
+        if backend_name == 'poll':
+            button.hotkey_engine.stop()
+            button.hotkey_engine.backend = 'poll'
+            button.hotkey_engine.start()
+        button.idle.count_wakeups = True
+        events = count_timer_events(app, seconds)
+        results[f'{backend_name}.wakeups_per_min'] = events * 60 / seconds
+
+        # 黑屏并等亮度渐变结束后再统计，只看稳定的黑屏状态
+        button.toggle_black_screen()
+        wait_until(app, lambda: button.blackout.state == 'blanked' and backend.brightness == 0)
+        events = count_timer_events(app, seconds)
+        results[f'{backend_name}.blanked_wakeups_per_min'] = events * 60 / seconds
+        # 黑屏期间低功耗模式自己的计数(包括进入黑屏后的亮度渐变)，只在诊断时开启
+        results[f'{backend_name}.blanked_counter_per_min'] = button.idle.wakeups_per_minute()
+        button.toggle_black_screen()
+        wait_until(app, lambda: button.blackout.state == 'idle')
+        close_button(button)
+    return results
+
+
+def bench_memory(cycles=1000):
+    """1000 次黑屏切换前后的内存"""
+    app, button, backend = create_button()
+    for _ in range(20):  # 预热
+        button.toggle_black_screen()
+        app.processEvents()
+    before = rss_kb()
+    for _ in range(cycles):
+        button.toggle_black_screen()
+        app.processEvents()
+    if button.blackout.active:
+        button.toggle_black_screen()
+    wait_until(app, lambda: button.blackout.state == 'idle')
+    after = rss_kb()
+    close_button(button)
+    if before is None:
+        return {}
+    return {'rss_before_kb': before, 'rss_after_kb': after, 'rss_growth_kb': after - before}
+
+
+def bench_overlay(toggles=100, repaints=500, idle_seconds=1.0):
+    """黑屏窗口的开销：样式表模式(默认)与低功耗原生绘制模式对比
+
+    除了耗时，还统计每次显示的绘制次数、expose 次数、窗口和控件收到的事件数(每个事件都是一次唤醒)，
+    以及显示后静止期间每分钟收到的事件数。offscreen 平台没有合成器，也没有真正的背景擦除，
+    这里的差别只反映 Qt 内部的工作量；低功耗模式在真实平台上的收益需要在 Windows/X11 上另行测量。
+    """
+    from PyQt5.QtCore import QObject, QEvent, QEventLoop, QTimer
+    from app import BlackScreen
+    app = qt_app()
+
+    class EventCounter(QObject):
+        def __init__(self):
+            super().__init__()
+            self.events = 0
+            self.exposes = 0
+
+        def eventFilter(self, obj, event):
+            self.events += 1
+            if event.type() == QEvent.Expose:
+                self.exposes += 1
+            return False
+
+    results = {}
+    for mode, low_power in (('stylesheet', False), ('low_power', True)):
+        overlay = BlackScreen(app.primaryScreen(), exit_on_move=False, low_power=low_power)
+        counter = EventCounter()
+        overlay.installEventFilter(counter)
+        overlay.windowHandle().installEventFilter(counter)
+        start = time.perf_counter()
+        for _ in range(toggles):
+            overlay.showFullScreen()
+            app.processEvents()
+            overlay.hide()
+            app.processEvents()
+        results[f'{mode}.show_hide_us'] = (time.perf_counter() - start) / toggles * 1e6
+        results[f'{mode}.paints_per_show'] = overlay.stats['paint'] / toggles
+        results[f'{mode}.exposes_per_show'] = counter.exposes / toggles
+        results[f'{mode}.events_per_show'] = counter.events / toggles
+
+        overlay.showFullScreen()
+        app.processEvents()
+        counter.events = 0
+        loop = QEventLoop()
+        QTimer.singleShot(int(idle_seconds * 1000), loop.quit)
+        loop.exec_()
+        results[f'{mode}.idle_events_per_min'] = counter.events * 60 / idle_seconds
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        for _ in range(repaints):
+            overlay.repaint()
+        results[f'{mode}.repaint_us'] = (time.perf_counter() - wall) / repaints * 1e6
+        results[f'{mode}.repaint_cpu_us'] = (time.process_time() - cpu) / repaints * 1e6
+        overlay.hide()
+        overlay.deleteLater()
+        app.processEvents()
+    return results
+
+
+def bench_hooks(cycles=20, media_delay=100):
+    """黑屏钩子(静音、暂停媒体)很慢时，黑屏窗口的显示/隐藏延迟与没有钩子时对比"""
+    app, button, backend = create_button()
+    backend.media_delay = media_delay
+    results = {}
+    for mode, enabled in (('no_hooks', False), ('slow_hooks', True)):
+        button.mute_on_blank = button.pause_media_on_blank = enabled
+        button.rebuild_hooks()
+        show_ms = []
+        restore_ms = []
+        for _ in range(cycles):
+            start = time.perf_counter()
+            button.toggle_black_screen()
+            wait_until(app, lambda: overlays_visible(button), sleep=0)
+            show_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            button.toggle_black_screen()
+            wait_until(app, lambda: overlays_hidden(button), sleep=0)
+            restore_ms.append((time.perf_counter() - start) * 1000)
+            button.hooks.wait_idle(5)
+        for name, samples in (('show_ms', show_ms), ('restore_ms', restore_ms)):
+            for stat, value in summarize(samples).items():
+                results[f'{mode}.{name}.{stat}'] = value
+    for name, stats in button.hooks.summary().items():
+        for stat in ('median_ms', 'p95_ms', 'failures', 'timeouts'):
+            results[f'hook.{name}.{stat}'] = stats.get(stat, 0)
+    close_button(button)
+    return results
+
+
+def test_image(width, height):
+    """模拟屏幕内容：色块加满屏文字"""
+    from PyQt5.QtGui import QColor, QImage, QPainter
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(235, 235, 235))
+    painter = QPainter(image)
+    painter.fillRect(0, 0, width // 3, height, QColor(40, 60, 90))
+    for y in range(0, height, 20):
+        painter.drawText(width // 3 + 10, y, 'BlackAny frosted overlay benchmark ' * 8)
+    painter.end()
+    return image
+
+
+def bench_blur(rounds=5):
+    """磨砂黑屏在不同分辨率下的截图处理耗时(单线程)：缩小、模糊和总计"""
+    import blur
+    app = qt_app()  # QImage 绘制文字需要 QApplication，保持引用
+    backends = ['qt'] + (['numpy'] if blur.numpy is not None else [])
+    results = {}
+    for name, (width, height) in (('1080p', (1920, 1080)), ('1440p', (2560, 1440)),
+                                  ('4k', (3840, 2160))):
+        image = test_image(width, height)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            small = blur.downscale(image)
+        results[f'{name}.downscale_ms'] = (time.perf_counter() - start) / rounds * 1000
+        for backend in backends:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                blur.blur(small, backend=backend)
+            results[f'{name}.{backend}.blur_ms'] = (time.perf_counter() - start) / rounds * 1000
+            start = time.perf_counter()
+            for _ in range(rounds):
+                blur.frost(image, backend=backend)
+            results[f'{name}.{backend}.frost_ms'] = (time.perf_counter() - start) / rounds * 1000
+    return results
+
+
+def bench_metrics(rounds=200000):
+    """热路径上记录一次指标的开销，以及导出一次的耗时"""
+    from metrics import Metrics
+    registry = Metrics()
+    counter = registry.counter('bench_total', 'benchmark')
+    histogram = registry.histogram('bench_seconds', 'benchmark')
+    start = time.perf_counter()
+    for _ in range(rounds):
+        counter.inc()
+    inc_ns = (time.perf_counter() - start) / rounds * 1e9
+    start = time.perf_counter()
+    for i in range(rounds):
+        histogram.observe(i * 1e-7)
+    observe_ns = (time.perf_counter() - start) / rounds * 1e9
+    start = time.perf_counter()
+    for _ in range(100):
+        registry.render()
+    return {
+        'counter_inc_ns': inc_ns,
+        'histogram_observe_ns': observe_ns,
+        'render_us': (time.perf_counter() - start) / 100 * 1e6,
+    }
+
+
+def simulated_stall(seconds):
+    """模拟在界面线程中阻塞的调用(如同步的 WMI 调用)"""
+    time.sleep(seconds)
+
+
+def bench_watchdog(stalls=5, stall_ms=300, threshold=100):
+    """卡顿检测：报告的时长误差、采样数和能否定位到阻塞的函数"""
+    import tempfile
+    from stall_watchdog import StallWatchdog
+    app = qt_app()
+    with tempfile.TemporaryDirectory() as directory:
+        watchdog = StallWatchdog(os.path.join(directory, 'stalls.jsonl'), threshold)
+        watchdog.start()
+        errors = []
+        samples = []
+        attributed = 0
+        for i in range(stalls):
+            wait_until(app, lambda: False, timeout=0.3)  # 让看门狗先完成一次正常的 ping
+            simulated_stall(stall_ms / 1000)
+            wait_until(app, lambda: watchdog.stall_count > i)
+            report = watchdog.last_report
+            errors.append(abs(report['duration_ms'] - stall_ms))
+            samples.append(report['samples'])
+            attributed += bool(report['hottest']) and report['hottest'][0][0].endswith('simulated_stall')
+        watchdog.stop()
+    return {
+        'duration_error_ms.max': max(errors),
+        'samples.median': statistics.median(samples),
+        'unattributed': stalls - attributed,
+    }
+
+
+def bench_auto_blackout(timeout=300, active_windows=5):
+    """无操作自动黑屏的定时器唤醒次数：一直空闲时每个空闲期 1 次，有操作时每个 timeout 最多 1 次"""
+    app, button, backend = create_button()
+    engine = button.auto_blackout
+    engine.timeout = timeout
+
+    # 一直无操作：只在到期时唤醒一次
+    backend.touch()
+    engine.wakeups = 0
+    start = time.perf_counter()
+    engine.arm()
+    wait_until(app, lambda: button.blackout.active, timeout=timeout / 1000 + 2, sleep=0.001)
+    idle_fire_ms = (time.perf_counter() - start) * 1000
+    idle_wakeups = engine.wakeups
+    button.toggle_black_screen()
+    wait_until(app, lambda: not button.blackout.active)
+
+    # 持续操作若干个 timeout，之后停止操作
+    engine.wakeups = 0
+    engine.arm()
+    until = time.perf_counter() + active_windows * timeout / 1000
+    while time.perf_counter() < until:
+        backend.touch()
+        wait_until(app, lambda: False, timeout=timeout / 6000)
+    active_wakeups = engine.wakeups
+    wait_until(app, lambda: button.blackout.active, timeout=timeout / 1000 + 2, sleep=0.001)
+    close_button(button)
+    return {
+        'idle.wakeups': idle_wakeups,
+        'idle.fire_error_ms': abs(idle_fire_ms - timeout),
+        'active.wakeups_per_window': active_wakeups / active_windows,
+        'blackouts_missed': int(not button.blackout.active),
+    }
+
+
+def bench_schedule(rules=300, days=7):
+    """定时黑屏：用假时钟推进一周，逐个事件与逐条规则直接计算的结果对比，并测量处理耗时"""
+    import random
+    from datetime import datetime
+    from blackout_schedule import DAYS, BlackoutScheduler, ScheduleRule
+    from platform_backend import FakeClock
+    app = qt_app()
+    rng = random.Random(25)
+
+    def clock_text(minutes):
+        minutes %= 24 * 60
+        return f'{minutes // 60}:{minutes % 60:02d}'
+
+    parsed = []
+    for _ in range(rules):
+        # 一周只有一两天、几分钟长的时段，重叠较少，进出时段的切换更多
+        begin = rng.randrange(24 * 60)
+        parsed.append(ScheduleRule(clock_text(begin), clock_text(begin + rng.randint(1, 30)),
+                                   rng.sample(DAYS, rng.randint(1, 2))))
+
+    def expected(clock):
+        now = datetime.fromtimestamp(clock.time())
+        return any(rule.window(now)[0] is not None for rule in parsed)
+
+    clock = FakeClock(datetime(2026, 3, 2, 0, 0).timestamp())
+    scheduler = BlackoutScheduler(clock=clock.time, monotonic=clock.monotonic)
+    start = time.perf_counter()
+    scheduler.set_rules(parsed)
+    rebuild_ms = (time.perf_counter() - start) * 1000
+    end = clock.time() + days * 86400
+    mismatches = events = transitions = 0
+    elapsed = 0.0
+    scheduler.activeChanged.connect(lambda active: None)
+    while scheduler.next_deadline is not None and scheduler.next_deadline < end:
+        clock.advance(scheduler.next_deadline - clock.time())
+        was_active = scheduler.active
+        start = time.perf_counter()
+        scheduler.process()
+        elapsed += time.perf_counter() - start
+        events += 1
+        transitions += scheduler.active != was_active
+        mismatches += scheduler.active != expected(clock)
+
+    # 系统时间被改快 3 小时(单调时钟不变)：下一次到期时应重建并得到正确的状态
+    rebuilds = scheduler.rebuilds
+    clock.wall += 3 * 3600 + 17
+    scheduler.process()
+    clock_change_ok = scheduler.rebuilds == rebuilds + 1 and scheduler.active == expected(clock)
+    scheduler.stop()
+    return {
+        'rules': len(parsed),
+        'rebuild_ms': rebuild_ms,
+        'process_us': elapsed / max(events, 1) * 1e6,
+        'events': events,
+        'transitions': transitions,
+        'mismatches': mismatches,
+        'clock_change_failures': int(not clock_change_ok),
+    }
+
+
+def bench_wake(rounds=20):
+    """回放鼠标轨迹样本库，对比抖动过滤与“第一次移动就退出”
+
+    指标按轨迹来源分组：synthetic.* 来自脚本生成的轨迹(目前样本库中只有这些)，只说明检测逻辑在设计好的
+    场景下是否正确，不代表真实设备上的误唤醒率；recorded.* 来自用 --record-wake-trace 在真实设备上录制、
+    人工确认后加入样本库的轨迹。
+    """
+    from wake import WakeDetector, load_traces, replay
+    traces = load_traces(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wake_traces.jsonl'))
+    detector = WakeDetector()
+    results = {}
+    for source in ('synthetic', 'recorded'):
+        subset = [trace for trace in traces if trace.get('source', 'synthetic') == source]
+        if not subset:
+            continue
+        false_wakes = 0
+        missed_wakes = 0
+        legacy_false_wakes = 0
+        detect_ms = []
+        for trace in subset:
+            woke_at = replay(trace, detector)
+            if trace['expect'] == 'stay':
+                false_wakes += woke_at is not None
+                legacy_false_wakes += len(trace['events']) > 1  # 旧逻辑：第一次移动就退出
+            elif woke_at is None:
+                missed_wakes += 1
+            else:
+                detect_ms.append(woke_at - trace['events'][0][0])
+        results[f'{source}.traces'] = len(subset)
+        results[f'{source}.false_wakes'] = false_wakes
+        results[f'{source}.missed_wakes'] = missed_wakes
+        results[f'{source}.legacy_false_wakes'] = legacy_false_wakes
+        results[f'{source}.detect_ms.median'] = statistics.median(detect_ms) if detect_ms else 0.0
+    events = sum(len(trace['events']) for trace in traces)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for trace in traces:
+            replay(trace, detector)
+    results['feed_us'] = (time.perf_counter() - start) / (rounds * events) * 1e6
+    return results
+
+
+SUITES = {
+    'startup': bench_startup,
+    'theme': bench_theme,
+    'latency': bench_latency,
+    'poll': bench_poll,
+    'settings': bench_settings,
+    'idle': bench_idle,
+    'memory': bench_memory,
+    'wake': bench_wake,
+    'overlay': bench_overlay,
+    'hooks': bench_hooks,
+    'blur': bench_blur,
+    'metrics': bench_metrics,
+    'watchdog': bench_watchdog,
+    'auto_blackout': bench_auto_blackout,
+    'schedule': bench_schedule,
+}
+
+LOWER = 'lower'  # 越小越好
+HIGHER = 'higher'  # 越大越好
+INFO = 'info'  # 描述测试的工作量，不比较
+
+# 各项目的指标方向，按顺序用 fnmatch 模式匹配指标名，新增指标时需要在这里登记
+DIRECTIONS = {
+    'startup': [('*_ms', LOWER), ('*.rss_kb', LOWER)],
+    'theme': [('*_us', LOWER)],
+    'latency': [('*_ms.*', LOWER)],
+    'poll': [('poll_tick_us', LOWER)],
+    'settings': [('*_ms', LOWER), ('*_us', LOWER)],
+    'idle': [('*_per_min', LOWER)],
+    'memory': [('rss_*_kb', LOWER), ('rss_growth_kb', LOWER)],
+    'wake': [('*.traces', INFO), ('*.legacy_false_wakes', INFO), ('*.false_wakes', LOWER),
+             ('*.missed_wakes', LOWER), ('*.detect_ms.*', LOWER), ('feed_us', LOWER)],
+    'overlay': [('*_us', LOWER), ('*.paints_per_show', LOWER), ('*.exposes_per_show', LOWER),
+                ('*.events_per_show', LOWER), ('*.idle_events_per_min', LOWER)],
+    'hooks': [('*_ms.*', LOWER), ('*_ms', LOWER), ('*.failures', LOWER), ('*.timeouts', LOWER)],
+    'blur': [('*_ms', LOWER)],
+    'metrics': [('*_ns', LOWER), ('*_us', LOWER)],
+    'watchdog': [('duration_error_ms.*', LOWER), ('samples.*', HIGHER), ('unattributed', LOWER)],
+    'auto_blackout': [('*wakeups*', LOWER), ('*_error_ms', LOWER), ('blackouts_missed', LOWER)],
+    'schedule': [('rules', INFO), ('events', INFO), ('transitions', INFO), ('*_ms', LOWER),
+                 ('*_us', LOWER), ('mismatches', LOWER), ('clock_change_failures', LOWER)],
+}
+
+
+def direction(suite, name):
+    """指标的方向，没有登记时返回 None"""
+    for pattern, value in DIRECTIONS.get(suite, ()):
+        if fnmatch.fnmatchcase(name, pattern):
+            return value
+    return None
+
+
+def environment():
+    from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'platform': platform.platform(),
+        'qpa': os.environ.get('QT_QPA_PLATFORM'),
+    }
+
+
+def compare(results, baseline, threshold):
+    """与之前的结果对比，返回退化超过阈值的指标
+
+    基准值为 0 时无法计算比例：越小越好的指标从 0 变为非 0 即视为退化。
+    """
+    regressions = []
+    for suite, metrics in results['results'].items():
+        for name, value in metrics.items():
+            old = baseline.get('results', {}).get(suite, {}).get(name)
+            if not isinstance(old, (int, float)):
+                continue
+            better = direction(suite, name)
+            if better is None:
+                print(f"{suite}.{name}: 未在 DIRECTIONS 中登记方向，不比较")
+                continue
+            if better == INFO:
+                print(f"{suite}.{name}: {old:.2f} -> {value:.2f}")
+                continue
+            if old:
+                change = (value - old) / abs(old)
+                text = f'{change:+.1%}'
+            else:
+                change = float('inf') if value > 0 else float('-inf') if value < 0 else 0.0
+                text = '新出现' if value else '+0.0%'
+            if better == HIGHER:
+                change = -change
+            marker = ''
+            if change > threshold:
+                marker = '  <-- 退化'
+                regressions.append(f'{suite}.{name}')
+            print(f"{suite}.{name}: {old:.2f} -> {value:.2f} ({text}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BlackAny 性能基准测试')
+    parser.add_argument('suites', nargs='*', help=f"要运行的项目({', '.join(SUITES)})，默认全部")
+    parser.add_argument('-o', '--output', default='benchmark.json', help='结果 JSON 文件')
+    parser.add_argument('--compare', metavar='JSON', help='与之前的结果文件对比')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='对比时超过多少比例视为退化(默认 0.2)')
+    parser.add_argument('--child-startup', choices=['lazy', 'eager'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_startup:
+        # 子进程：只输出一行 JSON
+        print(json.dumps(run_startup(args.child_startup == 'eager')))
+        return 0
+
+    suites = args.suites or list(SUITES)
+    unknown = [name for name in suites if name not in SUITES]
+    if unknown:
+        parser.error(f"未知的项目: {', '.join(unknown)}")
+    results = {'environment': environment(), 'results': {}}
+    for name in suites:
+        start = time.perf_counter()
+        results['results'][name] = SUITES[name]()
+        print(f"[{name}] {time.perf_counter() - start:.1f}s")
+        for metric, value in results['results'][name].items():
+            print(f"    {metric}: {value:.2f}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"性能退化: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+from collections import Counter
+
+# 黑屏状态
+IDLE = 'idle'  # 正常显示
+BLANKING = 'blanking'  # 已显示黑屏，等待降低亮度
+BLANKED = 'blanked'  # 黑屏且亮度已降低(或不需要降低)
+RESTORING = 'restoring'  # 已隐藏黑屏，等待亮度恢复完成
+
+
+class BlackoutStateMachine:
+    """黑屏状态机：idle -> blanking -> blanked -> restoring -> idle
+
+    所有入口(悬浮按钮、快捷键、托盘、鼠标移动退出)都通过这里切换黑屏。
+    延迟降低亮度只用一个可取消的定时器，在 blanking 阶段恢复时直接取消，
+    不会再出现“恢复后又被调暗、原亮度被记成 0”的问题；
+    快速连续切换时只执行必要的窗口和亮度操作。
+
+    timer 需要提供 start(ms) 和 stop()，超时后由调用方转发到 on_timeout，
+    这样状态机本身不依赖 Qt，可以在无界面环境中驱动。
+    """
+
+    DIM_DELAY = 500  # 显示黑屏后延迟降低亮度(ms)
+
+    def __init__(self, timer, show_overlay, hide_overlay, dim_brightness, restore_brightness,
+                 on_state_changed=None, on_begin=None, dim_delay=DIM_DELAY):
+        self.state = IDLE
+        self.dim_delay = dim_delay
+        self.brightness_dimmed = False  # 亮度是否已被本状态机降低
+        self.stats = Counter()  # 每种操作的执行次数
+        self._timer = timer
+        self._show_overlay = show_overlay
+        self._hide_overlay = hide_overlay
+        self._dim_brightness = dim_brightness
+        self._restore_brightness = restore_brightness
+        self._on_state_changed = on_state_changed
+        self._on_begin = on_begin  # 真正开始黑屏('blank')或恢复('restore')之前调用
+
+    @property
+    def active(self):
+        """黑屏是否正在显示"""
+        return self.state in (BLANKING, BLANKED)
+
+    def toggle(self, screen=None, dim=True):
+        if self.active:
+            self.restore()
+        else:
+            self.blank(screen, dim)
+
+    def blank(self, screen=None, dim=True):
+        """显示黑屏，dim 为 True 时延迟降低亮度"""
+        if self.active:
+            return
+        if self._on_begin is not None:
+            self._on_begin('blank')
+        self._run('show', self._show_overlay, screen)
+        if dim:
+            self._timer.start(self.dim_delay)
+            self._set_state(BLANKING)
+        else:
+            self._set_state(BLANKED)
+
+    def on_timeout(self):
+        """延迟降低亮度的定时器到期"""
+        if self.state != BLANKING:
+            return
+        self.brightness_dimmed = True
+        self._run('dim', self._dim_brightness)
+        self._set_state(BLANKED)
+
+    def restore(self):
+        """隐藏黑屏，只有亮度确实被降低过才恢复亮度"""
+        if not self.active:
+            return
+        if self._on_begin is not None:
+            self._on_begin('restore')
+        self._timer.stop()  # 取消尚未执行的降低亮度
+        self._run('hide', self._hide_overlay)
+        if self.brightness_dimmed:
+            self.brightness_dimmed = False
+            self._run('restore', self._restore_brightness)
+            self._set_state(RESTORING)
+        else:
+            self._set_state(IDLE)
+
+    def brightness_restored(self):
+        """亮度线程确认亮度已恢复"""
+        if self.state == RESTORING:
+            self._set_state(IDLE)
+
+    def _run(self, name, action, *args):
+        self.stats[name] += 1
+        action(*args)
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if self._on_state_changed is not None:
+            self._on_state_changed(state)
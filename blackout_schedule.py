@@ -0,0 +1,175 @@
+import heapq
+import math
+import time
+from datetime import datetime, timedelta
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+START = 'start'
+END = 'end'
+
+
+def _parse_time(text):
+    hour, minute = text.split(':')
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"无效的时间: {text}")
+    return hour * 60 + minute
+
+
+class ScheduleRule:
+    """每周重复的黑屏时段：{"start": "12:00", "end": "13:00", "days": ["mon", ...], "name": "午休"}
+
+    days 省略时每天生效；end 早于 start 时跨过午夜，按 start 所在的那天算。时间都是本地时间，
+    与当前时间按实际时刻比较：夏令时跳过的时间顺延到切换之后，重复的时间只在第一次生效。
+    """
+    __slots__ = ('name', 'days', 'start', 'duration')
+
+    def __init__(self, start, end, days=DAYS, name=''):
+        self.name = name
+        self.days = frozenset(DAYS.index(day) for day in days)  # 0 为周一
+        self.start = _parse_time(start)  # 当天的分钟数
+        self.duration = (_parse_time(end) - self.start) % (24 * 60)  # 分钟
+        if not self.duration:
+            raise ValueError("开始和结束时间相同")
+        if not self.days:
+            raise ValueError("没有生效的日期")
+
+    @classmethod
+    def parse(cls, raw):
+        """从设置中的 dict 创建，格式不对时抛出 ValueError"""
+        try:
+            return cls(raw['start'], raw['end'], raw.get('days', DAYS), raw.get('name', ''))
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"无效的时段: {raw!r}") from e
+
+    def window(self, now):
+        """(正在进行的时段的结束时间或 None, 下一次开始的时间)，参数和返回值都是本地时间"""
+        today = datetime(now.year, now.month, now.day)
+        current = now.timestamp()
+        active_end = None
+        # 前一天开始的时段可能跨过午夜还没结束
+        for offset in range(-1, 8):
+            day = today + timedelta(days=offset)
+            if day.weekday() not in self.days:
+                continue
+            start = day + timedelta(minutes=self.start)
+            if start.timestamp() > current:
+                return active_end, start
+            end = start + timedelta(minutes=self.duration)
+            if end.timestamp() > current:
+                active_end = end
+        raise AssertionError("一周内一定有下一次开始")  # days 不为空
+
+
+class BlackoutScheduler(QObject):
+    """按时段自动黑屏
+
+    各规则下一次的开始/结束时间放在一个最小堆中，只为最早的那个启动一个 QTimer；
+    到期时弹出所有已到期的事件并压入该规则的下一个事件，每个事件 O(log n)，与规则数量基本无关。
+    多个时段重叠时，从第一个开始到最后一个结束都算在时段内。
+
+    QTimer 按单调时钟计时，修改系统时间或休眠唤醒后会与墙上时钟偏离：
+    定时器最长 CHECK_INTERVAL 到期一次，每次到期都比较两个时钟走过的时间，偏离时按当前时间重建堆。
+    clock/monotonic 可以替换，测试中直接调用 process() 推进。
+    """
+    activeChanged = pyqtSignal(bool)
+
+    CHECK_INTERVAL = 10 * 60 * 1000  # 定时器的最长间隔(ms)
+    DRIFT_TOLERANCE = 2.0  # 墙上时钟与单调时钟走过的时间相差超过这么多秒时重建(s)
+
+    def __init__(self, parent=None, clock=time.time, monotonic=time.monotonic):
+        super().__init__(parent)
+        self.rules = []
+        self.active = False
+        self.rebuilds = 0
+        self._clock = clock
+        self._monotonic = monotonic
+        self._heap = []  # (时间戳, 序号, START/END, 规则序号)
+        self._seq = 0
+        self._active_rules = set()  # 正在进行中的规则序号
+        self._armed_wall = None
+        self._armed_mono = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self.process)
+
+    @property
+    def next_deadline(self):
+        """下一个事件的时间戳，没有规则时为 None"""
+        return self._heap[0][0] if self._heap else None
+
+    def set_rules(self, rules):
+        self.rules = list(rules)
+        self.rebuild()
+
+    def rebuild(self):
+        """按当前时间重新计算所有规则(修改规则、系统时间变化时)"""
+        self.rebuilds += 1
+        now = datetime.fromtimestamp(self._clock())
+        self._heap = []
+        self._active_rules = set()
+        for index, rule in enumerate(self.rules):
+            active_end, next_start = rule.window(now)
+            if active_end is not None:
+                self._active_rules.add(index)
+                self._push(active_end, END, index)
+            self._push(next_start, START, index)
+        heapq.heapify(self._heap)
+        self._set_active(bool(self._active_rules))
+        self._arm()
+
+    def process(self):
+        """处理所有已到期的事件并重新启动定时器"""
+        if self._drifted():
+            self.rebuild()
+            return
+        now = self._clock()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, _, kind, index = heapq.heappop(heap)
+            rule = self.rules[index]
+            start = datetime.fromtimestamp(deadline)
+            if kind == START:
+                self._active_rules.add(index)
+                self._push(start + timedelta(minutes=rule.duration), END, index, heap)
+                self._push(rule.window(start)[1], START, index, heap)
+            else:
+                self._active_rules.discard(index)
+        self._set_active(bool(self._active_rules))
+        self._arm()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _push(self, when, kind, index, heap=None):
+        self._seq += 1
+        entry = (when.timestamp(), self._seq, kind, index)
+        if heap is None:
+            self._heap.append(entry)  # rebuild 最后统一 heapify
+        else:
+            heapq.heappush(heap, entry)
+
+    def _drifted(self):
+        if self._armed_wall is None:
+            return False
+        wall = self._clock() - self._armed_wall
+        mono = self._monotonic() - self._armed_mono
+        return abs(wall - mono) > self.DRIFT_TOLERANCE
+
+    def _arm(self):
+        self._armed_wall = self._clock()
+        self._armed_mono = self._monotonic()
+        if not self._heap:
+            self._timer.stop()
+            return
+        remaining = (self._heap[0][0] - self._armed_wall) * 1000
+        # 向上取整，避免提前不到 1ms 到期时什么都没处理又要再唤醒一次
+        self._timer.start(math.ceil(min(max(remaining, 0), self.CHECK_INTERVAL)))
+
+    def _set_active(self, active):
+        if active != self.active:
+            self.active = active
+            self.activeChanged.emit(active)
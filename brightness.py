@@ -0,0 +1,486 @@
+import json
+import os
+import queue
+import threading
+import time
+from PyQt5.QtCore import QEasingCurve, QObject, pyqtSignal
+from metrics import metrics
+from tracing import tracer
+
+# 以下指标只在亮度线程中更新
+READ_SECONDS = metrics.histogram('blackany_brightness_read_seconds', '读取所有显示器亮度的耗时')
+WRITE_SECONDS = metrics.histogram('blackany_brightness_write_seconds', '写入一次亮度(所有显示器并行)的耗时')
+READ_FAILURES = metrics.counter('blackany_brightness_read_failures_total', '读取亮度失败的次数')
+WRITE_FAILURES = metrics.counter('blackany_brightness_write_failures_total',
+                                 '写入单个显示器亮度失败或超时的次数')
+
+
+class BrightnessJournal:
+    """黑屏前的亮度快照日志
+
+    降低亮度前写入，恢复完成后删除；程序崩溃时文件会留下来，下次启动据此恢复亮度。
+    写入先写临时文件再改名，不会留下写了一半的日志。
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, levels):
+        tmp_path = self.path + '.tmp'
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump({'levels': levels, 'time': time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """读取上次未完成的快照，没有时返回 None"""
+        try:
+            with open(self.path, 'r') as f:
+                levels = json.load(f).get('levels')
+            if not isinstance(levels, dict):
+                return None
+            return {str(name): int(level) for name, level in levels.items()}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"读取亮度日志失败: {e}")
+            return None
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class MonitorWriter:
+    """逐显示器并行写入亮度的小线程池
+
+    每个线程各自打开亮度会话(WMI 会话不能跨线程使用)。每次写入都有超时，
+    慢的或卡死的显示器不会拖住其他显示器；写入尚未返回的显示器在返回之前会被跳过，
+    不会让卡死的显示器占满整个线程池。
+    """
+
+    def __init__(self, platform, size):
+        self.platform = platform
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._busy = set()  # 写入尚未返回的显示器
+        self._threads = []
+        for i in range(size):
+            thread = threading.Thread(target=self._worker, name=f'brightness-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def write(self, levels, timeout):
+        """并行写入 {显示器: 亮度}，返回 (成功写入的 {显示器: 亮度}, {显示器: 错误信息})"""
+        results = queue.Queue()
+        pending = set()
+        with self._lock:
+            for name, value in levels.items():
+                if name in self._busy:
+                    continue  # 上一次写入还没返回，超时已经报告过
+                self._busy.add(name)
+                pending.add(name)
+                self._tasks.put((name, value, results))
+        written = {}
+        errors = {}
+        deadline = time.perf_counter() + timeout
+        while pending:
+            try:
+                name, value, error = results.get(timeout=max(0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            pending.discard(name)
+            if error is None:
+                written[name] = value
+            else:
+                errors[name] = str(error)
+        for name in pending:
+            errors[name] = '超时'
+        return written, errors
+
+    def close(self):
+        for _ in self._threads:
+            self._tasks.put(None)
+
+    def _worker(self):
+        session = None
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            name, value, results = task
+            error = None
+            try:
+                if session is None:
+                    session = self.platform.open_brightness()
+                session.write(name, value)
+            except Exception as e:
+                error = e
+                session = self._close(session)  # 会话失效时丢弃，下次重新连接
+            with self._lock:
+                self._busy.discard(name)
+            results.put((name, value, error))
+        self._close(session)
+
+    @staticmethod
+    def _close(session):
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+        return None
+
+
+class BrightnessController(QObject):
+    """亮度控制器
+
+    亮度读写(Windows 上是 WMI 调用)全部放在独立的工作线程中执行，GUI 线程只负责投递命令。
+    工作线程通过平台后端打开自己的亮度会话(WMI 会话会缓存显示器方法对象)；
+    一次取出队列中积压的所有命令合并处理(黑屏后立即恢复会互相抵消)，
+    缓存的亮度与目标一致时跳过写入。结果通过信号回到 GUI 线程。
+
+    降低和恢复亮度沿缓动曲线渐变，步数由实测的单次写入耗时决定，不会积压硬件来不及处理的写入；
+    渐变过程中收到新命令立即中止，从当前亮度开始处理新命令。
+
+    每个显示器的亮度单独记录(以实例名区分)，黑屏前的快照写入日志文件，
+    恢复时各显示器并行写入各自的原亮度。只有确认写回原亮度的显示器才从快照和日志中移除，
+    写入失败或超时的显示器每隔 RESTORE_RETRY_INTERVAL 重试，最多 RESTORE_RETRIES 次。
+    """
+    levelChanged = pyqtSignal(int)  # 写入或读取到的当前亮度(各显示器中最高的)
+    originalSaved = pyqtSignal(object)  # 黑屏前保存的 {显示器: 亮度}，恢复后为 None
+    restored = pyqtSignal()  # 恢复命令已处理完毕(无论是否需要写入)
+    recovered = pyqtSignal(object)  # 启动时按日志恢复了上次异常退出前的亮度
+    sessionReady = pyqtSignal(float)  # 预先建立会话完成(无论成功与否)，参数为耗时 ms
+    failed = pyqtSignal(str)
+
+    FADE_DURATION = 300  # 默认渐变时长(ms)，0 表示直接跳变
+    MIN_STEP_INTERVAL = 16  # 两次写入之间至少间隔(ms)
+    WRITE_TIMEOUT = 1.0  # 单个显示器写入的超时(s)
+    POOL_SIZE = 4  # 并行写入的线程数
+    RESTORE_RETRY_INTERVAL = 2.0  # 恢复失败的显示器重试的间隔(s)
+    RESTORE_RETRIES = 5  # 每次恢复命令之后最多重试的次数
+    RECOVER_RETRIES = 30  # 启动时按日志恢复失败后最多重试的次数(间隔同上)，登录时亮度接口常常还没准备好
+
+    def __init__(self, platform, parent=None, journal_path=None):
+        super().__init__(parent)
+        self.platform = platform
+        self.dimmed = False  # GUI 线程请求的状态，用于切换
+        self.fade_duration = self.FADE_DURATION
+        self._queue = queue.Queue()
+        self._wakeup = threading.Event()  # 有新命令时置位，用于中止渐变
+        self._easing = QEasingCurve(QEasingCurve.InOutQuad)
+        self._journal = BrightnessJournal(journal_path) if journal_path else None
+        # 以下只在工作线程中使用
+        self._session = None  # 读取用的会话，写入由 _writer 的线程各自完成
+        self._writer = None
+        self._levels = {}  # 最近一次读取或写入的 {显示器: 亮度}
+        self._saved = None  # 黑屏前的亮度快照，各显示器确认恢复后才从中移除
+        self._partial = False  # _saved 中只剩恢复失败的显示器
+        self._retries_left = 0  # 恢复失败的显示器还可以自动重试的次数
+        self._blacked = False  # 最近一批命令归并后是否处于黑屏
+        self._restore_pending = False  # 恢复命令尚未完成(渐变被打断)
+        self._target = None  # 尚未应用的 set 命令
+        self._write_cost = None  # 单次(所有显示器并行)写入耗时的滑动平均(ms)
+        self._recover_checked = False
+        self._recover_retries_left = 0  # 按日志恢复还可以自动重试的次数
+        self._thread = threading.Thread(target=self._run, name='brightness', daemon=True)
+        self._thread.start()
+
+    def blackout(self):
+        """保存当前亮度并降到 0"""
+        self.dimmed = True
+        self._post('blackout')
+
+    def restore(self):
+        """恢复黑屏前的亮度"""
+        self.dimmed = False
+        self._post('restore')
+
+    def warm_up(self):
+        """提前在工作线程中建立亮度会话，避免第一次黑屏时才连接 WMI；同时检查崩溃日志"""
+        self._post('connect')
+
+    def set_level(self, value):
+        """把所有显示器直接设为同一亮度，不渐变"""
+        self._post('set', value)
+
+    @property
+    def level(self):
+        levels = self._levels
+        return max(levels.values()) if levels else None
+
+    @property
+    def levels(self):
+        """最近一次读取或写入的各显示器亮度"""
+        return dict(self._levels)
+
+    @property
+    def write_cost(self):
+        """实测的单次写入耗时(ms)，尚未写入过时为 None"""
+        return self._write_cost
+
+    def stop(self):
+        self._post('stop')
+        self._thread.join(timeout=2)
+
+    def _post(self, command, value=None):
+        self._queue.put((command, value))
+        self._wakeup.set()
+
+    def _run(self):
+        try:
+            while True:
+                # 有恢复失败的显示器时定时醒来重试，没有新命令时以空的一批命令重新处理恢复
+                retrying = self._retries_left or self._recover_retries_left
+                timeout = self.RESTORE_RETRY_INTERVAL if retrying else None
+                try:
+                    commands = [self._queue.get(timeout=timeout)]
+                except queue.Empty:
+                    if self._retries_left:
+                        self._retries_left -= 1
+                    if self._recover_retries_left:
+                        self._recover_retries_left -= 1
+                        self._recover()
+                    commands = []
+                # 先清除唤醒标志再取积压的命令，之后到达的命令会打断本批的渐变
+                self._wakeup.clear()
+                while True:
+                    try:
+                        commands.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not self._apply(commands):
+                    break
+        finally:
+            self._close_session()
+            if self._writer is not None:
+                self._writer.close()
+
+    def _apply(self, commands):
+        """把一批命令归并为最终状态后只执行必要的读写，返回 False 表示退出
+
+        渐变被新命令打断时保留未完成的状态(原亮度、待确认的恢复、set 目标)，由下一批继续处理。
+        """
+        blacked = self._blacked
+        running = True
+        for command, value in commands:
+            if command == 'connect':
+                self._warm_up()
+            elif command == 'blackout':
+                blacked = True
+                self._restore_pending = False
+                self._retries_left = 0
+            elif command == 'restore':
+                blacked = False
+                self._restore_pending = True
+                self._retries_left = self.RESTORE_RETRIES
+            elif command == 'set':
+                self._target = value
+            elif command == 'stop':
+                running = False
+                blacked = False  # 退出前恢复亮度
+        self._blacked = blacked
+        instant = not running  # 退出时不渐变
+
+        done = True
+        if blacked:
+            if self._saved is None or self._partial:
+                saved = self._read()
+                if saved:
+                    # 上次没有恢复成功的显示器保留原来的亮度，而不是现在的低亮度
+                    saved.update(self._saved or {})
+                    self._saved = saved
+                    self._partial = False
+                    self._save_journal(saved)
+                    self.originalSaved.emit(dict(saved))
+            if self._saved is not None:
+                done = self._fade({name: 0 for name in self._saved}, instant)
+        elif self._saved is not None:
+            done = self._fade(self._saved, instant)
+            if done:
+                self._confirm_restored()
+        if not done:
+            return running  # 被新命令打断，剩下的交给下一批
+        if self._target is not None and not blacked:
+            if not self._levels:
+                self._read()
+            self._write({name: self._target for name in self._levels})
+            self._target = None
+        if self._restore_pending and not blacked:
+            self._restore_pending = False
+            if tracer.enabled:
+                tracer.record('brightness_restored')
+            self.restored.emit()
+        return running
+
+    def _fade(self, targets, instant=False):
+        """沿缓动曲线把各显示器从当前亮度渐变到 targets，被新命令打断时返回 False，亮度停在中间值"""
+        starts = {name: self._levels.get(name, target) for name, target in targets.items()}
+        span = max((abs(targets[name] - starts[name]) for name in targets), default=0)
+        duration = 0 if instant else self.fade_duration
+        if span == 0 or duration <= 0:
+            self._write(targets)
+            return True
+        # 每一步至少占用一次写入的时间，步数不超过亮度差
+        step_ms = max(self._write_cost or 0, self.MIN_STEP_INTERVAL)
+        steps = max(1, min(span, int(duration / step_ms)))
+        interval = duration / steps / 1000
+        for i in range(1, steps + 1):
+            step_start = time.perf_counter()
+            progress = self._easing.valueForProgress(i / steps)
+            step = {name: round(starts[name] + (targets[name] - starts[name]) * progress)
+                    for name in targets}
+            if not self._write(step):
+                return True  # 写入全部失败，放弃渐变，与直接写入失败的处理一致
+            if i == steps:
+                break
+            remaining = interval - (time.perf_counter() - step_start)
+            if self._wakeup.wait(max(0, remaining)):
+                if tracer.enabled:
+                    tracer.record('brightness_fade_canceled', levels=dict(self._levels))
+                return False
+        return True
+
+    def _confirm_restored(self):
+        """把确认已写回原亮度的显示器从快照和日志中移除，剩下的留待重试"""
+        remaining = {name: level for name, level in self._saved.items()
+                     if self._levels.get(name) != level}
+        if not remaining:
+            self._saved = None
+            self._partial = False
+            self._retries_left = 0
+            self._clear_journal()
+            self.originalSaved.emit(None)
+            return
+        if remaining != self._saved:
+            self._saved = remaining
+            self._partial = True
+            self._save_journal(remaining)
+            self.originalSaved.emit(dict(remaining))
+        if not self._retries_left:
+            # 不再自动重试，快照和日志保留到下一次恢复命令或下次启动
+            self.failed.emit(f"恢复亮度失败: {', '.join(remaining)}")
+
+    def _connect(self):
+        if self._session is None:
+            self._session = self.platform.open_brightness()
+        return self._session
+
+    def _warm_up(self):
+        start = time.perf_counter()
+        try:
+            self._connect()
+        except Exception as e:
+            self.failed.emit(f"连接亮度接口失败: {e}")
+        self.sessionReady.emit((time.perf_counter() - start) * 1000)
+        if not self._recover_checked:
+            self._recover_checked = True
+            self._recover_retries_left = self.RECOVER_RETRIES
+            self._recover()
+
+    def _recover(self):
+        """上次黑屏期间程序异常退出时，按日志恢复各显示器的亮度
+
+        读取亮度失败、日志中的显示器都还没有接上或有显示器没有写入成功时保留日志，
+        稍后自动重试，重试用完后留给下次启动；全部写入成功后才删除日志。
+        """
+        if self._journal is None or self._blacked or self._saved is not None:
+            return
+        saved = self._journal.load()
+        if not saved:
+            self._recover_retries_left = 0
+            return
+        if not saved.keys() <= self._levels.keys():
+            self._read()  # 失败时 _levels 不变
+        if not self._levels:
+            return
+        # 只恢复仍然接着的显示器
+        saved = {name: level for name, level in saved.items() if name in self._levels}
+        if not saved:
+            return
+        self._write(saved)
+        if any(self._levels.get(name) != level for name, level in saved.items()):
+            return
+        self._recover_retries_left = 0
+        self._clear_journal()
+        self.recovered.emit(saved)
+
+    def _save_journal(self, levels):
+        if self._journal is None:
+            return
+        try:
+            self._journal.save(levels)
+        except OSError as e:
+            self.failed.emit(f"写入亮度日志失败: {e}")
+
+    def _clear_journal(self):
+        if self._journal is None:
+            return
+        try:
+            self._journal.clear()
+        except OSError as e:
+            self.failed.emit(f"删除亮度日志失败: {e}")
+
+    def _close_session(self):
+        # 会话失效时丢弃，下次重新连接
+        if self._session is not None:
+            try:
+                self._session.close()
+            except Exception:
+                pass
+            self._session = None
+
+    def _read(self):
+        """读取所有显示器的亮度，返回 {显示器: 亮度}，失败时返回 None"""
+        start = time.perf_counter()
+        try:
+            levels = self._connect().read()
+            READ_SECONDS.observe(time.perf_counter() - start)
+            if levels:
+                self._levels = dict(levels)
+                self.levelChanged.emit(self.level)
+                if tracer.enabled:
+                    tracer.record('brightness_read', levels=dict(levels))
+            return levels
+        except Exception as e:
+            READ_FAILURES.inc()
+            self._close_session()
+            self.failed.emit(f"获取亮度失败: {e}")
+        return None
+
+    def _write(self, levels):
+        """并行写入各显示器的亮度，至少有一个成功(或无需写入)时返回 True"""
+        changed = {name: value for name, value in levels.items() if self._levels.get(name) != value}
+        if not changed:
+            return True  # 亮度未变化，跳过写入
+        if self._writer is None:
+            size = min(self.POOL_SIZE, max(len(self._levels), len(changed)))
+            self._writer = MonitorWriter(self.platform, size)
+        start = time.perf_counter()
+        written, errors = self._writer.write(changed, self.WRITE_TIMEOUT)
+        elapsed = time.perf_counter() - start
+        WRITE_SECONDS.observe(elapsed)
+        if errors:
+            WRITE_FAILURES.inc(len(errors))
+        else:
+            # 超时的那次不计入，避免卡死的显示器把渐变步数压得过低
+            cost = elapsed * 1000
+            if self._write_cost is None:
+                self._write_cost = cost
+            else:
+                self._write_cost = self._write_cost * 0.8 + cost * 0.2
+        for name, error in errors.items():
+            # 超时的写入之后仍可能生效，丢弃缓存的亮度，下次一定重新写入
+            self._levels.pop(name, None)
+            self.failed.emit(f"设置显示器 {name} 亮度失败: {error}")
+        if written:
+            self._levels.update(written)
+            self.levelChanged.emit(self.level)
+            if tracer.enabled:
+                tracer.record('brightness_written', levels=written)
+        return bool(written)
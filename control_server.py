@@ -0,0 +1,67 @@
+import json
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer
+from ipc import TIMEOUT, send_command
+
+
+class ControlServer(QObject):
+    """单实例控制服务端
+
+    在 GUI 线程中监听本地端点，每收到一行命令就调用 handler(command)，把返回的 dict 作为一行 JSON 回复。
+    监听前先确认端点上是否还有实例在运行，只有确定没有时才清理残留的套接字。
+    """
+    PING_TIMEOUT = TIMEOUT  # 等待已有实例回复的超时(s)
+    PING_RETRIES = 3  # 已有实例没有按时回复(正忙)时重新确认的次数
+
+    def __init__(self, endpoint, handler, parent=None):
+        super().__init__(parent)
+        self.endpoint = endpoint
+        self.handler = handler
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._accept)
+
+    def listen(self):
+        """开始监听，已有实例在运行时返回 False"""
+        if self._running():
+            return False
+        # 上次异常退出留下的套接字
+        QLocalServer.removeServer(self.endpoint)
+        if self._server.listen(self.endpoint):
+            return True
+        print(f"无法监听控制端点: {self._server.errorString()}")
+        return True  # 不影响正常使用，只是不能接收命令
+
+    def _running(self):
+        """端点上是否有实例在运行
+
+        必须在监听之前确认：Unix 上带 UserAccessOption 的 QLocalServer.listen 会直接替换已有的套接字文件。
+        只有连接被拒绝或套接字文件不存在时才是异常退出的残留；能连上但没有正常回复说明实例还活着
+        (可能正忙)，重试几次后仍然如此也当作在运行，不能删掉它的端点再启动第二个实例。
+        """
+        for attempt in range(self.PING_RETRIES):
+            try:
+                return send_command(self.endpoint, 'ping', self.PING_TIMEOUT) is not None
+            except (OSError, ValueError) as e:
+                error = e
+        print(f"已有实例在运行但没有回复，退出: {error}")
+        return True
+
+    def close(self):
+        self._server.close()
+
+    def _accept(self):
+        while self._server.hasPendingConnections():
+            connection = self._server.nextPendingConnection()
+            connection.readyRead.connect(lambda connection=connection: self._read(connection))
+            connection.disconnected.connect(connection.deleteLater)
+
+    def _read(self, connection):
+        while connection.canReadLine():
+            command = bytes(connection.readLine()).decode(errors='replace').strip()
+            try:
+                reply = self.handler(command)
+            except Exception as e:
+                reply = {'ok': False, 'error': f"执行命令失败: {e}"}
+            connection.write(json.dumps(reply, ensure_ascii=False).encode() + b'\n')
+            connection.flush()
@@ -0,0 +1,193 @@
+import queue
+import statistics
+import subprocess
+import threading
+import time
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from tracing import tracer
+
+
+class Hook:
+    """黑屏钩子：黑屏(blank)和恢复(restore)时在线程池中调用 on_blank()/on_restore()
+
+    同一个钩子的调用串行执行(恢复会等黑屏那次执行完)，可以在两次调用之间保存状态。
+    """
+
+    def __init__(self, name, on_blank=None, on_restore=None, timeout=2.0):
+        self.name = name
+        self.on_blank = on_blank
+        self.on_restore = on_restore
+        self.timeout = timeout  # 秒
+        self.lock = threading.Lock()
+
+
+class HookStats:
+    """单个钩子的调用次数、失败、超时和最近的耗时"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=200)  # ms
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        result = {'calls': self.calls, 'failures': self.failures, 'timeouts': self.timeouts}
+        if latencies:
+            result['median_ms'] = statistics.median(latencies)
+            result['p95_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            result['max_ms'] = latencies[-1]
+        return result
+
+
+class HookPipeline(QObject):
+    """黑屏/恢复时执行的钩子(静音、暂停媒体、锁屏、用户脚本……)
+
+    fire() 只把任务放进队列就返回，黑屏窗口的显示/隐藏从不等待钩子。
+    钩子在固定数量的后台线程中执行，每个钩子有自己的超时；失败和超时只影响这一个钩子，
+    通过 failed 信号报告，并计入各钩子的耗时统计。
+    Python 函数无法被强制中止，超时的钩子会继续占用一个线程直到返回，
+    运行外部程序的钩子应把超时传给 subprocess 以便结束进程。
+    """
+    failed = pyqtSignal(str)
+
+    WORKERS = 2
+
+    def __init__(self, workers=WORKERS, parent=None):
+        super().__init__(parent)
+        self.hooks = []
+        self.stats = {}  # 钩子名 -> HookStats
+        self._stats_lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._pending = 0  # 已排队或正在执行的调用数
+        self._tasks = queue.Queue()
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f'hooks-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def add(self, hook):
+        self.hooks.append(hook)
+        self.stats.setdefault(hook.name, HookStats())
+
+    def clear(self):
+        self.hooks = []
+
+    def fire(self, event):
+        """在后台执行所有钩子的 event 处理函数，立即返回"""
+        for hook in self.hooks:
+            func = getattr(hook, f'on_{event}')
+            if func is None:
+                continue
+            call = {'done': False, 'timed_out': False}
+            with self._idle:
+                self._pending += 1
+            self._tasks.put((hook, event, func, call))
+            # 超时后在 GUI 线程中检查，卡住的钩子也能及时报告
+            QTimer.singleShot(int(hook.timeout * 1000), lambda hook=hook, event=event, call=call:
+                              self._check_timeout(hook, event, call))
+
+    def summary(self):
+        """{钩子名: 统计}"""
+        with self._stats_lock:
+            return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def wait_idle(self, timeout):
+        """等待已排队的钩子执行完(退出程序前)，超时返回 False"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _worker(self):
+        while True:
+            hook, event, func, call = self._tasks.get()
+            start = time.perf_counter()
+            error = None
+            if hook.lock.acquire(timeout=hook.timeout):
+                try:
+                    func()
+                except Exception as e:
+                    error = e
+                finally:
+                    hook.lock.release()
+            else:
+                error = TimeoutError("上一次调用还没有结束")
+            elapsed = (time.perf_counter() - start) * 1000
+            call['done'] = True
+            self._record(hook, event, elapsed, error, call)
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def _record(self, hook, event, elapsed, error, call):
+        with self._stats_lock:
+            stats = self.stats.setdefault(hook.name, HookStats())
+            stats.calls += 1
+            stats.latencies.append(elapsed)
+            if error is not None:
+                stats.failures += 1
+            elif elapsed > hook.timeout * 1000 and not call['timed_out']:
+                stats.timeouts += 1
+        if tracer.enabled:
+            tracer.record('hook_done', hook=hook.name, event=event, ms=elapsed)
+        if error is not None:
+            self.failed.emit(f"钩子 {hook.name}({event}) 失败: {error}")
+
+    def _check_timeout(self, hook, event, call):
+        if call['done']:
+            return
+        call['timed_out'] = True
+        with self._stats_lock:
+            self.stats[hook.name].timeouts += 1
+        self.failed.emit(f"钩子 {hook.name}({event}) 超过 {hook.timeout:g}s 仍未完成")
+
+
+def script_hook(name, blank_command=None, restore_command=None, timeout=5.0):
+    """运行用户脚本的钩子，超时后结束进程"""
+    def runner(command):
+        if not command:
+            return None
+
+        def run():
+            result = subprocess.run(command, shell=True, timeout=timeout,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                message = result.stderr.decode(errors='replace').strip()
+                raise RuntimeError(f"退出码 {result.returncode}: {message}")
+        return run
+    # 进程在 subprocess 的超时处结束，留一点余量给钩子本身的超时
+    return Hook(name, runner(blank_command), runner(restore_command), timeout + 0.5)
+
+
+def mute_hook(platform, timeout=2.0):
+    """黑屏时静音，恢复时只在原来没有静音时取消静音"""
+    state = {'was_muted': None}
+
+    def on_blank():
+        state['was_muted'] = platform.set_muted(True)
+
+    def on_restore():
+        if state['was_muted'] is False:
+            platform.set_muted(False)
+        state['was_muted'] = None
+    return Hook('mute', on_blank, on_restore, timeout)
+
+
+def pause_media_hook(platform, timeout=2.0):
+    """黑屏时暂停正在播放的媒体，恢复时只继续被暂停的那些"""
+    state = {'paused': None}
+
+    def on_blank():
+        state['paused'] = platform.pause_media()
+
+    def on_restore():
+        if state['paused']:
+            platform.resume_media(state['paused'])
+        state['paused'] = None
+    return Hook('pause_media', on_blank, on_restore, timeout)
+
+
+def lock_hook(platform, timeout=2.0):
+    """黑屏时锁定系统"""
+    return Hook('lock', platform.lock_screen, None, timeout)
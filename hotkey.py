@@ -0,0 +1,222 @@
+import threading
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from tracing import tracer
+
+
+class ChordMatcher:
+    """组合键匹配器
+
+    设置加载时把每个绑定编译成位掩码：每个按键名占一位，每个扫描码映射到它所属按键的位。
+    每次按键事件只需把当前按下的扫描码对应的位或起来；只有按下了新的绑定键时才逐个检查组合键
+    (按键数从多到少，绑定只有几个)，松开和按住重复的事件只做位运算。
+
+    匹配规则：
+    - 组合键在它的最后一个键按下时触发，同时按着的其他键不影响(按住 shift 不会挡住 ctrl+b)；
+    - 同一次按键补齐了多个组合键时只触发键数最多的一个，它包含的较小组合键不触发
+      (ctrl+b 与 ctrl+shift+b 同时绑定时，按下 ctrl+shift+b 只触发后者)；
+    - 已触发的组合键按住不放期间不会重复触发，包含它的更大组合键也不会触发
+      (按住 ctrl+b 再按 shift 不会再触发 ctrl+shift+b)；它的任何一个键松开后解除锁定。
+    """
+
+    def __init__(self, scan_codes, bindings=None):
+        # scan_codes 把按键名解析为扫描码，由平台后端提供
+        self._scan_codes = scan_codes
+        self._code_bits = {}  # 扫描码 -> 位掩码
+        self._key_bits = {}  # 按键名 -> 位
+        self._chords = {}  # 组合键位掩码 -> 动作
+        self._by_size = []  # 按键数从多到少排列的组合键位掩码
+        self._pressed = {}  # 当前按下的扫描码 -> 位掩码
+        self._mask = 0  # 上一次事件后按下的位掩码
+        self._latched = {}  # 已触发、等待松开的动作 -> 组合键位掩码
+        self.unavailable = None  # 无法解析按键时(如 Linux 上没有 keyboard 库或没有 root 权限)的异常
+        self.compile(bindings or {})
+
+    def compile(self, bindings):
+        """编译 {动作: 'ctrl+alt+b'} 形式的绑定，无效的绑定会被跳过
+
+        整个键盘接口不可用时不再编译其他绑定，清空所有组合键并把异常记录在 unavailable 中。
+        """
+        self.unavailable = None
+        code_bits = {}
+        key_bits = {}
+        chords = {}
+        for action, shortcut in bindings.items():
+            keys = [key.strip() for key in shortcut.split('+') if key.strip()]
+            if not keys:
+                continue
+            mask = 0
+            try:
+                for key in keys:
+                    if key not in key_bits:
+                        codes = self._scan_codes(key)
+                        bit = 1 << len(key_bits)
+                        key_bits[key] = bit
+                        for code in codes:
+                            code_bits[code] = code_bits.get(code, 0) | bit
+                    mask |= key_bits[key]
+            except ValueError as e:
+                print(f"无效的快捷键 {action}: {e}")
+                continue
+            except (ImportError, OSError) as e:
+                self.unavailable = e
+                code_bits, key_bits, chords = {}, {}, {}
+                break
+            if mask in chords:
+                print(f"快捷键冲突: {action} 与 {chords[mask]}")
+                continue
+            chords[mask] = action
+        self._code_bits = code_bits
+        self._key_bits = key_bits
+        self._chords = chords
+        self._by_size = sorted(chords, key=lambda chord: bin(chord).count('1'), reverse=True)
+        self.reset()
+
+    def reset(self):
+        self._pressed.clear()
+        self._latched.clear()
+        self._mask = 0
+
+    @property
+    def keys(self):
+        """所有绑定用到的按键名及其位，供轮询后备方案使用"""
+        return self._key_bits
+
+    def key_down(self, scan_code):
+        """处理按下事件，返回需要触发的动作(没有则为 None)"""
+        self._pressed[scan_code] = self._code_bits.get(scan_code, 0)
+        return self._match()
+
+    def key_up(self, scan_code):
+        self._pressed.pop(scan_code, None)
+        return self._match()
+
+    def match_mask(self, mask):
+        """直接用按下的位掩码匹配(轮询模式)"""
+        return self._fire(mask)
+
+    def _match(self):
+        mask = 0
+        for bits in self._pressed.values():
+            mask |= bits
+        return self._fire(mask)
+
+    def _fire(self, mask):
+        previous, self._mask = self._mask, mask
+        # 组合键中任何一个键松开后才解除锁定
+        if self._latched:
+            for action, chord in list(self._latched.items()):
+                if chord & mask != chord:
+                    del self._latched[action]
+        if not mask & ~previous:
+            return None  # 没有按下新的绑定键
+        for chord in self._by_size:
+            if chord & mask != chord or chord & previous == chord:
+                continue  # 没有按全，或者这次事件之前就已经按全了
+            if any(chord & held == held for held in self._latched.values()):
+                continue  # 包含一个仍然按住的已触发组合键
+            action = self._chords[chord]
+            self._latched[action] = chord
+            return action
+        return None
+
+
+class HotkeyEngine(QObject):
+    """全局快捷键引擎
+
+    默认使用键盘钩子(hook)：后台钩子线程维护按下的键，只有绑定匹配时才向 GUI 线程发信号，
+    空闲时没有任何定时唤醒。轮询(poll)模式保留为可选的后备方案。
+    """
+    activated = pyqtSignal(str)
+
+    POLL_INTERVAL = 100  # 轮询模式下的检查间隔(ms)
+
+    def __init__(self, bindings, platform, backend='hook', parent=None):
+        super().__init__(parent)
+        self.platform = platform  # 平台后端，提供键盘钩子和扫描码
+        self.backend = backend
+        self.paused = False  # 正在记录快捷键时暂停匹配
+        self.disabled = False  # 键盘接口不可用时关闭全局快捷键，只提示一次
+        self._lock = threading.Lock()
+        self._matcher = ChordMatcher(platform.key_to_scan_codes)
+        self._hook = None
+        self._poll_timer = None
+        # 最近一次触发快捷键的按键事件时间(ns)，用于统计延迟；开启跟踪时还记录匹配时间
+        self.last_event_ns = 0
+        self.last_match_ns = 0
+        self.set_bindings(bindings)
+
+    def set_bindings(self, bindings):
+        """编译快捷键绑定，只在设置改变时执行一次"""
+        with self._lock:
+            self._matcher.compile(bindings)
+        if self._matcher.unavailable is not None:
+            self._disable(self._matcher.unavailable)
+
+    def start(self):
+        if self.disabled:
+            return
+        if self.backend == 'hook':
+            try:
+                self._hook = self.platform.hook_keys(self._on_key_event)
+                return
+            except (ImportError, OSError) as e:
+                # 轮询也要用同一个键盘接口，不再退回轮询
+                self._disable(e)
+                return
+            except Exception as e:
+                # 无法安装钩子时(如权限不足)退回轮询
+                print(f"安装键盘钩子失败，改用轮询: {e}")
+                self.backend = 'poll'
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self._poll)
+        self._poll_timer.start(self.POLL_INTERVAL)
+
+    def stop(self):
+        if self._hook is not None:
+            self.platform.unhook_keys(self._hook)
+            self._hook = None
+        if self._poll_timer is not None:
+            self._poll_timer.stop()
+            self._poll_timer = None
+
+    def _disable(self, error):
+        if self.disabled:
+            return
+        self.disabled = True
+        self.stop()
+        print(f"全局快捷键不可用，已关闭: {error}")
+
+    def _on_key_event(self, scan_code, is_down):
+        """在键盘钩子线程中运行，只做位运算，不触碰任何 Qt 控件"""
+        event_ns = time.perf_counter_ns()  # 用于统计快捷键到黑屏的延迟
+        with self._lock:
+            if is_down:
+                action = self._matcher.key_down(scan_code)
+            else:
+                action = self._matcher.key_up(scan_code)
+        if action and not self.paused:
+            self.last_event_ns = event_ns
+            if tracer.enabled:
+                self.last_match_ns = time.perf_counter_ns()
+            # 跨线程发射信号，Qt 自动排队到 GUI 线程执行
+            self.activated.emit(action)
+
+    def _poll(self):
+        """轮询后备方案：逐个查询绑定用到的按键"""
+        try:
+            if self.paused:
+                return
+            with self._lock:
+                mask = 0
+                for key, bit in self._matcher.keys.items():
+                    if self.platform.is_pressed(key):
+                        mask |= bit
+                action = self._matcher.match_mask(mask)
+            if action:
+                self.last_event_ns = time.perf_counter_ns()
+                self.activated.emit(action)
+        except (ImportError, OSError) as e:
+            self._disable(e)
+        except Exception as e:
+            print(f"检查快捷键失败: {e}")
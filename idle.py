@@ -0,0 +1,103 @@
+import time
+from PyQt5.QtCore import QCoreApplication, QEvent, QObject
+from tracing import tracer
+
+
+class IdleScheduler(QObject):
+    """黑屏期间的低功耗运行模式
+
+    黑屏覆盖全部显示器时暂停所有退出黑屏不需要的定时器和视觉效果(阴影、悬浮按钮重绘)，
+    只保留快捷键、鼠标移动等唤醒路径；退出黑屏时按相反顺序恢复。
+
+    开启跟踪或 count_wakeups 为 True 时(基准测试)，暂停期间用应用级的事件过滤器统计事件循环被唤醒的次数
+    (定时器事件和跨线程的排队调用)，用于确认省电效果；过滤器会让每个事件都经过一次 Python，
+    正常运行时不安装。
+    """
+
+    WAKEUP_EVENTS = (QEvent.Timer, QEvent.MetaCall)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.suspended = False
+        self.count_wakeups = False
+        self.wakeups = 0  # 本次(或上次)暂停期间的唤醒次数
+        self._hooks = []  # (名称, 暂停函数)，暂停函数返回恢复函数，没有需要恢复的返回 None
+        self._resume = []  # 本次暂停需要执行的 (名称, 恢复函数)
+        self._entered = None
+        self._left = None
+
+    def register(self, name, suspend):
+        self._hooks.append((name, suspend))
+
+    def add_timer(self, name, timer):
+        """暂停时停止正在运行的定时器，恢复时按剩余时间重新启动"""
+        def suspend():
+            if not timer.isActive():
+                return None
+            remaining = max(timer.remainingTime(), 0)
+            timer.stop()
+            return lambda: timer.start(remaining)
+        self.register(name, suspend)
+
+    def add_effect(self, name, effect):
+        """暂停时关闭图形效果(如阴影)，避免恢复前的重绘还要计算效果"""
+        def suspend():
+            if not effect.isEnabled():
+                return None
+            effect.setEnabled(False)
+            return lambda: effect.setEnabled(True)
+        self.register(name, suspend)
+
+    def add_updates(self, name, widget):
+        """暂停时禁止控件重绘，恢复时重绘一次"""
+        def suspend():
+            if not widget.updatesEnabled():
+                return None
+            widget.setUpdatesEnabled(False)
+            return lambda: widget.setUpdatesEnabled(True)
+        self.register(name, suspend)
+
+    def enter(self):
+        if self.suspended:
+            return
+        self.suspended = True
+        for name, suspend in self._hooks:
+            resume = suspend()
+            if resume is not None:
+                self._resume.append((name, resume))
+        self.wakeups = 0
+        self._entered = None
+        self._left = None
+        if self.count_wakeups or tracer.enabled:
+            self._entered = time.perf_counter()
+            QCoreApplication.instance().installEventFilter(self)
+
+    def exit(self):
+        if not self.suspended:
+            return
+        self.suspended = False
+        if self._entered is not None:
+            QCoreApplication.instance().removeEventFilter(self)
+            self._left = time.perf_counter()
+        resume, self._resume = self._resume, []
+        for name, callback in reversed(resume):
+            callback()
+
+    @property
+    def suspended_names(self):
+        """当前被暂停的项目"""
+        return [name for name, _ in self._resume]
+
+    def wakeups_per_minute(self):
+        """本次(或上次)暂停期间平均每分钟的唤醒次数，没有统计时为 None"""
+        if self._entered is None:
+            return None
+        seconds = (self._left or time.perf_counter()) - self._entered
+        if seconds <= 0:
+            return 0.0
+        return self.wakeups * 60 / seconds
+
+    def eventFilter(self, obj, event):
+        if event.type() in self.WAKEUP_EVENTS:
+            self.wakeups += 1
+        return False
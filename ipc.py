@@ -0,0 +1,110 @@
+import json
+import os
+import socket
+import sys
+import threading
+
+# 单实例和命令行控制。
+# 第一个启动的实例监听本地端点(Windows 命名管道 / Unix 套接字)，之后启动的进程把命令转发给它后立即退出。
+# 客户端只用标准库，不导入 Qt，转发一条命令只需几毫秒。
+
+COMMANDS = {
+    'toggle': '切换黑屏',
+    'on': '显示黑屏',
+    'off': '退出黑屏',
+    'status': '输出当前状态(JSON)',
+    'reload-settings': '重新读取设置文件',
+    'metrics': '输出性能指标(Prometheus 文本格式)',
+}
+INTERNAL_COMMANDS = ('ping', 'show')  # 检测实例是否存在、再次启动时显示悬浮窗
+
+TIMEOUT = 2.0  # 等待回复的超时(s)
+
+
+def send_command(endpoint, command, timeout=TIMEOUT):
+    """把命令发给正在运行的实例，返回回复(dict)；没有实例在运行时返回 None
+
+    实例存在但没有按时回复(TimeoutError)或连接出错时抛出 OSError，回复无法解析时抛出 ValueError。
+    """
+    try:
+        if sys.platform == 'win32':
+            return _send_pipe(endpoint, command, timeout)
+        return _send_unix(endpoint, command, timeout)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+
+def _send_unix(path, command, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(command.encode() + b'\n')
+        return _read_reply(sock.recv)
+
+
+def _send_pipe(name, command, timeout):
+    # QLocalServer 在 Windows 上是字节模式的命名管道，可以当作文件读写；
+    # 文件读写不支持超时，放在守护线程中进行，超时后不再等待(卡住的线程随进程退出)
+    result = {}
+
+    def exchange():
+        try:
+            with open(rf'\\.\pipe\{name}', 'r+b', buffering=0) as pipe:
+                pipe.write(command.encode() + b'\n')
+                result['reply'] = _read_reply(pipe.read)
+        except (OSError, ValueError) as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=exchange, name='ipc', daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError("等待实例回复超时")
+    if 'error' in result:
+        raise result['error']
+    return result['reply']
+
+
+def _read_reply(read):
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = read(4096)
+        if not chunk:
+            break
+        data += chunk
+    if not data:
+        raise ConnectionError("实例没有回复")
+    return json.loads(data)
+
+
+def control_endpoint(backend):
+    """本用户的控制端点，可以用 BLACKANY_CONTROL 环境变量指定(测试或同时运行多份时)"""
+    return os.getenv('BLACKANY_CONTROL') or backend.control_endpoint()
+
+
+def main(argv):
+    """命令行客户端：app.py toggle|on|off|status|reload-settings"""
+    from platform_backend import get_backend
+    command = argv[0]
+    try:
+        reply = send_command(control_endpoint(get_backend()), command)
+    except (OSError, ValueError) as e:
+        print(f"发送命令失败: {e}", file=sys.stderr)
+        return 2
+    if reply is None:
+        print("BlackAny 没有在运行", file=sys.stderr)
+        return 1
+    if command == 'status':
+        print(json.dumps(reply, ensure_ascii=False))
+    elif command == 'metrics' and reply.get('ok'):
+        sys.stdout.write(reply['text'])
+    elif not reply.get('ok'):
+        print(reply.get('error', '命令执行失败'), file=sys.stderr)
+    return 0 if reply.get('ok') else 2
+
+
+def usage():
+    lines = ['命令:']
+    lines += [f'  {name:<16}{text}' for name, text in COMMANDS.items()]
+    return '\n'.join(lines)
+
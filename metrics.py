@@ -0,0 +1,145 @@
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# 延迟类指标的桶上限(秒)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# 黑屏时长的桶上限(秒)
+DURATION_BUCKETS = (1, 10, 30, 60, 300, 900, 1800, 3600, 7200, 14400, 28800)
+
+
+class Counter:
+    """只增不减的计数"""
+    __slots__ = ('name', 'help', 'value')
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    """固定分桶的直方图，observe 只做一次二分查找和两次加法"""
+    __slots__ = ('name', 'help', 'buckets', 'counts', 'sum')
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+
+class Metrics:
+    """进程内的性能指标：计数和延迟直方图，可以导出为 Prometheus 文本格式
+
+    每个指标只在一个线程中更新(GUI 线程、亮度线程或设置写入线程)，更新时不加锁；
+    导出在另一个线程中读取，同一个直方图的各桶之间最多相差正在进行的那一次观测。
+    """
+
+    def __init__(self):
+        self._metrics = {}  # 名称 -> Counter / Histogram，按注册顺序导出
+
+    def counter(self, name, help):
+        return self._register(Counter(name, help))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, buckets))
+
+    def _register(self, metric):
+        # 同名指标只注册一次(模块被重复导入时)
+        return self._metrics.setdefault(metric.name, metric)
+
+    def snapshot(self):
+        """{名称: 计数} 或 {名称: {'count', 'sum'}}，用于 status 命令"""
+        result = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, Histogram):
+                result[name] = {'count': metric.count, 'sum': metric.sum}
+            else:
+                result[name] = metric.value
+        return result
+
+    def render(self):
+        """Prometheus 文本格式(0.0.4)"""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            if isinstance(metric, Histogram):
+                lines.append(f'# TYPE {name} histogram')
+                counts = list(metric.counts)  # 先复制，累加时不受并发更新影响
+                total = 0
+                for bound, count in zip(metric.buckets, counts):
+                    total += count
+                    lines.append(f'{name}_bucket{{le="{bound:g}"}} {total}')
+                total += counts[-1]
+                lines.append(f'{name}_bucket{{le="+Inf"}} {total}')
+                lines.append(f'{name}_sum {metric.sum:.6g}')
+                lines.append(f'{name}_count {total}')
+            else:
+                lines.append(f'# TYPE {name} counter')
+                lines.append(f'{name} {metric.value}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """原子写入文件(可以放在 node_exporter 的 textfile 目录中)"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+metrics = Metrics()
+
+
+class MetricsServer:
+    """在本机端口上提供 /metrics，由后台线程响应，抓取时不经过 GUI 线程"""
+
+    def __init__(self, registry, port, host='127.0.0.1'):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """开始监听，端口被占用时抛出 OSError"""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 不在控制台打印每次抓取
+
+        self._server = HTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
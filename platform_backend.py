@@ -0,0 +1,603 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 平台相关的功能(亮度、开机自启动、键盘钩子、配置目录)都通过后端访问。
+# 各后端依赖的模块(wmi、winreg、keyboard 等)只在选中该后端时才导入，
+# 这样 app.py 可以在 Linux/无界面环境中导入和运行(QT_QPA_PLATFORM=offscreen)。
+
+APP_NAME = 'BlackScreenApp'
+
+
+class Backend:
+    """平台后端接口"""
+    name = 'base'
+
+    def config_dir(self):
+        """保存 settings.json 的目录"""
+        raise NotImplementedError
+
+    def open_brightness(self):
+        """在亮度线程中调用，返回亮度会话
+
+        会话提供 read() -> {显示器实例名: 亮度}、write(实例名, 亮度) 和 close()，
+        只能在创建它的线程中使用，需要并行写入时每个线程各自打开一个会话。
+        """
+        raise NotImplementedError
+
+    def control_endpoint(self):
+        """单实例控制端点：Windows 上是命名管道名，其他平台是 Unix 套接字路径"""
+        runtime_dir = os.getenv('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+        return os.path.join(runtime_dir, f'{APP_NAME}-{os.getuid()}.sock')
+
+    def is_autostart_enabled(self):
+        raise NotImplementedError
+
+    def set_autostart(self, enabled, command):
+        raise NotImplementedError
+
+    def key_to_scan_codes(self, key):
+        """按键名 -> 扫描码元组，无效按键抛出 ValueError"""
+        raise NotImplementedError
+
+    def is_pressed(self, key):
+        raise NotImplementedError
+
+    def hook_keys(self, callback):
+        """安装全局键盘钩子，callback(scan_code, is_down) 在钩子线程中调用，返回用于卸载的句柄"""
+        raise NotImplementedError
+
+    def unhook_keys(self, handle):
+        raise NotImplementedError
+
+    # 以下在黑屏钩子的线程中调用，可以阻塞
+
+    def set_muted(self, muted):
+        """设置系统静音，返回原来是否静音"""
+        raise NotImplementedError
+
+    def pause_media(self):
+        """暂停正在播放的媒体，返回被暂停的播放器(传给 resume_media)"""
+        raise NotImplementedError
+
+    def resume_media(self, players):
+        raise NotImplementedError
+
+    def lock_screen(self):
+        raise NotImplementedError
+
+    def exclude_from_capture(self, window_id):
+        """让窗口不出现在屏幕截图中(磨砂黑屏刷新时截取它下面的内容)，不支持时返回 False"""
+        raise NotImplementedError
+
+    def idle_time(self):
+        """距离最后一次键盘/鼠标输入的时间(ms)"""
+        raise NotImplementedError
+
+
+class KeyboardHookMixin:
+    """基于 keyboard 库的全局按键(Windows，以及有权限的 Linux)"""
+
+    def _keyboard(self):
+        import keyboard
+        return keyboard
+
+    def key_to_scan_codes(self, key):
+        return self._keyboard().key_to_scan_codes(key)
+
+    def is_pressed(self, key):
+        return self._keyboard().is_pressed(key)
+
+    def hook_keys(self, callback):
+        keyboard = self._keyboard()
+        key_down = keyboard.KEY_DOWN
+
+        def on_event(event):
+            callback(event.scan_code, event.event_type == key_down)
+        return keyboard.hook(on_event)
+
+    def unhook_keys(self, handle):
+        try:
+            self._keyboard().unhook(handle)
+        except (KeyError, ValueError):
+            pass
+
+
+class WmiBrightnessSession:
+    """WMI 亮度会话，必须在创建它的线程中使用"""
+
+    def __init__(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+            self._pythoncom = pythoncom
+        except ImportError:
+            self._pythoncom = None
+        import wmi
+        self._conn = wmi.WMI(namespace='wmi')
+        self._methods = None  # 缓存的 实例名 -> WmiMonitorBrightnessMethods
+
+    def read(self):
+        return {monitor.InstanceName: monitor.CurrentBrightness
+                for monitor in self._conn.WmiMonitorBrightness()}
+
+    def write(self, instance, value):
+        if self._methods is None or instance not in self._methods:
+            # 显示器可能是后来接入的，重新枚举一次
+            self._methods = {monitor.InstanceName: monitor
+                             for monitor in self._conn.WmiMonitorBrightnessMethods()}
+        self._methods[instance].WmiSetBrightness(value, 0)
+
+    def close(self):
+        self._conn = None
+        self._methods = None
+        if self._pythoncom is not None:
+            self._pythoncom.CoUninitialize()
+            self._pythoncom = None
+
+
+class WindowsBackend(KeyboardHookMixin, Backend):
+    """Windows：WMI 亮度、注册表自启动、%APPDATA% 配置目录"""
+    name = 'windows'
+    RUN_KEY = r"Software\Microsoft\Windows\CurrentVersion\Run"
+
+    def config_dir(self):
+        return os.path.join(os.getenv('APPDATA'), APP_NAME)
+
+    def open_brightness(self):
+        return WmiBrightnessSession()
+
+    def control_endpoint(self):
+        return f"{APP_NAME}-{os.getenv('USERNAME', 'user')}"
+
+    def is_autostart_enabled(self):
+        import winreg as reg
+        try:
+            key = reg.OpenKey(reg.HKEY_CURRENT_USER, self.RUN_KEY, 0, reg.KEY_READ)
+            try:
+                reg.QueryValueEx(key, APP_NAME)
+                return True
+            finally:
+                reg.CloseKey(key)
+        except OSError:
+            return False
+
+    def set_autostart(self, enabled, command):
+        import winreg as reg
+        key = reg.OpenKey(reg.HKEY_CURRENT_USER, self.RUN_KEY, 0, reg.KEY_ALL_ACCESS)
+        try:
+            if enabled:
+                reg.SetValueEx(key, APP_NAME, 0, reg.REG_SZ, command)
+            else:
+                try:
+                    reg.DeleteValue(key, APP_NAME)
+                except OSError:
+                    pass
+        finally:
+            reg.CloseKey(key)
+
+    def set_muted(self, muted):
+        # 需要 pycaw(可选依赖)
+        import comtypes
+        from ctypes import POINTER, cast
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+        comtypes.CoInitialize()
+        try:
+            interface = AudioUtilities.GetSpeakers().Activate(
+                IAudioEndpointVolume._iid_, comtypes.CLSCTX_ALL, None)
+            volume = cast(interface, POINTER(IAudioEndpointVolume))
+            was_muted = bool(volume.GetMute())
+            volume.SetMute(int(muted), None)
+            return was_muted
+        finally:
+            comtypes.CoUninitialize()
+
+    def _media_sessions(self):
+        # 需要 winsdk(可选依赖)，通过系统媒体传输控件访问各播放器
+        import asyncio
+        from winsdk.windows.media.control import \
+            GlobalSystemMediaTransportControlsSessionManager as SessionManager
+
+        async def sessions():
+            manager = await SessionManager.request_async()
+            return list(manager.get_sessions())
+        return asyncio.run(sessions())
+
+    def pause_media(self):
+        import asyncio
+        from winsdk.windows.media.control import \
+            GlobalSystemMediaTransportControlsSessionPlaybackStatus as Status
+
+        playing = [session for session in self._media_sessions()
+                   if session.get_playback_info().playback_status == Status.PLAYING]
+
+        async def pause():
+            for session in playing:
+                await session.try_pause_async()
+        asyncio.run(pause())
+        return [session.source_app_user_model_id for session in playing]
+
+    def resume_media(self, players):
+        import asyncio
+        sessions = [session for session in self._media_sessions()
+                    if session.source_app_user_model_id in players]
+
+        async def play():
+            for session in sessions:
+                await session.try_play_async()
+        asyncio.run(play())
+
+    def lock_screen(self):
+        import ctypes
+        if not ctypes.windll.user32.LockWorkStation():
+            raise OSError("LockWorkStation 失败")
+
+    def exclude_from_capture(self, window_id):
+        # WDA_EXCLUDEFROMCAPTURE，Windows 10 2004 及以上支持
+        import ctypes
+        return bool(ctypes.windll.user32.SetWindowDisplayAffinity(int(window_id), 0x11))
+
+    def idle_time(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [('cbSize', wintypes.UINT), ('dwTime', wintypes.DWORD)]
+
+        info = LASTINPUTINFO(ctypes.sizeof(LASTINPUTINFO))
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            raise OSError("GetLastInputInfo 失败")
+        # 两个都是 32 位的开机毫秒数，约 49.7 天回绕一次
+        return (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xffffffff
+
+
+class SysfsBrightnessSession:
+    """通过 /sys/class/backlight 读写亮度，对外统一为 0-100"""
+    ROOT = '/sys/class/backlight'
+
+    def __init__(self):
+        devices = sorted(os.listdir(self.ROOT)) if os.path.isdir(self.ROOT) else []
+        if not devices:
+            raise OSError("没有找到背光设备")
+        self._devices = {}  # 设备名 -> (路径, 最大亮度)
+        for device in devices:
+            path = os.path.join(self.ROOT, device)
+            with open(os.path.join(path, 'max_brightness')) as f:
+                self._devices[device] = (path, int(f.read()))
+
+    def read(self):
+        levels = {}
+        for device, (path, maximum) in self._devices.items():
+            with open(os.path.join(path, 'brightness')) as f:
+                levels[device] = round(int(f.read()) * 100 / maximum)
+        return levels
+
+    def write(self, instance, value):
+        path, maximum = self._devices[instance]
+        with open(os.path.join(path, 'brightness'), 'w') as f:
+            f.write(str(round(value * maximum / 100)))
+
+    def close(self):
+        pass
+
+
+class LinuxBackend(KeyboardHookMixin, Backend):
+    """Linux：sysfs 背光亮度、XDG 自启动和配置目录"""
+    name = 'linux'
+    DESKTOP_FILE = 'blackany.desktop'
+
+    def _xdg_config_home(self):
+        return os.getenv('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+
+    def config_dir(self):
+        return os.path.join(self._xdg_config_home(), APP_NAME)
+
+    def open_brightness(self):
+        return SysfsBrightnessSession()
+
+    def _autostart_file(self):
+        return os.path.join(self._xdg_config_home(), 'autostart', self.DESKTOP_FILE)
+
+    def is_autostart_enabled(self):
+        return os.path.exists(self._autostart_file())
+
+    def set_autostart(self, enabled, command):
+        path = self._autostart_file()
+        if not enabled:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        if command.endswith('.py'):
+            command = f'"{sys.executable}" "{os.path.abspath(command)}"'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write("[Desktop Entry]\n"
+                    "Type=Application\n"
+                    "Name=BlackAny\n"
+                    f"Exec={command}\n"
+                    "X-GNOME-Autostart-enabled=true\n")
+
+    def _run(self, *args):
+        import subprocess
+        return subprocess.run(args, capture_output=True, text=True, timeout=2, check=True).stdout
+
+    def set_muted(self, muted):
+        # PulseAudio / PipeWire
+        was_muted = 'yes' in self._run('pactl', 'get-sink-mute', '@DEFAULT_SINK@')
+        self._run('pactl', 'set-sink-mute', '@DEFAULT_SINK@', '1' if muted else '0')
+        return was_muted
+
+    def pause_media(self):
+        # MPRIS 播放器
+        paused = []
+        for player in self._run('playerctl', '--list-all').split():
+            if self._run('playerctl', '-p', player, 'status').strip() == 'Playing':
+                self._run('playerctl', '-p', player, 'pause')
+                paused.append(player)
+        return paused
+
+    def resume_media(self, players):
+        for player in players:
+            self._run('playerctl', '-p', player, 'play')
+
+    def lock_screen(self):
+        self._run('loginctl', 'lock-session')
+
+    def exclude_from_capture(self, window_id):
+        # X11/Wayland 没有通用的方法，截图会包含黑屏窗口自己
+        return False
+
+    def idle_time(self):
+        # X11 的 MIT-SCREEN-SAVER 扩展；Wayland 下退回 GNOME 的 IdleMonitor
+        try:
+            return self._x11_idle_time()
+        except OSError:
+            pass
+        import subprocess
+        try:
+            output = self._run('gdbus', 'call', '--session', '--dest', 'org.gnome.Mutter.IdleMonitor',
+                               '--object-path', '/org/gnome/Mutter/IdleMonitor/Core',
+                               '--method', 'org.gnome.Mutter.IdleMonitor.GetIdletime')
+        except subprocess.SubprocessError as e:
+            raise OSError(f"无法读取 GNOME 的空闲时间: {e}") from e
+        # 输出形如 "(uint64 12345,)"
+        return int(output.strip('()\n,').split()[-1])
+
+    def _x11_idle_time(self):
+        import ctypes
+        import ctypes.util
+
+        class XScreenSaverInfo(ctypes.Structure):
+            _fields_ = [('window', ctypes.c_ulong), ('state', ctypes.c_int), ('kind', ctypes.c_int),
+                        ('til_or_since', ctypes.c_ulong), ('idle', ctypes.c_ulong),
+                        ('eventMask', ctypes.c_ulong)]
+
+        if not os.getenv('DISPLAY'):
+            raise OSError("没有 X11 显示")
+        xlib_name = ctypes.util.find_library('X11')
+        xss_name = ctypes.util.find_library('Xss')
+        if not xlib_name or not xss_name:
+            raise OSError("找不到 libX11/libXss")
+        xlib = ctypes.cdll.LoadLibrary(xlib_name)
+        xss = ctypes.cdll.LoadLibrary(xss_name)
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(XScreenSaverInfo)
+        xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong,
+                                              ctypes.POINTER(XScreenSaverInfo)]
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            raise OSError("无法连接 X11 显示")
+        info = xss.XScreenSaverAllocInfo()
+        try:
+            if not xss.XScreenSaverQueryInfo(display, xlib.XDefaultRootWindow(display), info):
+                raise OSError("X11 不支持 MIT-SCREEN-SAVER 扩展")
+            return info.contents.idle
+        finally:
+            xlib.XFree(info)
+            xlib.XCloseDisplay(display)
+
+
+class FakeClock:
+    """可以手动推进的假时钟，用于测试和基准测试
+
+    wall(系统时间)和 mono(单调时钟)分开，直接修改 wall 可以模拟修改系统时间。
+    time()/monotonic() 分别代替 time.time/time.monotonic，调用对象本身等同于 monotonic()。
+    """
+
+    def __init__(self, start=0.0, mono=0.0):
+        self.wall = start
+        self.mono = mono
+
+    def advance(self, seconds):
+        self.wall += seconds
+        self.mono += seconds
+
+    def advance_to(self, mono):
+        """推进到单调时钟的某一时刻"""
+        self.advance(mono - self.mono)
+
+    def time(self):
+        return self.wall
+
+    def monotonic(self):
+        return self.mono
+
+    __call__ = monotonic
+
+
+class FakeBrightnessSession:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def read(self):
+        with self._backend.lock:
+            self._backend.brightness_reads += 1
+            return dict(self._backend.monitors)
+
+    def write(self, instance, value):
+        delay = self._backend.write_delay
+        if isinstance(delay, dict):
+            delay = delay.get(instance, 0)
+        if delay:
+            time.sleep(delay / 1000)  # 模拟较慢的硬件
+        with self._backend.lock:
+            if instance not in self._backend.monitors:
+                raise KeyError(f"没有这个显示器: {instance}")
+            self._backend.brightness_writes += 1
+            self._backend.monitors[instance] = value
+
+    def close(self):
+        pass
+
+
+class FakeBackend(Backend):
+    """内存中的假后端，用于测试和基准测试，可以注入按键事件"""
+    name = 'fake'
+
+    def __init__(self, brightness=100, config_dir=None, write_delay=0, monitors=None):
+        self.lock = threading.Lock()
+        self.monitors = dict(monitors) if monitors else {'DISPLAY1': brightness}  # 实例名 -> 亮度
+        self.write_delay = write_delay  # 每次写入亮度的耗时(ms)，也可以是 {实例名: ms}
+        self.muted = False
+        self.players = {'player': 'Playing'}  # 播放器 -> 状态
+        self.locks = 0
+        self.media_delay = 0  # 每次静音/暂停媒体操作的耗时(ms)，模拟较慢的系统接口
+        self.clock = time.monotonic  # 计算空闲时间用的时钟，测试中可以替换
+        self.last_input = self.clock()
+        self.idle_queries = 0
+        self.brightness_reads = 0
+        self.brightness_writes = 0
+        self.autostart = False
+        self._config_dir = config_dir
+        self._scan_codes = {}  # 按键名 -> 扫描码，按首次出现的顺序分配
+        self._pressed = set()
+        self._hooks = []
+
+    @property
+    def brightness(self):
+        """第一个显示器的亮度"""
+        return next(iter(self.monitors.values()))
+
+    @brightness.setter
+    def brightness(self, value):
+        for instance in self.monitors:
+            self.monitors[instance] = value
+
+    def config_dir(self):
+        if self._config_dir is None:
+            self._config_dir = tempfile.mkdtemp(prefix='blackany-')
+        return self._config_dir
+
+    def open_brightness(self):
+        return FakeBrightnessSession(self)
+
+    def control_endpoint(self):
+        # 每个假后端有自己的配置目录，不会连到真实运行的实例
+        if sys.platform == 'win32':
+            return f'{APP_NAME}-fake-{os.path.basename(self.config_dir())}'
+        return os.path.join(self.config_dir(), 'control.sock')
+
+    def is_autostart_enabled(self):
+        return self.autostart
+
+    def set_autostart(self, enabled, command):
+        self.autostart = enabled
+
+    def _media_wait(self):
+        if self.media_delay:
+            time.sleep(self.media_delay / 1000)
+
+    def set_muted(self, muted):
+        self._media_wait()
+        with self.lock:
+            was_muted, self.muted = self.muted, muted
+        return was_muted
+
+    def pause_media(self):
+        self._media_wait()
+        with self.lock:
+            paused = [name for name, status in self.players.items() if status == 'Playing']
+            for name in paused:
+                self.players[name] = 'Paused'
+        return paused
+
+    def resume_media(self, players):
+        self._media_wait()
+        with self.lock:
+            for name in players:
+                self.players[name] = 'Playing'
+
+    def lock_screen(self):
+        with self.lock:
+            self.locks += 1
+
+    def exclude_from_capture(self, window_id):
+        return True
+
+    def key_to_scan_codes(self, key):
+        if not key:
+            raise ValueError(f"无效的按键: {key!r}")
+        if key not in self._scan_codes:
+            self._scan_codes[key] = len(self._scan_codes) + 1
+        return (self._scan_codes[key],)
+
+    def is_pressed(self, key):
+        return self.key_to_scan_codes(key)[0] in self._pressed
+
+    def hook_keys(self, callback):
+        self._hooks.append(callback)
+        return callback
+
+    def unhook_keys(self, handle):
+        if handle in self._hooks:
+            self._hooks.remove(handle)
+
+    def idle_time(self):
+        self.idle_queries += 1
+        return (self.clock() - self.last_input) * 1000
+
+    def touch(self):
+        """模拟一次鼠标移动等输入"""
+        self.last_input = self.clock()
+
+    def press(self, key):
+        """模拟按下按键"""
+        self.touch()
+        code = self.key_to_scan_codes(key)[0]
+        self._pressed.add(code)
+        for callback in list(self._hooks):
+            callback(code, True)
+
+    def release(self, key):
+        code = self.key_to_scan_codes(key)[0]
+        self._pressed.discard(code)
+        for callback in list(self._hooks):
+            callback(code, False)
+
+
+BACKENDS = {
+    'windows': WindowsBackend,
+    'linux': LinuxBackend,
+    'fake': FakeBackend,
+}
+
+
+def get_backend(name=None):
+    """按名称创建后端，默认根据 BLACKANY_BACKEND 环境变量或当前平台选择"""
+    name = name or os.getenv('BLACKANY_BACKEND')
+    if not name:
+        if sys.platform == 'win32':
+            name = 'windows'
+        elif sys.platform.startswith('linux'):
+            name = 'linux'
+        else:
+            name = 'fake'
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"未知的平台后端: {name}")
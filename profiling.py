@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """启动阶段计时
+
+    记录每个阶段相对于进程启动的开始时间和耗时，--profile-startup 时打印出来，
+    用于跟踪各个版本的冷启动时间。未启用时只多一次 perf_counter 调用。
+    """
+
+    def __init__(self, enabled=False, origin=None):
+        self.enabled = enabled
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = []  # (阶段名, 开始时间 ms, 耗时 ms)，可能从亮度线程追加
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, start)
+
+    def record(self, name, duration_ms, start=None):
+        if not self.enabled:
+            return
+        if start is None:
+            start = time.perf_counter() - duration_ms / 1000
+        self.phases.append((name, (start - self.origin) * 1000, duration_ms))
+
+    def mark(self, name):
+        """记录一个时间点(耗时为 0)"""
+        self.record(name, 0.0)
+
+    def elapsed(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    def report(self):
+        lines = [f"{'阶段':<28}{'开始(ms)':>10}{'耗时(ms)':>10}"]
+        for name, start, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"{name:<30}{start:>10.1f}{duration:>10.1f}")
+        lines.append(f"{'总计':<28}{self.elapsed():>10.1f}")
+        return '\n'.join(lines)
@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+from metrics import metrics
+from blackout_schedule import ScheduleRule
+
+# settings.json 的格式版本，写入时一起保存
+SCHEMA_VERSION = 2
+
+
+def _is_bool(value):
+    return isinstance(value, bool)
+
+
+def _is_int(minimum, maximum=None):
+    def check(value):
+        return (isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+                and (maximum is None or value <= maximum))
+    return check
+
+
+def _is_bindings(value):
+    return isinstance(value, dict) and all(
+        isinstance(key, str) and isinstance(shortcut, str) for key, shortcut in value.items())
+
+
+def _is_schedule(value):
+    if not isinstance(value, list):
+        return False
+    try:
+        for raw in value:
+            ScheduleRule.parse(raw)
+    except ValueError:
+        return False
+    return True
+
+
+# 字段 -> 检查函数
+SCHEMA = {
+    'shortcut': lambda value: isinstance(value, str) and bool(value),
+    'bindings': _is_bindings,
+    'hide_cursor': _is_bool,
+    'startup': _is_bool,
+    'position': lambda value: value is None or _is_int(0, 4)(value),
+    'enable_mouse_exit': _is_bool,
+    'hide_button': _is_bool,
+    'hotkey_backend': lambda value: value in ('hook', 'poll'),
+    'fade_duration': _is_int(0, 5000),
+    'low_power_overlay': _is_bool,
+    'wake_distance': _is_int(1),
+    'wake_velocity': _is_int(1),
+    'mute_on_blank': _is_bool,
+    'pause_media_on_blank': _is_bool,
+    'lock_on_blank': _is_bool,
+    'blank_script': lambda value: isinstance(value, str),
+    'restore_script': lambda value: isinstance(value, str),
+    'hook_timeout': _is_int(100, 60000),
+    'overlay_mode': lambda value: value in ('black', 'frosted'),
+    'frost_refresh': _is_int(0, 3600),
+    'metrics_port': _is_int(0, 65535),
+    'stall_threshold': lambda value: value == 0 or _is_int(50, 60000)(value),
+    'auto_blackout': _is_int(0, 1440),
+    'schedule': _is_schedule,
+}
+
+# 只在设置写入线程中更新
+WRITES = metrics.counter('blackany_settings_writes_total', '写入设置文件的次数')
+WRITE_FAILURES = metrics.counter('blackany_settings_write_failures_total', '写入设置文件失败的次数')
+
+# 旧版本 -> 升级函数；没有 version 字段的文件是版本 0，字段与版本 1 相同
+MIGRATIONS = {
+    0: lambda values: values,
+    # 版本 1 默认开启低功耗黑屏，保存下来的多是默认值；版本 2 起改为默认关闭，丢弃旧值
+    1: lambda values: {key: value for key, value in values.items() if key != 'low_power_overlay'},
+}
+
+
+def validate(raw):
+    """按当前版本的格式检查读到的设置，返回 (有效的设置, 错误信息列表)
+
+    旧版本的文件先逐级升级；无效或未知的字段丢弃，其余字段照常使用。
+    """
+    if not isinstance(raw, dict):
+        return {}, ["设置文件的内容不是对象"]
+    values = dict(raw)
+    errors = []
+    version = values.pop('version', 0)
+    if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+        return {}, [f"无效的设置版本: {version!r}"]
+    if version > SCHEMA_VERSION:
+        errors.append(f"设置文件版本 {version} 比程序支持的 {SCHEMA_VERSION} 新，只读取认识的字段")
+    while version < SCHEMA_VERSION:
+        values = MIGRATIONS[version](values)
+        version += 1
+    valid = {}
+    for key, value in values.items():
+        check = SCHEMA.get(key)
+        if check is None:
+            if version <= SCHEMA_VERSION:
+                errors.append(f"未知的设置项: {key}")
+        elif check(value):
+            valid[key] = value
+        else:
+            errors.append(f"无效的设置 {key}: {value!r}")
+    return valid, errors
+
+
+class SettingsStore(QObject):
+    """设置存储
+
+    设置保存在内存中，修改时只标记为脏并重新开始防抖计时，
+    计时结束后在后台线程中写入一次。写入先写临时文件再改名，不会留下写了一半的 settings.json；
+    内容与上次写入的相同时直接跳过。加载只读文件，不会触发任何写回。
+
+    watch() 之后用 QFileSystemWatcher 监视文件，外部修改经防抖后在后台线程中解析和检查，
+    只把与上次读取/写入不同的字段通过 changed 信号交给界面应用。
+    文件的 (修改时间, 大小) 与上次读取或本程序写入后的相同时不重新解析，自己保存引起的通知会被忽略。
+    """
+    saved = pyqtSignal()
+    failed = pyqtSignal(str)
+    changed = pyqtSignal(dict)  # 外部修改了设置文件：{字段: 新值}，只含变化的字段
+    _parsed = pyqtSignal(object)  # 后台线程解析完成，回到 GUI 线程合并
+    _writeFailed = pyqtSignal(object, str)  # 后台线程写入失败：(写入的内容, 错误信息)，回到 GUI 线程处理
+
+    DEBOUNCE = 300  # 最后一次修改后等待多久写入(ms)
+    RELOAD_DEBOUNCE = 200  # 文件变化后等待多久再读取(ms)，外部编辑器常常分几次写入
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.write_count = 0  # 实际写入文件的次数
+        self._values = {}
+        self._persisted = None  # 最近一次写入(或加载)的内容，只在 GUI 线程中读写
+        self._closed = False
+        self._write_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='settings')
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._stat = None  # 最近一次读取或写入后文件的 (修改时间, 大小)
+        self._watcher = None
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.timeout.connect(self._schedule_parse)
+        self._parsed.connect(self._merge)
+        self._writeFailed.connect(self._on_write_failed)
+
+    def load(self):
+        """读取并检查设置文件，文件不存在时返回空字典"""
+        try:
+            values, stat = self._read()
+        except FileNotFoundError:
+            values, stat = {}, None
+        except (OSError, ValueError) as e:
+            print(f"读取设置失败: {e}")
+            values, stat = {}, None
+        self._stat = stat
+        self._values = dict(values)
+        self._persisted = dict(values) if values else None
+        return dict(values)
+
+    def _read(self):
+        """读取、检查设置文件，返回 (设置, 文件状态)"""
+        with open(self.path, 'r') as f:
+            stat = os.fstat(f.fileno())
+            raw = json.load(f)
+        values, errors = validate(raw)
+        for error in errors:
+            print(f"设置文件: {error}")
+        return values, (stat.st_mtime_ns, stat.st_size)
+
+    def watch(self):
+        """开始监视设置文件的外部修改"""
+        if self._watcher is not None:
+            return
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        self._watcher = QFileSystemWatcher(self)
+        # 同时监视目录：原子替换(包括本程序的写入)后文件会换成新的 inode，需要重新添加
+        self._watcher.addPath(directory)
+        if os.path.exists(self.path):
+            self._watcher.addPath(self.path)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_file_changed)
+
+    def _on_file_changed(self, path):
+        if os.path.exists(self.path) and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+        self._reload_timer.start(self.RELOAD_DEBOUNCE)
+
+    def _schedule_parse(self):
+        if self._closed:
+            return
+        # 与写入使用同一个线程，解析时不会读到写了一半的文件
+        self._executor.submit(self._parse)
+
+    def _parse(self):
+        """在后台线程中解析发生变化的设置文件"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            self.failed.emit(f"读取设置失败: {e}")
+            return
+        if (stat.st_mtime_ns, stat.st_size) == self._stat:
+            return  # 内容没有变化(包括本程序刚写入的)
+        try:
+            values, self._stat = self._read()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            # 可能还没写完，下一次变化时再读
+            self.failed.emit(f"读取设置失败: {e}")
+            return
+        self._parsed.emit(values)
+
+    def _merge(self, values):
+        """GUI 线程：找出与上次读取/写入不同的字段并合并"""
+        persisted = self._persisted or {}
+        changed = {key: value for key, value in values.items() if persisted.get(key) != value}
+        self._persisted = dict(persisted, **values)
+        changed = {key: value for key, value in changed.items() if self._values.get(key) != value}
+        if not changed:
+            return
+        self._values.update(changed)
+        self.changed.emit(changed)
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def update(self, values):
+        """合并新的设置，有变化时才安排写入"""
+        changed = False
+        for key, value in values.items():
+            if self._values.get(key, object()) != value:
+                self._values[key] = value
+                changed = True
+        if changed:
+            self._timer.start(self.DEBOUNCE)
+        return changed
+
+    @property
+    def debounce_timer(self):
+        """防抖定时器，黑屏期间由 IdleScheduler 暂停"""
+        return self._timer
+
+    @property
+    def dirty(self):
+        return self._values != self._persisted
+
+    def flush(self, wait=False):
+        """立即写入未保存的修改，wait 为 True 时等待写入完成(退出程序时使用)"""
+        self._timer.stop()
+        if self._closed or not self.dirty:
+            return  # 关闭后写入线程已经停止
+        snapshot = dict(self._values)
+        self._persisted = snapshot
+        future = self._executor.submit(self._write, snapshot)
+        if wait:
+            future.result()
+
+    def close(self):
+        if self._closed:
+            return
+        # 先停止监视，最后这次写入不会再触发解析
+        if self._watcher is not None:
+            self._watcher.fileChanged.disconnect(self._on_file_changed)
+            self._watcher.directoryChanged.disconnect(self._on_file_changed)
+        self._reload_timer.stop()
+        self.flush(wait=True)
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+    def _write(self, values):
+        """在后台线程中原子写入"""
+        with self._write_lock:
+            tmp_path = self.path + '.tmp'
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, 'w') as f:
+                    json.dump(dict(values, version=SCHEMA_VERSION), f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    stat = os.fstat(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._stat = (stat.st_mtime_ns, stat.st_size)  # 监视到这次写入时不再解析
+                self.write_count += 1
+                WRITES.inc()
+                self.saved.emit()
+            except Exception as e:
+                WRITE_FAILURES.inc()
+                self._writeFailed.emit(values, f"保存设置失败: {e}")
+
+    def _on_write_failed(self, values, message):
+        """GUI 线程：写入失败的内容仍是最近一次安排写入的时，标记为未保存，下次修改或 flush 时重写"""
+        if self._persisted is values:
+            self._persisted = None
+        self.failed.emit(message)
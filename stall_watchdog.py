@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from PyQt5.QtCore import QObject, pyqtSignal
+from metrics import metrics
+
+# 以下指标只在看门狗线程中更新
+STALLS = metrics.counter('blackany_gui_stalls_total', '界面线程卡顿超过阈值的次数')
+STALL_SECONDS = metrics.histogram('blackany_gui_stall_seconds', '界面线程每次卡顿的时长',
+                                  (0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+
+
+def _format_frame(frame):
+    code = frame.f_code
+    return f'{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}'
+
+
+class StallWatchdog(QObject):
+    """界面线程卡顿检测
+
+    后台线程每隔 INTERVAL 向事件循环发一次 ping(排队的信号)，超过 threshold 没有回应时认为卡顿，
+    之后每隔 SAMPLE_INTERVAL 用 sys._current_frames() 采样一次主线程的 Python 调用栈，
+    直到事件循环回应。卡顿结束后把时长、采样最多的栈顶函数和最常见的调用栈作为一行 JSON
+    追加到报告文件；卡了 LONG_STALL 还没结束时先写一次(ongoing)，程序彻底卡死也能留下记录。
+    黑屏低功耗期间不停止检测(黑屏时快捷键失灵正是最需要记录的情况)，只放慢 ping 的频率。
+    """
+
+    _ping = pyqtSignal()
+
+    INTERVAL = 100  # 两次 ping 的间隔(ms)
+    IDLE_INTERVAL = 1000  # 低功耗期间两次 ping 的间隔(ms)
+    SAMPLE_INTERVAL = 10  # 卡顿期间的采样间隔(ms)
+    LONG_STALL = 5000  # 卡顿超过这么久时先写一次报告(ms)
+    MAX_DEPTH = 40  # 每次采样最多记录的栈帧数
+    REPORT_DEPTH = 12  # 报告中的调用栈只保留最内层的这么多帧
+    HOTTEST = 5
+
+    def __init__(self, report_path, threshold=250, parent=None):
+        super().__init__(parent)
+        self.report_path = report_path
+        self.threshold = threshold  # ms
+        self.interval = self.INTERVAL
+        self.stall_count = 0
+        self.last_report = None
+        self._main_id = threading.main_thread().ident
+        self._pong = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._ping.connect(self._pong.set)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='watchdog', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._pong.set()
+
+    def slow_down(self):
+        """放慢 ping 的频率(黑屏低功耗期间)，返回恢复函数"""
+        if self.interval == self.IDLE_INTERVAL:
+            return None
+        interval, self.interval = self.interval, self.IDLE_INTERVAL
+        return lambda: setattr(self, 'interval', interval)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._pong.clear()
+            sent = time.perf_counter()
+            self._ping.emit()  # 排队到界面线程，事件循环处理到它时才会 set
+            if not self._pong.wait(self.threshold / 1000):
+                self._sample(sent)
+            self._stopped.wait(self.interval / 1000)
+
+    def _sample(self, sent):
+        stacks = Counter()
+        reported = False
+        while not self._pong.wait(self.SAMPLE_INTERVAL / 1000):
+            frame = sys._current_frames().get(self._main_id)
+            if frame is not None:
+                stacks[self._stack(frame)] += 1
+            if not reported and time.perf_counter() - sent > self.LONG_STALL / 1000:
+                reported = True
+                self._report(time.perf_counter() - sent, stacks, ongoing=True)
+        if self._stopped.is_set():
+            return
+        duration = time.perf_counter() - sent
+        self.stall_count += 1
+        STALLS.inc()
+        STALL_SECONDS.observe(duration)
+        self._report(duration, stacks, ongoing=False)
+
+    def _stack(self, frame):
+        """最外层在前的栈帧描述"""
+        frames = []
+        while frame is not None and len(frames) < self.MAX_DEPTH:
+            frames.append(_format_frame(frame))
+            frame = frame.f_back
+        return tuple(reversed(frames))
+
+    def _report(self, duration, stacks, ongoing):
+        leaves = Counter()
+        for stack, count in stacks.items():
+            if stack:
+                leaves[stack[-1]] += count
+        common = stacks.most_common(1)[0][0] if stacks else ()
+        report = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duration_ms': round(duration * 1000, 1),
+            'ongoing': ongoing,
+            'samples': sum(stacks.values()),
+            'hottest': leaves.most_common(self.HOTTEST),
+            'stack': list(common[-self.REPORT_DEPTH:]),
+        }
+        self.last_report = report
+        hottest = report['hottest'][0][0] if report['hottest'] else '未知'
+        print(f"界面线程卡顿 {report['duration_ms']:.0f}ms{'(仍未结束)' if ongoing else ''}: {hottest}")
+        try:
+            with open(self.report_path, 'a') as f:
+                f.write(json.dumps(report, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"写入卡顿报告失败: {e}")
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# 测试在无界面环境中运行，使用内存中的假后端
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('BLACKANY_BACKEND', 'fake')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def qt_app():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,10 @@
+import time
+
+
+def wait_for(app, condition, timeout=2.0):
+    """处理 Qt 事件直到条件成立或超时，返回最后一次检查的结果"""
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return condition()
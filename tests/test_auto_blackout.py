@@ -0,0 +1,110 @@
+import pytest
+
+from auto_blackout import AutoBlackout
+from platform_backend import FakeBackend, FakeClock
+
+TIMEOUT = 300 * 1000  # ms
+
+
+class FakeTimer:
+    """记录到期时刻的单次定时器，由测试推进假时钟后触发"""
+
+    def __init__(self, clock):
+        self._clock = clock
+        self.deadline = None
+        self.starts = 0
+
+    def start(self, ms):
+        self.starts += 1
+        self.deadline = self._clock() + ms / 1000
+
+    def stop(self):
+        self.deadline = None
+
+    def isActive(self):
+        return self.deadline is not None
+
+
+class Simulation:
+    """按时间顺序推进输入事件和定时器；自动黑屏后下一次输入时恢复，与 FloatingButton 一样重新 arm"""
+
+    def __init__(self, timeout=TIMEOUT):
+        self.clock = FakeClock(mono=1000.0)
+        self.backend = FakeBackend()
+        self.backend.clock = self.clock
+        self.backend.touch()
+        self.engine = AutoBlackout(self.backend, timeout, clock=self.clock)
+        self.timer = self.engine._timer = FakeTimer(self.clock)
+        self.blanked = False
+        self.blackouts = []  # 自动黑屏的时刻
+        self.engine.idle.connect(self._on_idle)
+        self.engine.arm()
+
+    def _on_idle(self):
+        self.blanked = True
+        self.blackouts.append(self.clock())
+        self.engine.disarm()
+
+    def run(self, until, inputs=()):
+        """推进到 until 秒(相对开始时刻)，inputs 为输入的时刻"""
+        start = 1000.0
+        pending = sorted(start + t for t in inputs)
+        end = start + until
+        while True:
+            deadline = self.timer.deadline
+            next_input = pending[0] if pending else None
+            if deadline is not None and deadline <= end and (next_input is None or deadline < next_input):
+                self.clock.advance_to(deadline)
+                self.timer.deadline = None
+                self.engine._on_timeout()
+            elif next_input is not None and next_input <= end:
+                self.clock.advance_to(pending.pop(0))
+                self.backend.touch()
+                if self.blanked:
+                    self.blanked = False
+                    self.engine.arm()
+            else:
+                self.clock.advance_to(end)
+                return
+
+
+def test_blanks_once_per_idle_period():
+    sim = Simulation()
+    sim.run(3 * TIMEOUT / 1000)
+    assert sim.blackouts == [pytest.approx(1000.0 + TIMEOUT / 1000)]
+    # 一直无操作时整个空闲期只唤醒一次
+    assert sim.engine.wakeups == 1
+    assert sim.backend.idle_queries == 2
+
+
+def test_no_blackout_while_input_continues():
+    sim = Simulation()
+    windows = 10
+    sim.run(windows * TIMEOUT / 1000, inputs=[t * 100 for t in range(1, windows * 3)])
+    assert sim.blackouts == []
+    # 有操作时每个 timeout 最多唤醒一次
+    assert sim.engine.wakeups <= windows
+
+
+def test_blanks_after_input_stops():
+    sim = Simulation()
+    last = 1000
+    sim.run(last + 2 * TIMEOUT / 1000, inputs=range(50, last + 1, 50))
+    assert sim.blackouts == [pytest.approx(1000.0 + last + TIMEOUT / 1000)]
+
+
+def test_each_idle_period_blanks_once():
+    sim = Simulation()
+    # 每次黑屏后隔一段时间有一次输入(恢复)，之后再空闲
+    period = 2 * TIMEOUT / 1000
+    sim.run(5 * period, inputs=[period * i for i in range(1, 5)])
+    assert len(sim.blackouts) == 5
+    for i, at in enumerate(sim.blackouts):
+        assert at == pytest.approx(1000.0 + period * i + TIMEOUT / 1000)
+
+
+def test_disabled_never_arms():
+    sim = Simulation(timeout=0)
+    sim.run(3 * TIMEOUT / 1000)
+    assert sim.blackouts == []
+    assert not sim.engine.armed
@@ -0,0 +1,28 @@
+import benchmark
+
+
+def results(**suites):
+    return {'results': suites}
+
+
+def test_zero_baseline_regression():
+    old = results(wake={'synthetic.false_wakes': 0, 'synthetic.missed_wakes': 0})
+    new = results(wake={'synthetic.false_wakes': 1, 'synthetic.missed_wakes': 0})
+    assert benchmark.compare(new, old, 0.2) == ['wake.synthetic.false_wakes']
+
+
+def test_higher_is_better():
+    old = results(watchdog={'samples.median': 18, 'unattributed': 0})
+    assert benchmark.compare(results(watchdog={'samples.median': 40, 'unattributed': 0}), old, 0.2) == []
+    assert benchmark.compare(results(watchdog={'samples.median': 5, 'unattributed': 0}), old, 0.2) == [
+        'watchdog.samples.median']
+
+
+def test_workload_metrics_not_compared():
+    old = results(schedule={'rules': 300, 'events': 847, 'transitions': 438})
+    new = results(schedule={'rules': 3000, 'events': 8470, 'transitions': 4380})
+    assert benchmark.compare(new, old, 0.2) == []
+
+
+def test_every_suite_has_directions():
+    assert set(benchmark.DIRECTIONS) == set(benchmark.SUITES)
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from blackout import BLANKED, BLANKING, IDLE, RESTORING, BlackoutStateMachine
+
+SEQUENCES = 5000
+STEPS = 60
+
+
+class FakeTimer:
+    """单次定时器，timeout 由测试决定何时送达"""
+
+    def __init__(self):
+        self.active = False
+
+    def start(self, ms):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+
+class FakeScreen:
+    """记录黑屏窗口和亮度操作，并检查它们的先后顺序"""
+
+    def __init__(self):
+        self.visible = False
+        self.dimmed = False
+        self.pending_restores = 0  # 已发出、亮度线程尚未确认的恢复
+        self.log = []
+
+    def show(self, screen=None):
+        assert not self.visible
+        self.visible = True
+        self.log.append('show')
+
+    def hide(self):
+        assert self.visible
+        self.visible = False
+        self.log.append('hide')
+
+    def dim(self):
+        # 恢复(隐藏黑屏)之后不能再降低亮度
+        assert self.visible, self.log
+        assert not self.dimmed, self.log
+        self.dimmed = True
+        self.log.append('dim')
+
+    def restore(self):
+        # 只有降低过亮度才恢复
+        assert self.dimmed, self.log
+        self.dimmed = False
+        self.pending_restores += 1
+        self.log.append('restore')
+
+
+def make_machine():
+    timer = FakeTimer()
+    screen = FakeScreen()
+    machine = BlackoutStateMachine(timer, screen.show, screen.hide, screen.dim, screen.restore)
+    return machine, timer, screen
+
+
+def check(machine, timer, screen):
+    assert machine.active == screen.visible
+    assert machine.brightness_dimmed == screen.dimmed
+    assert timer.active == (machine.state == BLANKING)
+    if machine.state == RESTORING:
+        assert screen.pending_restores
+
+
+def step(rng, machine, timer, screen):
+    event = rng.choice(('toggle', 'toggle', 'timeout', 'stray_timeout', 'restored', 'stray_restored'))
+    if event == 'toggle':
+        machine.toggle(dim=rng.random() < 0.8)
+    elif event == 'timeout':
+        if timer.active:
+            timer.active = False
+            machine.on_timeout()
+    elif event == 'stray_timeout':
+        # 定时器停止前已经排队的到期事件
+        if not timer.active:
+            machine.on_timeout()
+    elif event == 'restored':
+        if screen.pending_restores:
+            screen.pending_restores -= 1
+            machine.brightness_restored()
+    else:
+        machine.brightness_restored()
+    return event
+
+
+@pytest.mark.parametrize('seed', range(SEQUENCES // 500))
+def test_random_sequences(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        machine, timer, screen = make_machine()
+        for _ in range(rng.randrange(1, STEPS)):
+            step(rng, machine, timer, screen)
+            check(machine, timer, screen)
+        # 送达所有未完成的事件后，状态与窗口一致
+        if timer.active:
+            timer.active = False
+            machine.on_timeout()
+        while screen.pending_restores:
+            screen.pending_restores -= 1
+            machine.brightness_restored()
+        check(machine, timer, screen)
+        assert machine.state == (BLANKED if screen.visible else IDLE)
+        assert machine.stats['dim'] == machine.stats['restore'] + screen.dimmed
+
+
+def test_restore_before_timeout_cancels_dim():
+    machine, timer, screen = make_machine()
+    machine.toggle()
+    machine.toggle()
+    machine.on_timeout()
+    assert screen.log == ['show', 'hide']
+    assert machine.state == IDLE
+
+
+def test_restore_waits_for_brightness():
+    machine, timer, screen = make_machine()
+    machine.toggle()
+    machine.on_timeout()
+    machine.toggle()
+    assert machine.state == RESTORING
+    machine.brightness_restored()
+    assert machine.state == IDLE
+    assert screen.log == ['show', 'dim', 'hide', 'restore']
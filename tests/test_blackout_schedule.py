@@ -0,0 +1,131 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from blackout_schedule import BlackoutScheduler, ScheduleRule
+from platform_backend import FakeClock
+
+
+@pytest.fixture(autouse=True)
+def berlin_time():
+    """固定在有夏令时的时区中运行"""
+    old = os.environ.get('TZ')
+    os.environ['TZ'] = 'Europe/Berlin'
+    time.tzset()
+    yield
+    if old is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = old
+    time.tzset()
+
+
+class FakeTimer:
+    def __init__(self):
+        self.interval = None
+
+    def start(self, ms):
+        self.interval = ms
+
+    def stop(self):
+        self.interval = None
+
+
+class Simulation:
+    """按定时器的间隔推进假时钟并调用 process()，记录每次进出时段的本地时间"""
+
+    def __init__(self, start, rules):
+        self.clock = FakeClock(start.timestamp())
+        self.scheduler = BlackoutScheduler(clock=self.clock.time, monotonic=self.clock.monotonic)
+        self.timer = self.scheduler._timer = FakeTimer()
+        self.changes = []
+        self.mismatches = []  # 处理完到期事件后状态与直接计算的结果不一致的时刻
+        self.scheduler.activeChanged.connect(
+            lambda active: self.changes.append((active, datetime.fromtimestamp(self.clock.time()))))
+        self.scheduler.set_rules([ScheduleRule.parse(rule) for rule in rules])
+
+    def run(self, until, jumps=None):
+        """运行到本地时间 until；jumps 为 {本地时间: 秒}，到达时把系统时间改动这么多秒(单调时钟不变)"""
+        jumps = sorted((when.timestamp(), seconds) for when, seconds in (jumps or {}).items())
+        end = until.timestamp()
+        while self.timer.interval is not None:
+            step = self.timer.interval / 1000
+            if jumps and self.clock.time() + step >= jumps[0][0]:
+                # 在定时器到期之前修改系统时间
+                self.clock.advance(jumps[0][0] - self.clock.time())
+                self.clock.wall += jumps.pop(0)[1]
+                continue
+            if self.clock.time() + step > end:
+                break
+            self.clock.advance(step)
+            self.scheduler.process()
+            if self.scheduler.active != self.expected():
+                self.mismatches.append(datetime.fromtimestamp(self.clock.time()))
+
+    def expected(self):
+        now = datetime.fromtimestamp(self.clock.time())
+        return any(rule.window(now)[0] is not None for rule in self.scheduler.rules)
+
+
+def test_overlapping_rules_merge():
+    sim = Simulation(datetime(2026, 6, 1, 8, 0), [
+        {'start': '12:00', 'end': '13:00'},
+        {'start': '12:30', 'end': '14:00'},
+        {'start': '13:30', 'end': '13:45'},
+    ])
+    sim.run(datetime(2026, 6, 1, 18, 0))
+    assert sim.mismatches == []
+    assert sim.changes == [(True, datetime(2026, 6, 1, 12, 0)), (False, datetime(2026, 6, 1, 14, 0))]
+
+
+def test_overnight_rule_started_yesterday():
+    sim = Simulation(datetime(2026, 6, 2, 1, 0), [{'start': '23:00', 'end': '07:00', 'days': ['mon']}])
+    assert sim.scheduler.active  # 周一 23:00 开始，周二 1:00 仍在时段内
+    sim.run(datetime(2026, 6, 9, 8, 0))
+    assert sim.changes == [(True, datetime(2026, 6, 2, 1, 0)), (False, datetime(2026, 6, 2, 7, 0)),
+                           (True, datetime(2026, 6, 8, 23, 0)), (False, datetime(2026, 6, 9, 7, 0))]
+
+
+@pytest.mark.parametrize('jump', [3 * 3600, -3 * 3600, 86400, -86400])
+def test_wall_clock_jump(jump):
+    sim = Simulation(datetime(2026, 6, 1, 8, 0), [{'start': '12:00', 'end': '13:00'}])
+    rebuilds = sim.scheduler.rebuilds
+    sim.run(datetime(2026, 6, 3, 0, 0), jumps={datetime(2026, 6, 1, 10, 30): jump})
+    # 下一次定时器到期时发现偏离，只重建一次，之后的每次处理都与直接计算的结果一致
+    assert sim.scheduler.rebuilds == rebuilds + 1
+    assert sim.mismatches == []
+    assert sim.changes
+    assert [active for active, _ in sim.changes] == [True, False] * (len(sim.changes) // 2)
+
+
+def test_jump_into_window_activates_within_check_interval():
+    sim = Simulation(datetime(2026, 6, 1, 8, 0), [{'start': '12:00', 'end': '13:00'}])
+    # 10:30 把时间改到 12:10，CHECK_INTERVAL 内发现偏离并进入时段
+    sim.run(datetime(2026, 6, 1, 12, 40), jumps={datetime(2026, 6, 1, 10, 30): 100 * 60})
+    (active, at), = sim.changes
+    assert active
+    assert (at - datetime(2026, 6, 1, 12, 10)).total_seconds() <= BlackoutScheduler.CHECK_INTERVAL / 1000
+
+
+@pytest.mark.parametrize('day', [datetime(2026, 3, 28), datetime(2026, 10, 24)])
+def test_dst_transition_keeps_local_time(day):
+    # 3 月 29 日 2:00 -> 3:00，10 月 25 日 3:00 -> 2:00
+    sim = Simulation(day, [{'start': '08:00', 'end': '09:00'}, {'start': '01:30', 'end': '04:00'}])
+    sim.run(day.replace(day=day.day + 3))
+    starts = [at for active, at in sim.changes if active]
+    ends = [at for active, at in sim.changes if not active]
+    assert [at.time() for at in starts] == [datetime(1, 1, 1, 1, 30).time(), datetime(1, 1, 1, 8).time()] * 3
+    assert [at.time() for at in ends] == [datetime(1, 1, 1, 4).time(), datetime(1, 1, 1, 9).time()] * 3
+    assert sim.scheduler.rebuilds == 1  # 夏令时切换不是修改系统时间
+    assert sim.mismatches == []
+
+
+@pytest.mark.parametrize('day', [datetime(2026, 3, 28), datetime(2026, 10, 24)])
+def test_rule_at_dst_transition_runs_once_a_day(day):
+    # 2:30 在 3 月 29 日不存在(顺延到 3:30)，在 10 月 25 日出现两次(只算第一次)
+    sim = Simulation(day, [{'start': '02:30', 'end': '02:45'}])
+    sim.run(day.replace(day=day.day + 3))
+    assert [active for active, _ in sim.changes] == [True, False] * 3
+    assert sim.mismatches == []
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from brightness import BrightnessController, BrightnessJournal
+from helpers import wait_for
+from platform_backend import FakeBackend
+
+
+class Unavailable(FakeBackend):
+    """亮度接口还没准备好(登录时的 WMI/DDC)，ready 之后才能打开会话"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.ready = False
+
+    def open_brightness(self):
+        if not self.ready:
+            raise OSError("亮度接口尚未就绪")
+        return super().open_brightness()
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    path = tmp_path / 'brightness.json'
+    BrightnessJournal(str(path)).save({'DISPLAY1': 70, 'DISPLAY2': 40})
+    return path
+
+
+@pytest.fixture
+def fast_retry(monkeypatch):
+    monkeypatch.setattr(BrightnessController, 'RESTORE_RETRY_INTERVAL', 0.05)
+
+
+def start(backend, journal_path):
+    controller = BrightnessController(backend, journal_path=str(journal_path))
+    recovered = []
+    controller.recovered.connect(recovered.append)
+    controller.warm_up()
+    return controller, recovered
+
+
+def test_recover_restores_and_clears_journal(qt_app, journal_path):
+    backend = FakeBackend(monitors={'DISPLAY1': 0, 'DISPLAY2': 0})
+    controller, recovered = start(backend, journal_path)
+    assert wait_for(qt_app, lambda: recovered)
+    assert recovered == [{'DISPLAY1': 70, 'DISPLAY2': 40}]
+    assert backend.monitors == {'DISPLAY1': 70, 'DISPLAY2': 40}
+    assert not journal_path.exists()
+    controller.stop()
+
+
+def test_failed_read_keeps_journal_and_retries(qt_app, journal_path, fast_retry):
+    backend = Unavailable(monitors={'DISPLAY1': 0, 'DISPLAY2': 0})
+    controller, recovered = start(backend, journal_path)
+    wait_for(qt_app, lambda: False, timeout=0.2)
+    assert recovered == []
+    assert json.loads(journal_path.read_text())['levels'] == {'DISPLAY1': 70, 'DISPLAY2': 40}
+
+    backend.ready = True  # 稍后亮度接口可用，自动重试时恢复
+    assert wait_for(qt_app, lambda: recovered)
+    assert recovered == [{'DISPLAY1': 70, 'DISPLAY2': 40}]
+    assert not journal_path.exists()
+    controller.stop()
+
+
+def test_failed_write_keeps_journal(qt_app, journal_path, fast_retry, monkeypatch):
+    monkeypatch.setattr(BrightnessController, 'RECOVER_RETRIES', 2)
+    backend = FakeBackend(monitors={'DISPLAY1': 0, 'DISPLAY2': 0})
+    backend.write_delay = {'DISPLAY2': 2000}  # 超过写入超时
+    monkeypatch.setattr(BrightnessController, 'WRITE_TIMEOUT', 0.05)
+    controller, recovered = start(backend, journal_path)
+    wait_for(qt_app, lambda: False, timeout=0.3)
+    assert recovered == []
+    assert journal_path.exists()
+    controller.stop()
@@ -0,0 +1,40 @@
+import os
+import socket
+import sys
+
+import pytest
+
+from control_server import ControlServer
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="用 Unix 套接字模拟已有实例")
+
+
+@pytest.fixture
+def endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(ControlServer, 'PING_TIMEOUT', 0.05)
+    return str(tmp_path / 'control.sock')
+
+
+def test_stale_socket_is_replaced(qt_app, endpoint):
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(endpoint)
+    stale.close()  # 异常退出：套接字文件还在，但没有进程监听
+    server = ControlServer(endpoint, lambda command: {'ok': True})
+    assert server.listen()
+    server.close()
+
+
+def test_busy_instance_is_not_replaced(qt_app, endpoint):
+    busy = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    busy.bind(endpoint)
+    busy.listen()  # 能连上但一直不回复，模拟卡在长操作中的实例
+    try:
+        server = ControlServer(endpoint, lambda command: {'ok': True})
+        assert not server.listen()
+        assert os.path.exists(endpoint)
+        # 端点仍然属于原来的实例
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.connect(endpoint)
+        probe.close()
+    finally:
+        busy.close()
@@ -0,0 +1,77 @@
+from hotkey import ChordMatcher
+
+CODES = {'ctrl': (29, 97), 'shift': (42, 54), 'alt': (56,), 'b': (48,), 'x': (45,)}
+
+
+def matcher(**bindings):
+    return ChordMatcher(lambda key: CODES[key], bindings)
+
+
+def press(m, *keys):
+    """依次按下，返回触发的动作"""
+    fired = [m.key_down(CODES[key][0]) for key in keys]
+    return [action for action in fired if action]
+
+
+def release(m, *keys):
+    fired = [m.key_up(CODES[key][0]) for key in keys]
+    return [action for action in fired if action]
+
+
+def test_fires_once_while_held():
+    m = matcher(toggle='ctrl+b')
+    assert press(m, 'ctrl', 'b') == ['toggle']
+    assert press(m, 'b', 'b') == []  # 自动重复
+    assert release(m, 'b', 'ctrl') == []
+
+
+def test_extra_held_keys_do_not_block():
+    m = matcher(toggle='ctrl+b', dim='alt+x')
+    assert press(m, 'alt', 'ctrl', 'b') == ['toggle']
+    m.reset()
+    # 按住一个其他组合键用到的键(x)也能触发
+    assert press(m, 'x', 'ctrl', 'b') == ['toggle']
+
+
+def test_either_ctrl_key_matches():
+    m = matcher(toggle='ctrl+b')
+    assert m.key_down(CODES['ctrl'][1]) is None
+    assert m.key_down(CODES['b'][0]) == 'toggle'
+
+
+def test_overlapping_chords_fire_only_the_largest():
+    m = matcher(small='ctrl+b', large='ctrl+shift+b')
+    assert press(m, 'ctrl', 'shift', 'b') == ['large']
+    # 松开 shift 后 ctrl+b 仍按着，但它不是这次按下补齐的，不触发
+    assert release(m, 'shift') == []
+    assert release(m, 'b', 'ctrl') == []
+    assert press(m, 'ctrl', 'b') == ['small']
+
+
+def test_latched_chord_suppresses_larger_chord():
+    m = matcher(small='ctrl+b', large='ctrl+shift+b')
+    assert press(m, 'ctrl', 'b') == ['small']
+    assert press(m, 'shift') == []
+    # 松开 b 解除 ctrl+b 的锁定，再按 b 补齐 ctrl+shift+b
+    assert release(m, 'b') == []
+    assert press(m, 'b') == ['large']
+
+
+def test_release_any_key_rearms():
+    m = matcher(toggle='ctrl+b')
+    assert press(m, 'ctrl', 'b') == ['toggle']
+    assert release(m, 'ctrl') == []
+    assert press(m, 'ctrl') == ['toggle']
+    assert release(m, 'b') == []
+    assert press(m, 'b') == ['toggle']
+
+
+def test_poll_mask_uses_same_rules():
+    m = matcher(small='ctrl+b', large='ctrl+shift+b')
+    bits = m.keys
+    ctrl_b = bits['ctrl'] | bits['b']
+    assert m.match_mask(ctrl_b | bits['shift']) == 'large'
+    assert m.match_mask(ctrl_b | bits['shift']) is None
+    assert m.match_mask(ctrl_b) is None
+    assert m.match_mask(0) is None
+    assert m.match_mask(ctrl_b) == 'small'
@@ -0,0 +1,20 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor
+
+from app import BlackScreen
+
+
+def test_low_power_overlay_paints_black_without_stylesheet(qt_app):
+    overlay = BlackScreen(qt_app.primaryScreen(), exit_on_move=False, low_power=True)
+    assert overlay.styleSheet() == ''
+    assert overlay.testAttribute(Qt.WA_OpaquePaintEvent)
+    assert overlay.testAttribute(Qt.WA_NoSystemBackground)
+    image = overlay.grab().toImage()
+    assert overlay.stats['paint'] == 1
+    assert QColor(image.pixel(image.width() // 2, image.height() // 2)) == QColor(Qt.black)
+
+    overlay.set_low_power(False)  # 切回默认的样式表模式
+    assert overlay.styleSheet()
+    assert not overlay.testAttribute(Qt.WA_OpaquePaintEvent)
+    assert not overlay.testAttribute(Qt.WA_NoSystemBackground)
+    overlay.deleteLater()
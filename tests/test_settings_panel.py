@@ -0,0 +1,57 @@
+import pytest
+from PyQt5.QtCore import QPoint, QRect
+from PyQt5.QtWidgets import QPushButton
+
+from benchmark import close_button, create_button
+
+
+@pytest.fixture(scope='module')
+def button(qt_app):
+    # 同一进程中反复创建/销毁悬浮窗不稳定，整个模块共用一个
+    _, button, _ = create_button()
+    yield button
+    close_button(button)
+
+
+def save_button(button):
+    return next(w for w in button.settings_panel.findChildren(QPushButton) if w.text() == '保存设置')
+
+
+def corners(button):
+    screen = button.current_screen().availableGeometry()
+    return {
+        'top-left': screen.topLeft(),
+        'bottom-right': QPoint(screen.right() + 1 - 50, screen.bottom() + 1 - 50),
+    }
+
+
+@pytest.mark.parametrize('corner', ['top-left', 'bottom-right'])
+def test_panel_stays_on_screen_and_reachable(qt_app, button, corner):
+    start = corners(button)[corner]
+    button.move(start)
+    button.toggle_settings()
+    qt_app.processEvents()
+
+    screen = button.current_screen().availableGeometry()
+    assert screen.contains(button.frameGeometry())
+    assert button.rect().contains(button.settings_panel.geometry())
+    # 悬浮按钮留在原处，面板高度不超过屏幕，保存按钮可以滚动到并点击
+    assert button.pos() + button.main_button.pos() == start
+    assert button.settings_panel.height() <= screen.height()
+    save = save_button(button)
+    button.settings_scroll.ensureWidgetVisible(save)
+    qt_app.processEvents()
+    viewport = button.settings_scroll.viewport()
+    top_left = save.mapTo(viewport, QPoint(0, 0))
+    assert viewport.rect().contains(QRect(top_left, save.size()))
+
+    button.toggle_settings()
+    assert button.pos() == start
+    assert button.size().width() == 50 and button.size().height() == 50
+
+
+def test_panel_fits_content_when_screen_is_tall_enough(qt_app, button):
+    button.ensure_settings_panel()
+    body = button.settings_scroll.widget()
+    tall = button.current_screen().availableGeometry().adjusted(0, 0, 0, 5000)
+    assert button.settings_panel_height(tall) >= body.sizeHint().height()
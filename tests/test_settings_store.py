@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from helpers import wait_for
+from settings_store import SCHEMA_VERSION, SettingsStore, validate
+
+
+def test_save_after_close_is_ignored(qt_app, tmp_path):
+    store = SettingsStore(str(tmp_path / 'settings.json'))
+    store.watch()
+    store.update({'startup': True})
+    store.close()
+    assert store.write_count == 1
+    # 关闭后迟到的保存和文件变化通知不再提交到已停止的写入线程
+    store.update({'startup': False})
+    store.flush()
+    store._schedule_parse()
+    store.close()
+    assert store.write_count == 1
+
+
+def test_write_failure_is_retried(qt_app, tmp_path):
+    blocker = tmp_path / 'blocker'
+    blocker.write_text('')  # 设置目录的位置是一个文件，写入会失败
+    store = SettingsStore(os.path.join(str(blocker), 'settings.json'))
+    errors = []
+    store.failed.connect(errors.append)
+    store.update({'startup': True})
+    store.flush(wait=True)
+    assert not store.dirty  # 写入结果回到 GUI 线程之前
+    assert wait_for(qt_app, lambda: errors)
+    assert store.dirty  # 失败后仍需写入
+    assert errors[0].startswith('保存设置失败')
+
+    blocker.unlink()
+    store.flush(wait=True)
+    assert store.write_count == 1
+    assert not store.dirty
+    store.close()
+
+
+@pytest.mark.parametrize('version', [-1, '1', 1.0, True, None])
+def test_invalid_version_is_rejected(version):
+    values, errors = validate({'version': version, 'hide_cursor': False})
+    assert values == {}
+    assert errors == [f"无效的设置版本: {version!r}"]
+
+
+def test_old_version_is_migrated():
+    values, errors = validate({'hide_cursor': False, 'low_power_overlay': True})
+    assert values == {'hide_cursor': False}
+    assert errors == []
+    assert validate({'version': SCHEMA_VERSION, 'low_power_overlay': True}) == ({'low_power_overlay': True}, [])
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from wake import WakeDetector, load_traces, replay
+
+TRACES = load_traces(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'wake_traces.jsonl'))
+
+
+def test_library_has_both_kinds():
+    assert {trace['expect'] for trace in TRACES} == {'wake', 'stay'}
+
+
+@pytest.mark.parametrize('trace', TRACES, ids=[trace['name'] for trace in TRACES])
+def test_replay(trace):
+    woke_at = replay(trace, WakeDetector())
+    if trace['expect'] == 'stay':
+        assert woke_at is None, f"误唤醒于 {woke_at}ms"
+    else:
+        assert woke_at is not None, "漏唤醒"
+
+
+def test_detector_reused_across_traces():
+    # 同一个检测器依次回放所有轨迹(每次黑屏 reset 一次)，结果与单独回放一致
+    detector = WakeDetector()
+    false_wakes = missed_wakes = 0
+    for trace in TRACES:
+        woke_at = replay(trace, detector)
+        if trace['expect'] == 'stay':
+            false_wakes += woke_at is not None
+        else:
+            missed_wakes += woke_at is None
+    assert (false_wakes, missed_wakes) == (0, 0)
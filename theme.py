@@ -0,0 +1,140 @@
+from PyQt5.QtWidgets import QApplication
+
+# 整个程序只有这一份样式表，启动时由 QApplication 解析一次。
+# 控件的状态(空闲/黑屏中/正在记录快捷键)通过动态属性切换，
+# 不再在切换黑屏时给控件设置新的样式表字符串，避免每次都重新解析 CSS。
+APP_STYLESHEET = """
+    QToolTip {
+        background-color: rgba(40, 40, 40, 240);
+        color: white;
+        border: 1px solid rgba(255, 255, 255, 30);
+        border-radius: 4px;
+        padding: 4px;
+    }
+
+    /* 悬浮按钮 */
+    QPushButton#mainButton {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #6366f1, stop:1 #8b5cf6);
+        border-radius: 25px;
+        border: 2px solid rgba(255, 255, 255, 0.2);
+        color: white;
+        font-size: 18px;
+    }
+    QPushButton#mainButton:hover {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #818cf8, stop:1 #9333ea);
+        border: 2px solid rgba(255, 255, 255, 0.3);
+    }
+    QPushButton#mainButton[state="active"] {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #dc2626, stop:1 #b91c1c);
+    }
+    QPushButton#mainButton[state="active"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #ef4444, stop:1 #dc2626);
+    }
+
+    /* 设置面板 */
+    QFrame#settingsPanel, #settingsPanel QFrame {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 rgba(40, 40, 50, 245),
+                                  stop:1 rgba(45, 45, 55, 245));
+        border-radius: 15px;
+        border: 1px solid rgba(255, 255, 255, 0.1);
+    }
+    #settingsPanel QScrollArea, #settingsPanel #settingsBody {
+        background: transparent;
+        border: none;
+    }
+    #settingsPanel QLabel {
+        color: #e2e8f0;
+        font-size: 14px;
+        font-weight: bold;
+        margin-top: 10px;
+        margin-bottom: 5px;
+    }
+    #settingsPanel QLineEdit {
+        background: rgba(255, 255, 255, 0.1);
+        border: 1px solid rgba(255, 255, 255, 0.1);
+        border-radius: 8px;
+        color: white;
+        padding: 12px;
+        font-size: 14px;
+        min-height: 25px;
+    }
+    #settingsPanel QLineEdit:focus,
+    #settingsPanel QLineEdit[recording="true"] {
+        border: 1px solid rgba(99, 102, 241, 0.5);
+        background: rgba(255, 255, 255, 0.15);
+    }
+    #settingsPanel QCheckBox {
+        color: #e2e8f0;
+        font-size: 14px;
+        padding: 8px;
+    }
+    #settingsPanel QCheckBox::indicator {
+        width: 22px;
+        height: 22px;
+        border-radius: 6px;
+        border: 2px solid rgba(255, 255, 255, 0.2);
+        background: rgba(255, 255, 255, 0.1);
+    }
+    #settingsPanel QCheckBox::indicator:checked {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #6366f1, stop:1 #8b5cf6);
+        border: 2px solid rgba(255, 255, 255, 0.3);
+    }
+    #settingsPanel QPushButton {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #6366f1, stop:1 #8b5cf6);
+        border: none;
+        border-radius: 8px;
+        color: white;
+        padding: 12px;
+        font-size: 14px;
+        font-weight: bold;
+        min-height: 25px;
+    }
+    #settingsPanel QPushButton:hover {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                  stop:0 #818cf8, stop:1 #9333ea);
+    }
+    #settingsPanel QComboBox {
+        background: rgba(255, 255, 255, 0.1);
+        border: 1px solid rgba(255, 255, 255, 0.1);
+        border-radius: 8px;
+        color: white;
+        padding: 12px;
+        font-size: 14px;
+        min-height: 25px;
+    }
+    #settingsPanel QComboBox:hover {
+        background: rgba(255, 255, 255, 0.15);
+        border: 1px solid rgba(255, 255, 255, 0.2);
+    }
+    #settingsPanel QComboBox::drop-down {
+        border: none;
+        width: 30px;
+    }
+    #settingsPanel QComboBox::down-arrow {
+        image: none;
+    }
+"""
+
+
+def install(app=None):
+    """设置应用程序范围的样式表，只需在启动时调用一次"""
+    app = app or QApplication.instance()
+    app.setStyleSheet(APP_STYLESHEET)
+
+
+def set_state(widget, name, value):
+    """切换控件的动态属性并重新应用样式，只对这一个控件重新 polish"""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    widget.update()
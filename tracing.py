@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from collections import deque
+
+
+class Tracer:
+    """黑屏/恢复过程的分阶段跟踪
+
+    每次黑屏或恢复是一个周期，周期内各阶段(收到按键、匹配快捷键、显示黑屏、首次绘制、
+    读取/写入亮度……)记录单调时钟时间戳，保存在固定大小的环形缓冲区中，可以导出为 JSONL。
+    默认关闭，关闭时调用方只做一次属性判断。
+    """
+
+    def __init__(self, capacity=4096):
+        self.enabled = False
+        self._records = deque(maxlen=capacity)  # (周期, 类型, 阶段, 时间 ns, 线程名, 附加数据)
+        self._lock = threading.Lock()
+        self._cycle = 0
+        self._kind = None
+        self._stash = []  # 周期开始之前已经发生的阶段(如键盘钩子线程的时间戳)
+
+    def enable(self, capacity=None):
+        if capacity:
+            self._records = deque(self._records, maxlen=capacity)
+        self.enabled = True
+
+    def stash(self, stage, ns=None, **data):
+        """暂存一个阶段，下一次 begin 时并入新周期"""
+        if self.enabled:
+            self._stash.append((stage, ns or time.perf_counter_ns(), data))
+
+    def begin(self, kind):
+        """开始新的周期(blank 或 restore)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cycle += 1
+            self._kind = kind
+            stash, self._stash = self._stash, []
+        for stage, ns, data in stash:
+            self.record(stage, ns, **data)
+        self.record('begin')
+
+    def record(self, stage, ns=None, **data):
+        if not self.enabled:
+            return
+        if ns is None:
+            ns = time.perf_counter_ns()
+        self._records.append((self._cycle, self._kind, stage, ns,
+                              threading.current_thread().name, data))
+
+    def records(self):
+        """按周期整理后的记录，每条带相对周期开始的毫秒数"""
+        records = sorted(self._records, key=lambda record: (record[0], record[3]))
+        starts = {}
+        result = []
+        for cycle, kind, stage, ns, thread, data in records:
+            starts.setdefault(cycle, ns)
+            entry = {
+                'cycle': cycle,
+                'kind': kind,
+                'stage': stage,
+                'ns': ns,
+                'ms': (ns - starts[cycle]) / 1e6,
+                'thread': thread,
+            }
+            entry.update(data)
+            result.append(entry)
+        return result
+
+    def dump(self, path):
+        """把缓冲区写成 JSONL，返回写入的记录数"""
+        records = self.records()
+        with open(path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return len(records)
+
+    def clear(self):
+        self._records.clear()
+        self._stash = []
+
+
+tracer = Tracer()
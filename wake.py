@@ -0,0 +1,118 @@
+import json
+import math
+
+
+class WakeDetector:
+    """过滤抖动的鼠标唤醒检测
+
+    桌面震动、光电鼠标的抖动会产生零星的小幅移动事件，直接在第一个移动事件退出黑屏
+    会触发一次完整的亮度恢复和重新黑屏。这里只在一段时间窗口内的移动足够远或足够快时才唤醒：
+
+    - 距离：当前位置与“锚点”的距离，锚点以 window 为时间常数指数跟随鼠标位置，
+      来回抖动时锚点停在抖动中心，距离始终很小；
+    - 速度：移动速度向量的指数平均，来回抖动的速度方向相反、互相抵消。
+
+    每个事件只更新几个数值，内存占用固定，与事件数量无关。
+    """
+    __slots__ = ('distance', 'velocity', 'window', 'events', 'woke',
+                 '_x', '_y', '_t', '_anchor_x', '_anchor_y', '_vx', '_vy')
+
+    DISTANCE = 30  # 唤醒距离(像素)
+    VELOCITY = 400  # 唤醒速度(像素/秒)
+    WINDOW = 250  # 时间窗口(ms)
+
+    def __init__(self, distance=DISTANCE, velocity=VELOCITY, window=WINDOW):
+        self.distance = distance
+        self.velocity = velocity
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """重新开始检测(每次显示黑屏时)"""
+        self.events = 0
+        self.woke = False
+        self._t = None
+        self._x = self._y = 0.0
+        self._anchor_x = self._anchor_y = 0.0
+        self._vx = self._vy = 0.0
+
+    def feed(self, x, y, t):
+        """输入一次鼠标位置(t 为 ms)，达到唤醒条件时返回 True"""
+        self.events += 1
+        if self._t is None:
+            # 第一个事件(可能是窗口出现在鼠标下方时产生的)只作为起点
+            self._t = t
+            self._x = self._anchor_x = x
+            self._y = self._anchor_y = y
+            return False
+        dt = max(t - self._t, 1)
+        decay = math.exp(-dt / self.window)
+        # 速度向量的指数平均(像素/秒)
+        self._vx = self._vx * decay + (x - self._x) * 1000 / dt * (1 - decay)
+        self._vy = self._vy * decay + (y - self._y) * 1000 / dt * (1 - decay)
+        self._t = t
+        self._x = x
+        self._y = y
+        if (math.hypot(x - self._anchor_x, y - self._anchor_y) >= self.distance
+                or math.hypot(self._vx, self._vy) >= self.velocity):
+            self.woke = True
+            return True
+        # 锚点跟随当前位置，缓慢漂移不会无限累积
+        self._anchor_x += (x - self._anchor_x) * (1 - decay)
+        self._anchor_y += (y - self._anchor_y) * (1 - decay)
+        return False
+
+
+class WakeTraceRecorder:
+    """把黑屏期间的鼠标移动追加到 JSONL 文件，每次黑屏一行，用于扩充抖动样本库
+
+    expect 按本次是否被鼠标唤醒预先填写，加入样本库前需要人工确认。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._events = []
+
+    def add(self, x, y, t):
+        self._events.append([t, x, y])
+
+    def finish(self, woke):
+        """黑屏结束时写出本次记录，woke 表示是否由鼠标唤醒"""
+        events, self._events = self._events, []
+        if not events:
+            return
+        start = events[0][0]
+        trace = {
+            'name': f'recorded-{start}',
+            'source': 'recorded',
+            'expect': 'wake' if woke else 'stay',
+            'events': [[t - start, x, y] for t, x, y in events],
+        }
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(trace) + '\n')
+        except OSError as e:
+            print(f"写入鼠标轨迹失败: {e}")
+
+
+def load_traces(path):
+    """读取样本库(JSONL)，每行 {name, expect: 'wake'|'stay', events: [[t_ms, x, y], ...]}
+
+    录制的轨迹带有 source: 'recorded'，没有 source 的是脚本生成的合成轨迹。
+    """
+    traces = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                traces.append(json.loads(line))
+    return traces
+
+
+def replay(trace, detector):
+    """回放一条轨迹，返回唤醒时的时间(ms)，没有唤醒时返回 None"""
+    detector.reset()
+    for t, x, y in trace['events']:
+        if detector.feed(x, y, t):
+            return t
+    return None